@@ -0,0 +1,174 @@
+import os
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from preprocess import FramePreprocessor
+from recording import ReplayCapture
+from vision import AirDetector, GroundDetector
+
+# ==========================================
+#  管线定义 (与 webb.py / main.py 的默认配置一致)
+# ==========================================
+PIPELINES = {
+    # webb.py: 竖装摄像头顺时针旋转，下半屏 Air 判定
+    'air': {'factory': AirDetector, 'rotate': cv2.ROTATE_90_CLOCKWISE, 'flip': False},
+    # main.py: 不旋转，镜像翻转，指尖地面判定
+    'ground': {'factory': GroundDetector, 'rotate': None, 'flip': True},
+}
+
+# 每条管线下的命名配置 (传给检测器构造函数的参数)
+CONFIGS = {
+    'air': {
+        'baseline': {},
+        'roi': {'infer_roi': (0.05, 0.4, 0.95, 1.0)},
+        'roi-half': {'infer_roi': (0.05, 0.4, 0.95, 1.0), 'infer_scale': 0.5},
+        'gated': {'motion_gate': True},
+        'tracked': {'track_interval': 4},
+        'predict-ab': {'predict_filter': 'alpha-beta', 'predict_horizon': 0.03},
+        'predict-kalman': {'predict_filter': 'kalman', 'predict_horizon': 0.03},
+        # 只跑运动检测，对比两种引擎的耗时和检出率
+        'motion-diff': {'motion_only': True},
+        'motion-bg': {'motion_only': True, 'motion_engine': 'background'},
+    },
+    'ground': {
+        'baseline': {},
+        'roi': {'infer_roi': (0.15, 0.0, 0.85, 1.0)},
+        'roi-half': {'infer_roi': (0.15, 0.0, 0.85, 1.0), 'infer_scale': 0.5},
+        'tracked': {'track_interval': 4},
+    },
+}
+
+
+def parse_overrides(pairs):
+    """把 --set key=value 解析成参数字典 (数值自动转换)"""
+    overrides = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        for cast in (int, float):
+            try:
+                value = cast(value)
+                break
+            except ValueError:
+                pass
+        else:
+            if value in ('True', 'False', 'None'):
+                value = {'True': True, 'False': False, 'None': None}[value]
+        overrides[key] = value
+    return overrides
+
+
+def estimate_lag(track, max_shift=0.1, step=0.002):
+    """估计输出 Y 相对原始测量 Y 的时间偏移 (秒，负数 = 超前)
+
+    track: [(录制时间戳, raw_y, final_y), ...]。在 ±max_shift 内搜索使
+    final_y(t) 与 raw_y(t + shift) 误差最小的 shift，lag = -shift。
+    """
+    t, raw, out = (np.array(col, dtype=float) for col in zip(*track)) if track else ([], [], [])
+    valid = (raw != -1) & (out != -1) if len(track) else []
+    if np.count_nonzero(valid) < 10:
+        return None
+    t, raw, out = t[valid], raw[valid], out[valid]
+    best_shift, best_err = 0.0, None
+    for shift in np.arange(-max_shift, max_shift + step / 2, step):
+        inside = (t + shift >= t[0]) & (t + shift <= t[-1])
+        if np.count_nonzero(inside) < 10: continue
+        err = np.mean((out[inside] - np.interp(t[inside] + shift, t, raw)) ** 2)
+        if best_err is None or err < best_err:
+            best_shift, best_err = shift, err
+    return 0.0 - round(best_shift, 6)
+
+
+def run_pipeline(path, pipeline, params, realtime=False, warmup=10):
+    """把录制文件完整跑一遍检测，返回每帧延迟 (秒) 列表、总耗时、CPU 时间、检测器统计和 Y 轨迹"""
+    spec = PIPELINES[pipeline]
+    cap = ReplayCapture(path, realtime=realtime)
+    preprocessor = FramePreprocessor(spec['rotate'], spec['flip'])
+    latencies = []
+    track = []
+    frame_count = 0
+    start = None
+    cpu_start = None
+
+    with spec['factory'](**params) as detector:
+        # 录制时间戳和 perf_counter 不是同一个时钟：自动外推时长改用回放时实测的 交付 -> 判定 延迟
+        predictor = getattr(detector, 'predictor', None)
+        if predictor is not None: detector.measure_latency = False
+        while cap.isOpened():
+            success, image = cap.read()
+            if not success: break
+            image = preprocessor.process(image)
+            # 滤波按录制时间戳计算 dt，回放快慢不影响结果
+            result = detector.process(image, cap.recorded_timestamp, preprocessor.gray())
+            done = time.perf_counter()
+            if predictor is not None: predictor.observe_latency(done - cap.timestamp)
+            stats = getattr(detector, 'stats', None)
+            if hasattr(result, 'raw_y'):
+                track.append((cap.recorded_timestamp, result.raw_y, result.final_y))
+
+            frame_count += 1
+            # 前几帧包含模型初始化，不计入统计
+            if frame_count == warmup: start, cpu_start = done, time.process_time()
+            if frame_count > warmup: latencies.append(done - cap.timestamp)
+
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    cpu = time.process_time() - cpu_start if cpu_start is not None else 0.0
+    return latencies, elapsed, cpu, stats, track
+
+
+def summarize(name, latencies, elapsed, cpu=0.0, stats=None, track=None):
+    if not latencies:
+        return f"{name:<24} (帧数不足)"
+    ms = np.array(latencies) * 1000
+    fps = len(latencies) / elapsed if elapsed > 0 else 0
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    line = (f"{name:<24} {len(latencies):>6} {fps:>8.1f} "
+            f"{p50:>8.2f} {p90:>8.2f} {p99:>8.2f} {ms.max():>8.2f} {cpu * 1000 / len(latencies):>8.2f}")
+    if track and stats is not None and not stats.get('hands_runs'):
+        # 只跑运动检测时，给出有检测结果的帧占比
+        detected = sum(1 for _, y, _ in track if y != -1) / len(track)
+        line += f"  (motion {detected:.0%})"
+    if stats and stats.get('hands_gated'):
+        line += f"  (gated {stats['hands_gated']}, saved {stats['hands_saved_ms']:.0f} ms)"
+    if stats and stats.get('hands_tracked'):
+        line += f"  (model {stats['hands_runs']}, flow {stats['hands_tracked']})"
+    lag = estimate_lag(track) if track else None
+    if lag is not None:
+        # 相对原始融合 Y 的时间偏移 (负数 = 超前，即预测赚回的延迟) 和二阶差分抖动
+        outputs = np.array([y for _, _, y in track if y != -1])
+        jitter = np.std(np.diff(outputs, 2)) if len(outputs) > 2 else 0.0
+        line += f"  (lag {lag * 1000:+.0f} ms, jitter {jitter:.4f})"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用录制文件 (.chrec) 对检测管线做基准测试")
+    parser.add_argument('recording')
+    parser.add_argument('--pipeline', choices=sorted(PIPELINES), default='air')
+    parser.add_argument('--config', action='append', help="要测试的命名配置 (可多次指定，默认全部)")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help="覆盖检测器参数")
+    parser.add_argument('--realtime', action='store_true', help="按录制节奏回放 (默认尽快回放)")
+    parser.add_argument('--warmup', type=int, default=10, help="不计入统计的预热帧数")
+    args = parser.parse_args()
+
+    configs = CONFIGS[args.pipeline]
+    names = args.config or list(configs)
+    for name in names:
+        if name not in configs:
+            parser.error(f"未知配置 '{name}'，可选: {', '.join(configs)}")
+    overrides = parse_overrides(args.set)
+
+    print(f"{'config':<24} {'frames':>6} {'fps':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'cpu ms':>8}")
+    print("-" * 87)
+    for name in names:
+        params = dict(configs[name], **overrides)
+        latencies, elapsed, cpu, stats, track = run_pipeline(args.recording, args.pipeline, params, args.realtime, args.warmup)
+        print(summarize(name, latencies, elapsed, cpu, stats, track))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import cv2
+
+
+class FrameGrabber:
+    """独立采集线程 + 预分配环形缓冲区 (最新帧优先)
+
+    接口与 cv2.VideoCapture 保持一致 (isOpened / read / set / get / release)，
+    可以直接替换原来的 cap 对象。推理线程每次 read() 都拿到最新的一帧，
+    中间来不及处理的帧直接丢弃并计数，避免摄像头驱动队列积压导致 Air 延迟。
+    """
+
+    def __init__(self, cap, ring_size=3):
+        # 至少需要 3 个槽：采集线程正在写的、最新写完的、推理线程正在用的
+        if ring_size < 3:
+            raise ValueError("ring_size 至少为 3")
+        self.cap = cap
+        self.ring_size = ring_size
+
+        self._slots = [None] * ring_size
+        self._ids = [0] * ring_size
+        self._stamps = [0.0] * ring_size
+        self._latest = -1    # 最新写完的槽位
+        self._reading = -1   # 推理线程正在使用的槽位 (下一次 read 前不会被覆盖)
+
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frame_id = 0      # 最近一次 read() 返回的帧号 (从 1 开始)
+        self.timestamp = 0.0   # 最近一次 read() 返回帧的采集时间 (perf_counter)
+
+    def start(self):
+        # 驱动端只保留 1 帧，减少排队
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="FrameGrabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def _next_free(self, current):
+        for step in range(1, self.ring_size + 1):
+            idx = (current + step) % self.ring_size
+            if idx != self._latest and idx != self._reading:
+                return idx
+        return current
+
+    def _capture_loop(self):
+        write = 0
+        while self._running:
+            slot = self._slots[write]
+            # 传入预分配的缓冲区，尺寸一致时 OpenCV 会原地写入
+            success, frame = self.cap.read(slot) if slot is not None else self.cap.read()
+            stamp = time.perf_counter()
+            if not success:
+                if not self.cap.isOpened():
+                    break
+                time.sleep(0.005)
+                continue
+
+            with self._cond:
+                self.frames_captured += 1
+                self._slots[write] = frame
+                self._ids[write] = self.frames_captured
+                self._stamps[write] = stamp
+                self._latest = write
+                write = self._next_free(write)
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _has_new_frame(self):
+        return self._latest >= 0 and self._ids[self._latest] > self.frame_id
+
+    def read(self, timeout=1.0):
+        """返回 (success, frame)，frame 在下一次 read() 之前保持有效"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_new_frame() or not self._running, timeout)
+            if not self._has_new_frame():
+                return False, None
+
+            idx = self._latest
+            frame_id = self._ids[idx]
+            if self.frame_id:
+                self.frames_dropped += frame_id - self.frame_id - 1
+            self._reading = idx
+            self.frame_id = frame_id
+            self.timestamp = self._stamps[idx]
+            return True, self._slots[idx]
+
+    def isOpened(self):
+        return self._running or self._has_new_frame()
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def release(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.cap.release()
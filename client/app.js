@@ -0,0 +1,100 @@
+try {
+    const config = window.CHUNI_CONFIG;
+    const socket = io({ reconnectionDelay: 1000 });
+    const statusDiv = document.getElementById('status');
+    const keyMap = config.key_map;
+    const PROTOCOL = config.protocol;
+
+    // 每个键的 DOM 元素只查一次，之后按键变化时只改变化的那几个
+    const cells = {};
+    keyMap.forEach(k => {
+        let d = document.createElement('div'); d.className = 'key'; d.dataset.key = k;
+        document.getElementById('keyboard').appendChild(d);
+        cells[k] = d;
+    });
+
+    socket.on('connect', () => { statusDiv.textContent = "READY (Half-Screen IR)"; statusDiv.style.color = "#0f0"; });
+    socket.on('disconnect', () => { statusDiv.textContent = "Reconnecting..."; statusDiv.style.color = "#f33"; });
+
+    const currentHeldKeys = new Set();
+
+    function handleTouch(e) {
+        e.preventDefault();
+        const newHeldKeys = new Set();
+        const screenW = window.innerWidth;
+        const keyWidth = screenW / 16;
+        const edgeThreshold = keyWidth * 0.20;
+
+        Array.from(e.touches).forEach(t => {
+            let mainIndex = Math.floor(t.clientX / keyWidth);
+            if (mainIndex >= 0 && mainIndex < 16) {
+                newHeldKeys.add(keyMap[mainIndex]);
+                let offset = t.clientX % keyWidth;
+                if (offset < edgeThreshold && mainIndex > 0) newHeldKeys.add(keyMap[mainIndex - 1]);
+                if (offset > (keyWidth - edgeThreshold) && mainIndex < 15) newHeldKeys.add(keyMap[mainIndex + 1]);
+            }
+        });
+
+        const pressed = [...newHeldKeys].filter(k => !currentHeldKeys.has(k));
+        const released = [...currentHeldKeys].filter(k => !newHeldKeys.has(k));
+        if (!pressed.length && !released.length) return;
+
+        if (PROTOCOL !== 'bitmask') {
+            const stamp = serverNow();
+            pressed.forEach(k => socket.emit('keydown', k, stamp));
+            released.forEach(k => socket.emit('keyup', k, stamp));
+        }
+        pressed.forEach(k => { currentHeldKeys.add(k); cells[k].classList.add('pressed'); });
+        released.forEach(k => { currentHeldKeys.delete(k); cells[k].classList.remove('pressed'); });
+        if (PROTOCOL === 'bitmask') sendMask();
+    }
+
+    // 时钟同步 (NTP 思路)：每秒 ping 一次，取最近 8 次里往返最短的一次估计时钟偏差
+    const clock = { offset: 0, rtt: null, samples: [] };
+    function localNow() { return performance.timeOrigin + performance.now(); }
+    // 换算到服务器时钟的当前时间 (Unix 毫秒)，还没同步过时返回 0 (服务器不统计)
+    function serverNow() { return clock.rtt === null ? 0 : localNow() + clock.offset; }
+    function fmt(v) { return v == null ? '--' : v.toFixed(1); }
+    function syncClock() {
+        if (!socket.connected) return;
+        const t0 = localNow();
+        socket.emit('clock', { rtt: clock.rtt, offset: clock.offset }, r => {
+            const t3 = localNow();
+            const rtt = (t3 - t0) - (r.t2 - r.t1);
+            clock.samples.push({ rtt: rtt, offset: ((r.t1 - t0) + (r.t2 - t3)) / 2 });
+            if (clock.samples.length > 8) clock.samples.shift();
+            clock.offset = clock.samples.reduce((a, b) => b.rtt < a.rtt ? b : a).offset;
+            clock.rtt = rtt;
+            statusDiv.textContent = `RTT ${fmt(rtt)} ms | 单程 p50 ${fmt(r.p50)} p99 ${fmt(r.p99)} ms`;
+            statusDiv.style.color = r.p99 > 30 ? '#f33' : r.p99 > 15 ? '#fc0' : '#0f0';
+        });
+    }
+    setInterval(syncClock, 1000);
+
+    // 二进制协议：seq(uint16) + mask(uint16) + stamp(float64 服务器时钟毫秒)，小端；bit i = 从左数第 i 个键
+    let seq = 0;
+    const packet = new DataView(new ArrayBuffer(12));
+    function sendMask() {
+        if (!socket.connected) return;
+        let mask = 0;
+        keyMap.forEach((k, i) => { if (currentHeldKeys.has(k)) mask |= 1 << i; });
+        seq = (seq + 1) & 0xFFFF;
+        packet.setUint16(0, seq, true);
+        packet.setUint16(2, mask, true);
+        packet.setFloat64(4, serverNow(), true);
+        socket.emit('touch', packet.buffer.slice(0));
+    }
+
+    ['touchstart', 'touchmove', 'touchend', 'touchcancel'].forEach(evt => document.addEventListener(evt, handleTouch, {passive: false}));
+    if (PROTOCOL === 'bitmask') {
+        // 状态不变也定时重发完整掩码，丢包 / 漏掉的 touchend 最多 300ms 后自愈
+        setInterval(sendMask, 300);
+    } else {
+        setInterval(() => { if (socket.connected) socket.emit('sync_keys', Array.from(currentHeldKeys)); }, 300);
+    }
+
+    // Service Worker 只在安全上下文 (https / localhost) 可用，局域网 http 访问时浏览器会直接跳过
+    if (config.service_worker && 'serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/sw.js').catch(() => {});
+    }
+} catch(e) {}
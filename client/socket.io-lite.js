@@ -0,0 +1,110 @@
+// 精简版 Socket.IO v4 客户端，随项目一起分发 (离线局域网不依赖 CDN)
+// 只实现本项目用到的部分：WebSocket 传输、默认命名空间、emit (可带 ack 回调 / ArrayBuffer 参数)、
+// on('connect' | 'disconnect' | 服务器事件)、断线自动重连。协议: Engine.IO v4 + Socket.IO v5。
+(function (global) {
+    function io(opts) {
+        opts = opts || {};
+        const reconnectionDelay = opts.reconnectionDelay || 1000;
+        const url = opts.url || ((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host);
+        const handlers = {};
+        let acks = {};
+        let ackId = 0;
+        let ws = null;
+        let pingTimer = null;
+        let pingDeadline = 45000;
+
+        const socket = { connected: false };
+
+        function fire(event, args) {
+            (handlers[event] || []).forEach(fn => fn.apply(null, args));
+        }
+
+        socket.on = function (event, fn) {
+            (handlers[event] = handlers[event] || []).push(fn);
+            return socket;
+        };
+
+        socket.emit = function (event) {
+            if (!socket.connected) return socket;
+            const args = Array.prototype.slice.call(arguments, 1);
+            const ack = args.length && typeof args[args.length - 1] === 'function' ? args.pop() : null;
+            // 二进制参数换成占位符，正文之后逐个以二进制帧发送
+            const attachments = [];
+            const data = [event].concat(args.map(a => {
+                if (a instanceof ArrayBuffer || ArrayBuffer.isView(a)) {
+                    attachments.push(a);
+                    return { _placeholder: true, num: attachments.length - 1 };
+                }
+                return a;
+            }));
+            let id = '';
+            if (ack) {
+                id = String(++ackId);
+                acks[id] = ack;
+            }
+            const head = attachments.length ? '45' + attachments.length + '-' : '42';
+            ws.send(head + id + JSON.stringify(data));
+            attachments.forEach(a => ws.send(a));
+            return socket;
+        };
+
+        function resetPingTimer() {
+            clearTimeout(pingTimer);
+            pingTimer = setTimeout(() => ws && ws.close(), pingDeadline);
+        }
+
+        function onPacket(msg) {
+            if (typeof msg !== 'string') return;
+            const type = msg[0];
+            if (type === '0') {
+                // Engine.IO 握手：按服务器的心跳参数设置超时，然后连接默认命名空间
+                const open = JSON.parse(msg.slice(1));
+                pingDeadline = open.pingInterval + open.pingTimeout;
+                ws.send('40');
+            } else if (type === '2') {
+                ws.send('3');
+            } else if (type === '1') {
+                ws.close();
+            } else if (type === '4') {
+                const kind = msg[1];
+                const body = msg.slice(2);
+                if (kind === '0') {
+                    socket.connected = true;
+                    fire('connect', []);
+                } else if (kind === '1' || kind === '4') {
+                    ws.close();
+                } else if (kind === '2' || kind === '3') {
+                    const m = /^(\d*)([\s\S]*)$/.exec(body);
+                    const data = JSON.parse(m[2]);
+                    if (kind === '2') {
+                        fire(data[0], data.slice(1));
+                    } else if (acks[m[1]]) {
+                        const ack = acks[m[1]];
+                        delete acks[m[1]];
+                        ack.apply(null, data);
+                    }
+                }
+            }
+        }
+
+        function connect() {
+            ws = new WebSocket(url + '/socket.io/?EIO=4&transport=websocket');
+            ws.binaryType = 'arraybuffer';
+            ws.onmessage = e => { resetPingTimer(); onPacket(e.data); };
+            ws.onerror = () => ws.close();
+            ws.onclose = () => {
+                clearTimeout(pingTimer);
+                const wasConnected = socket.connected;
+                socket.connected = false;
+                acks = {};
+                if (wasConnected) fire('disconnect', []);
+                setTimeout(connect, reconnectionDelay);
+            };
+        }
+
+        connect();
+        return socket;
+    }
+
+    global.io = io;
+})(typeof window !== 'undefined' ? window : globalThis);
@@ -0,0 +1,29 @@
+// 离线缓存：/client/ 下的资源 URL 带内容版本号，缓存优先；首页先用缓存秒开，同时在后台更新
+const CACHE = 'chuni-client-{{ build }}';
+const PRECACHE = ['/'{% for name, version in versions.items() %}, '/client/{{ name }}?v={{ version }}'{% endfor %}];
+
+self.addEventListener('install', e => {
+    e.waitUntil(caches.open(CACHE).then(c => c.addAll(PRECACHE)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', e => {
+    e.waitUntil(caches.keys()
+        .then(keys => Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k))))
+        .then(() => self.clients.claim()));
+});
+
+self.addEventListener('fetch', e => {
+    const url = new URL(e.request.url);
+    if (e.request.method !== 'GET' || url.origin !== location.origin) return;
+    if (url.pathname.startsWith('/client/')) {
+        e.respondWith(caches.match(e.request).then(r => r || fetch(e.request)));
+    } else if (url.pathname === '/') {
+        const update = fetch(e.request).then(r => {
+            const copy = r.clone();
+            caches.open(CACHE).then(c => c.put('/', copy));
+            return r;
+        });
+        e.waitUntil(update.catch(() => {}));
+        e.respondWith(caches.match('/').then(r => r || update));
+    }
+});
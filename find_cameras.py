@@ -1,51 +1,284 @@
+import argparse
+import json
+import os
+import sys
+import threading
 import cv2
 import time
 
-def find_all_cameras():
+# 能力测试的候选分辨率 / 像素格式 (MJPG 在 USB 2.0 上通常能跑更高帧率，YUY2 不用解码、延迟更低)
+CANDIDATE_RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+CANDIDATE_FOURCCS = ['MJPG', 'YUY2']
+# 同一种像素格式在不同后端报回的名字 (V4L2 把 YUY2 报成 YUYV)
+FOURCC_ALIASES = {'YUYV': 'YUY2', 'YUNV': 'YUY2'}
+
+
+def same_fourcc(a, b):
+    a, b = a.upper(), b.upper()
+    return FOURCC_ALIASES.get(a, a) == FOURCC_ALIASES.get(b, b)
+
+# 测试结果缓存，按设备身份保存；main.py / webb.py 启动时直接按缓存里最快的格式打开摄像头
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'camera_cache.json')
+CACHE_VERSION = 1
+
+
+def dshow_device_names():
+    """Windows：DirectShow 视频输入设备名列表，顺序与摄像头索引一致；需要 pygrabber，没装或枚举失败返回 None"""
+    try:
+        from pygrabber.dshow_graph import FilterGraph
+    except ImportError:
+        return None
+    try:
+        return FilterGraph().get_input_devices()
+    except Exception:
+        return None
+
+
+def device_identity(index):
+    """不打开摄像头就能拿到的设备身份：Linux 读 sysfs 的设备名 + USB VID:PID，Windows 用 DirectShow 设备名，
+    都拿不到时只能用索引 (这时靠 cache_matches 在打开后核对)
+
+    身份变了 (换了摄像头 / 插到别的口导致索引变化) 缓存就不再命中，需要重新测试。
+    """
+    sysfs = f"/sys/class/video4linux/video{index}"
+    if os.path.isdir(sysfs):
+        def read(path):
+            try:
+                with open(path) as f: return f.read().strip()
+            except OSError:
+                return ''
+        name = read(os.path.join(sysfs, 'name'))
+        usb = os.path.join(sysfs, 'device', '..')
+        vid, pid = read(os.path.join(usb, 'idVendor')), read(os.path.join(usb, 'idProduct'))
+        return f"{index}:{name}:{vid}:{pid}" if vid else f"{index}:{name}"
+    if sys.platform == 'win32':
+        names = dshow_device_names()
+        if names is not None and index < len(names):
+            return f"{index}:{names[index]}"
+    return f"{sys.platform}:{index}"
+
+
+def cache_matches(entry, cap):
+    """刚打开的摄像头和缓存记录是否像同一个设备：后端相同、打开时的分辨率是探测到的默认分辨率
+    或者测过的某个模式 (V4L2 等驱动会记住上次设置的格式)；后端读不出分辨率时不比较
+
+    身份只有索引时 (Windows 没装 pygrabber)，同一索引换了摄像头也能发现。
+    """
+    if not cap.isOpened():
+        return False
+    if entry.get('backend') and entry['backend'] != cap.getBackendName():
+        return False
+    size = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    known = {(entry.get('width'), entry.get('height'))} | {(m['width'], m['height']) for m in entry.get('modes', [])}
+    return not all(size) or size in known
+
+
+def probe_index(index):
+    """打开并读一帧，返回 {'index', 'width', 'height', 'backend'}；打不开或读不到帧返回 None"""
+    cap = cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return None
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        # width / height / backend 同时是缓存的核对依据 (cache_matches)
+        return {'index': index, 'width': frame.shape[1], 'height': frame.shape[0],
+                'backend': cap.getBackendName()}
+    finally:
+        cap.release()
+
+
+def probe_all(max_index=20, timeout=3.0):
+    """并行探测 0 ~ max_index-1，每个索引一个线程，总共最多等 timeout 秒
+
+    cv2.VideoCapture 打开不存在的设备可能卡好几秒，而且无法中断：超时的探测线程
+    (daemon) 留在后台自己结束，结果直接丢掉。返回 {index: info}。
+    """
+    results = {}
+    threads = []
+    for i in range(max_index):
+        t = threading.Thread(target=lambda i=i: results.__setitem__(i, probe_index(i)),
+                             name=f"CameraProbe-{i}", daemon=True)
+        t.start()
+        threads.append(t)
+    deadline = time.perf_counter() + timeout
+    for t in threads:
+        t.join(max(0.0, deadline - time.perf_counter()))
+    return {i: info for i, info in sorted(dict(results).items()) if info is not None}
+
+
+def open_mode(index, width, height, fourcc):
+    cap = cv2.VideoCapture(index)
+    apply_mode(cap, {'width': width, 'height': height, 'fourcc': fourcc})
+    return cap
+
+
+def apply_mode(cap, mode):
+    """按测试结果设置摄像头：先设像素格式再设分辨率 (部分驱动切分辨率时会重置格式)"""
+    if mode.get('fourcc'):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode['fourcc']))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode['width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode['height'])
+    # 驱动只缓存 1 帧，read() 拿到的总是最新帧 (不是所有后端都支持)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+
+def benchmark_mode(index, width, height, fourcc, frames=60, warmup=10):
+    """实测一种模式：实际交付帧率 fps、read() 阻塞时间的中位数 read_ms，以及瞬间返回 (< 1ms) 的比例 stale_ratio
+
+    驱动里积压着旧帧时 read() 会立刻返回，stale_ratio 越高说明拿到的帧越旧 (延迟越大)。
+    """
+    cap = open_mode(index, width, height, fourcc)
+    try:
+        if not cap.isOpened():
+            return None
+        for _ in range(warmup):
+            if not cap.read()[0]: return None
+        # 有的后端读不出实际格式 (返回 0)，这时只能相信设置成功了
+        actual_fourcc = int(cap.get(cv2.CAP_PROP_FOURCC)).to_bytes(4, 'little').decode('ascii', 'replace').strip('\x00')
+        reads = []
+        shape = None
+        start = time.perf_counter()
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret: return None
+            reads.append(time.perf_counter() - t0)
+            shape = frame.shape
+        elapsed = time.perf_counter() - start
+        reads.sort()
+        return {'width': shape[1], 'height': shape[0], 'fourcc': fourcc,
+                'actual_fourcc': actual_fourcc,
+                'fps': round(frames / elapsed, 2),
+                'read_ms': round(reads[len(reads) // 2] * 1000, 2),
+                'stale_ratio': round(sum(r < 0.001 for r in reads) / len(reads), 3),
+                # 分辨率 / 格式没设上 (驱动回退到别的模式) 的结果不能当成这个模式用
+                'matched': (shape[1] == width and shape[0] == height
+                            and (not actual_fourcc or same_fourcc(actual_fourcc, fourcc)))}
+    finally:
+        cap.release()
+
+
+def benchmark_device(index, resolutions=CANDIDATE_RESOLUTIONS, fourccs=CANDIDATE_FOURCCS, frames=60):
+    modes = []
+    for width, height in resolutions:
+        for fourcc in fourccs:
+            result = benchmark_mode(index, width, height, fourcc, frames)
+            if result is not None and result['matched']:
+                modes.append(result)
+    return modes
+
+
+def mode_rank(mode):
+    # 帧率高优先 (按 5fps 分档，测量抖动不影响排序)，其次驱动积压少，再次 read 等待短
+    return (-round(mode['fps'] / 5), mode['stale_ratio'], mode['read_ms'])
+
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {'version': CACHE_VERSION, 'devices': {}}
+    if cache.get('version') != CACHE_VERSION:
+        return {'version': CACHE_VERSION, 'devices': {}}
+    return cache
+
+
+def save_cache(cache, path=CACHE_PATH):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def best_mode(index, width=None, height=None, path=CACHE_PATH, cap=None):
+    """缓存里这个摄像头最快的模式 ({'width', 'height', 'fourcc', 'fps', ...})，没有测试过返回 None
+
+    指定 width / height 时只在这个分辨率的模式里选 (例如只挑 MJPG / YUY2)，没有测过这个分辨率则返回 None。
+    给出刚打开 (还没设置模式) 的 cap 时先核对缓存记录，对不上 (换了摄像头) 返回 None。
+    """
+    entry = load_cache(path)['devices'].get(device_identity(index))
+    if not entry:
+        return None
+    if cap is not None and not cache_matches(entry, cap):
+        print(f"⚠️  摄像头 {index} 和缓存记录不符 (换了设备?)，按默认方式打开；运行 find_cameras.py 重新测试")
+        return None
+    modes = entry['modes']
+    if width is not None and height is not None:
+        modes = [m for m in modes if m['width'] == width and m['height'] == height]
+    return min(modes, key=mode_rank) if modes else None
+
+
+def discover(max_index=20, timeout=3.0, path=CACHE_PATH, refresh=False, bench=True, frames=60):
+    """并行探测摄像头，对新设备逐个做能力测试 (同时测会互相抢 USB 带宽)，结果写入缓存
+
+    已经在缓存里 (设备身份相同，且探测到的后端 / 默认分辨率和记录一致) 的设备跳过能力测试；
+    refresh=True 时全部重测。返回 [entry, ...]。
+    """
+    cache = load_cache(path)
+    found = probe_all(max_index, timeout)
+    entries = []
+    for index, info in found.items():
+        identity = device_identity(index)
+        entry = cache['devices'].get(identity)
+        changed = entry is not None and any(entry.get(k) != info[k] for k in ('backend', 'width', 'height'))
+        if entry is None or refresh or changed or (bench and not entry.get('modes')):
+            entry = dict(info, identity=identity, modes=[], probed_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+            if bench:
+                print(f"  测试摄像头 {index} 的分辨率 / 格式...", flush=True)
+                entry['modes'] = benchmark_device(index, frames=frames)
+            cache['devices'][identity] = entry
+        entries.append(entry)
+    save_cache(cache, path)
+    return entries
+
+
+def find_all_cameras(max_index=20, timeout=3.0, path=CACHE_PATH, refresh=False, bench=True):
     """查找并显示所有可用摄像头的索引"""
     print("=" * 50)
     print("摄像头检测工具")
     print("=" * 50)
-    print("\n正在扫描摄像头设备...\n")
-    
-    available_cameras = []
-    
-    # 扫描前20个索引
-    for i in range(20):
-        print(f"检查索引 {i:2d}...", end=" ", flush=True)
-        try:
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                # 尝试读取一帧
-                ret, frame = cap.read()
-                if ret:
-                    available_cameras.append(i)
-                    print(f"✓ 摄像头可用")
-                else:
-                    print(f"✗ 无法读取")
-                cap.release()
-            else:
-                print(f"✗ 无法打开")
-        except Exception as e:
-            print(f"✗ 错误: {e}")
-    
+    print(f"\n正在并行扫描 0 ~ {max_index - 1} 号摄像头 (最多等待 {timeout:.0f} 秒)...\n")
+
+    start = time.perf_counter()
+    entries = discover(max_index, timeout, path, refresh, bench)
+    available_cameras = [e['index'] for e in entries]
+    print(f"扫描用时 {time.perf_counter() - start:.1f} 秒")
+
     print("\n" + "=" * 50)
     if available_cameras:
         print(f"\n找到 {len(available_cameras)} 个可用摄像头:")
         print("-" * 50)
-        for idx, camera_id in enumerate(available_cameras):
-            print(f"  {idx + 1}. 摄像头索引: {camera_id}")
+        for idx, entry in enumerate(entries):
+            print(f"  {idx + 1}. 摄像头索引: {entry['index']}  ({entry['backend']}, 默认 {entry['width']}x{entry['height']})")
+            for mode in sorted(entry['modes'], key=mode_rank):
+                print(f"       {mode['width']:>4}x{mode['height']:<4} {mode['fourcc']}  "
+                      f"{mode['fps']:6.1f} fps  read {mode['read_ms']:5.1f} ms  积压 {mode['stale_ratio']:.0%}")
+            if entry['modes']:
+                best = min(entry['modes'], key=mode_rank)
+                print(f"       -> 最快: {best['width']}x{best['height']} {best['fourcc']}")
         print("-" * 50)
         print(f"\n推荐使用索引: {available_cameras[-1]} (最后一个，通常是虚拟摄像头)")
+        print(f"测试结果已缓存到 {path}，main.py / webb.py 启动时会按最快的格式打开")
     else:
         print("\n未找到任何摄像头设备！")
-    
+
     print("\n" + "=" * 50)
     return available_cameras
 
 if __name__ == "__main__":
-    cameras = find_all_cameras()
-    
+    parser = argparse.ArgumentParser(description="摄像头检测：并行探测 + 分辨率 / 格式能力测试 (结果缓存)")
+    parser.add_argument('--max-index', type=int, default=20, help="探测 0 ~ N-1 号索引")
+    parser.add_argument('--timeout', type=float, default=3.0, help="探测最多等待的秒数")
+    parser.add_argument('--refresh', action='store_true', help="忽略缓存，重新测试所有摄像头")
+    parser.add_argument('--no-bench', action='store_true', help="只探测能否打开，不做能力测试")
+    parser.add_argument('--cache', default=CACHE_PATH)
+    args = parser.parse_args()
+
+    cameras = find_all_cameras(args.max_index, args.timeout, args.cache, args.refresh, not args.no_bench)
+
     # 允许用户选择并预览
     if cameras:
         while True:
@@ -61,8 +294,8 @@ if __name__ == "__main__":
                 
                 print(f"\n正在打开摄像头 {camera_idx}...")
                 cap = cv2.VideoCapture(camera_idx)
-                cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                mode = best_mode(camera_idx, path=args.cache, cap=cap)
+                apply_mode(cap, mode or {'width': 640, 'height': 480})
                 
                 print("预览中... 按 'q' 退出预览")
                 frame_count = 0
@@ -0,0 +1,91 @@
+import numpy as np
+
+
+def default_levels(infer_scale=1.0, max_num_hands=2, low_scale=0.6):
+    """从配置的画质开始逐级降低：缩小推理分辨率 -> 只检测一只手 -> 只用运动检测 (帧差)"""
+    low = infer_scale * low_scale
+    return [
+        {'name': 'full', 'infer_scale': infer_scale, 'max_num_hands': max_num_hands, 'motion_only': False},
+        {'name': 'low-res', 'infer_scale': low, 'max_num_hands': max_num_hands, 'motion_only': False},
+        {'name': 'one-hand', 'infer_scale': low, 'max_num_hands': 1, 'motion_only': False},
+        {'name': 'motion-only', 'infer_scale': low, 'max_num_hands': 1, 'motion_only': True},
+    ]
+
+
+class QualityGovernor:
+    """自适应画质：跟踪每帧处理耗时，超出目标就降一级画质，有余量时再升回来
+
+    每 window 帧评估一次该窗口的 p90：
+      - 超过 target_ms -> 降一级
+      - 连续 up_after 个窗口都低于 target_ms * headroom -> 升一级
+    升级后下一个窗口就超时说明这一级撑不住，这一级的 up_after 翻倍 (最多 max_up_after)，
+    避免在两级之间来回跳。切换后丢掉当前窗口 (切换那一帧可能要重建模型，耗时不具代表性)。
+
+    apply(**画质参数) 负责把这一级的参数应用到检测器 (AirDetector.set_quality)。
+    """
+
+    def __init__(self, apply, target_ms=8.3, levels=None, window=30, headroom=0.6,
+                 up_after=3, max_up_after=64, verbose=True):
+        self.apply = apply
+        self.target_ms = target_ms
+        self.levels = levels or default_levels()
+        self.window = window
+        self.headroom = headroom
+        self.max_up_after = max_up_after
+        self.verbose = verbose
+        self.level = 0
+        self.transitions = []    # [(帧序号, 旧等级, 新等级, 触发时的 p90 毫秒), ...]
+        self.frames = 0
+        self._samples = []
+        self._calm_windows = 0
+        self._up_after = [up_after] * len(self.levels)
+        self._just_raised = False
+
+    def update(self, seconds):
+        """每帧调用一次，seconds = 这一帧的处理耗时；发生切换时返回新等级，否则返回 None"""
+        self.frames += 1
+        self._samples.append(seconds * 1000)
+        if len(self._samples) < self.window:
+            return None
+        p90 = float(np.percentile(self._samples, 90))
+        self._samples.clear()
+
+        if p90 > self.target_ms:
+            self._calm_windows = 0
+            if self._just_raised:
+                # 刚升上来就超时：下次在更低一级多等一会儿再尝试
+                below = self.level + 1
+                if below < len(self.levels):
+                    self._up_after[below] = min(self._up_after[below] * 2, self.max_up_after)
+            self._just_raised = False
+            if self.level + 1 < len(self.levels):
+                return self._switch(self.level + 1, p90)
+            return None
+
+        self._just_raised = False
+        if p90 < self.target_ms * self.headroom and self.level > 0:
+            self._calm_windows += 1
+            if self._calm_windows >= self._up_after[self.level]:
+                self._calm_windows = 0
+                self._just_raised = True
+                return self._switch(self.level - 1, p90)
+        else:
+            self._calm_windows = 0
+        return None
+
+    def _switch(self, level, p90):
+        old = self.level
+        self.level = level
+        self.transitions.append((self.frames, old, level, p90))
+        params = {k: v for k, v in self.levels[level].items() if k != 'name'}
+        self.apply(**params)
+        self._samples.clear()
+        if self.verbose:
+            arrow = '⬇' if level > old else '⬆'
+            print(f"🎚 {arrow} quality {self.levels[old]['name']} -> {self.levels[level]['name']} "
+                  f"(p90 {p90:.1f} ms, target {self.target_ms} ms)")
+        return level
+
+    @property
+    def stats(self):
+        return {'quality_level': self.level, 'quality_transitions': len(self.transitions)}
@@ -0,0 +1,299 @@
+import argparse
+import collections
+import csv
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+# ==========================================
+#  事件日志 (.chjn)：定长二进制记录的环形文件
+# ==========================================
+# 热路径 (检测循环 / 触摸处理) 只往内存队列里追加一个元组，不做任何 I/O；
+# 后台线程每隔 flush_interval 秒把队列批量写进内存映射的环形文件，写满后从头覆盖最旧的记录。
+# 文件头: magic(4s) + version(H) + record_size(H) + capacity(I) + clock_offset(d, 墙钟 - perf_counter) + total(Q, 累计写入条数)
+# 之后是 capacity 条 JOURNAL_DTYPE 记录，第 n 条 (从 0 数) 在槽位 n % capacity。
+MAGIC = b'CHJN'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIdQ')
+HEADER_SIZE = 32
+
+JOURNAL_DTYPE = np.dtype([
+    ('timestamp', '<f8'),        # perf_counter，与 InputDispatcher / 视觉进程的时间戳同一个时钟
+    ('frame_id', '<u4'),         # 摄像头帧号，触摸为消息序号，0 = 无
+    ('latency_ms', '<f4'),       # 采集 / 客户端发送 -> 记录 的延迟，NaN = 未知
+    ('device', '<u2'),           # 同一来源里的设备编号 (每个 Socket.IO 连接 / UDP 地址一个)
+    ('source', 'u1'),            # SOURCES 的下标
+    ('state', 'u1'),             # 1 = 按下，0 = 松开
+    ('level', 'i1'),             # IR 等级 (Air)，其余来源为 0
+    ('key', 'S11'),
+])
+
+# 来源只能追加，不能改顺序 (旧文件按下标解读)
+SOURCES = ('air', 'ground', 'touch', 'udp', 'keys')
+SOURCE_CODES = {name: i for i, name in enumerate(SOURCES)}
+
+
+class EventJournal:
+    """把按键事件写进 .chjn 环形文件；log() 可以在任意线程里调用
+
+    打开时同名旧文件改名为 <path>.prev (保留上一次的记录)，新文件一次分配 capacity 条。
+    后台线程来不及写时内存队列最多积压 capacity 条，再多就丢掉最旧的 (dropped 计数)。
+    """
+
+    def __init__(self, path, capacity=1 << 18, flush_interval=0.1):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.clock_offset = time.time() - time.perf_counter()
+        self.total = 0
+        self.dropped = 0
+        self.errors = 0       # 因为记录无法转换而整批丢弃的次数
+        self._pending = collections.deque(maxlen=capacity)
+        self._devices = {}
+        self._devices_lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                os.replace(path, path + '.prev')
+            except OSError:
+                pass
+        size = HEADER_SIZE + capacity * JOURNAL_DTYPE.itemsize
+        self._file = open(path, 'w+b')
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._records = np.ndarray((capacity,), dtype=JOURNAL_DTYPE, buffer=self._mm, offset=HEADER_SIZE)
+        self._write_header()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="EventJournal", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def device(self, name):
+        """设备名 (sid / 'udp:ip:port') -> 编号，第一次出现时分配"""
+        index = self._devices.get(name)
+        if index is None:
+            with self._devices_lock:
+                index = self._devices.setdefault(name, len(self._devices))
+        return index
+
+    def log(self, source, key, down, level=0, frame_id=0, latency=math.nan, device=0):
+        """热路径：只追加一个元组 (deque.append 本身是线程安全的)；latency 单位秒
+
+        key 可能直接来自客户端 (旧协议的 keydown)：这里就编码成 ASCII 并截断，非 ASCII 字符记为 '?'。
+        """
+        if len(self._pending) == self.capacity: self.dropped += 1
+        self._pending.append((time.perf_counter(), frame_id, latency * 1000, min(device, 0xFFFF),
+                              SOURCE_CODES[source], down, level, str(key).encode('ascii', 'replace')[:11]))
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, JOURNAL_DTYPE.itemsize, self.capacity,
+                         self.clock_offset, self.total)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """把积压的事件写进环形文件 (后台线程定时调用)；一批里有写不进去的记录时整批丢掉，日志继续"""
+        n = len(self._pending)
+        if not n: return
+        items = [self._pending.popleft() for _ in range(n)]
+        try:
+            batch = np.array(items, dtype=JOURNAL_DTYPE)
+        except Exception as e:
+            self.dropped += n
+            if not self.errors: print(f"⚠️  事件日志丢弃了一批无法写入的记录: {e}")
+            self.errors += 1
+            return
+        start = self.total % self.capacity
+        first = min(n, self.capacity - start)
+        self._records[start:start + first] = batch[:first]
+        self._records[:n - first] = batch[first:]
+        # 先写记录再更新条数：读方看到的 total 之内的记录都是完整的
+        self.total += n
+        self._write_header()
+
+    def close(self):
+        if self._mm is None: return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self._mm.flush()
+        del self._records   # 释放对映射的引用，否则 mmap 关不掉
+        self._mm.close()
+        self._mm = None
+        self._file.close()
+
+
+def read_header(data, path=''):
+    magic, version, record_size, capacity, clock_offset, total = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} 不是 .chjn 事件日志")
+    if version != VERSION or record_size != JOURNAL_DTYPE.itemsize:
+        raise ValueError(f"不支持的事件日志版本: {version} (记录 {record_size} 字节)")
+    return capacity, clock_offset, total
+
+
+def ordered_records(data, capacity, total, since=0):
+    """环形区里第 since 条到第 total 条 (不含) 的记录，按写入顺序；已被覆盖的部分跳过"""
+    records = np.frombuffer(data, dtype=JOURNAL_DTYPE, count=capacity, offset=HEADER_SIZE)
+    since = max(since, total - capacity)
+    if since >= total:
+        return records[:0].copy()
+    start, end = since % capacity, total % capacity
+    if start < end or end == 0:
+        return records[start:end or capacity].copy()
+    return np.concatenate((records[start:], records[:end]))
+
+
+def load_journal(path):
+    """返回 (按时间排列的记录, clock_offset, 累计写入条数)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    capacity, clock_offset, total = read_header(data, path)
+    records = ordered_records(data, capacity, total)
+    # 不同线程的事件先取时间戳再入队，写入顺序和时间顺序可能差几微秒
+    return records[np.argsort(records['timestamp'], kind='stable')], clock_offset, total
+
+
+def hold_durations(records):
+    """按 (来源, 设备, 键) 配对按下 -> 松开，返回 ({(来源名, 键): [按住秒数, ...]}, 结尾仍按着的 [(来源名, 键), ...])"""
+    holds = collections.defaultdict(list)
+    down_at = {}
+    for t, source, device, key, state in zip(records['timestamp'], records['source'], records['device'],
+                                             records['key'], records['state']):
+        ident = (int(source), int(device), key)
+        if state:
+            down_at.setdefault(ident, t)
+        elif ident in down_at:
+            holds[(SOURCES[source], key.decode())].append(t - down_at.pop(ident))
+    held = sorted((SOURCES[s], k.decode()) for s, _, k in down_at)
+    return holds, held
+
+
+def event_rates(records, window=1.0):
+    """每个来源的 (事件数, 平均每秒事件数, window 秒内的最大事件数)"""
+    if not len(records):
+        return {}
+    span = max(float(records['timestamp'][-1] - records['timestamp'][0]), window)
+    rates = {}
+    for code in np.unique(records['source']):
+        times = records['timestamp'][records['source'] == code]
+        peak = int((np.searchsorted(times, times + window) - np.arange(len(times))).max())
+        rates[SOURCES[code]] = (len(times), len(times) / span, peak)
+    return rates
+
+
+def latency_stats(records):
+    """每个来源按下事件的延迟分位数 {来源名: (次数, p50, p90, p99, max)} (毫秒)"""
+    stats = {}
+    for code in np.unique(records['source']):
+        rows = records[(records['source'] == code) & (records['state'] == 1)]
+        latency = rows['latency_ms'][~np.isnan(rows['latency_ms'])]
+        if len(latency):
+            p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+            stats[SOURCES[code]] = (len(latency), p50, p90, p99, latency.max())
+    return stats
+
+
+def format_event(record, clock_offset):
+    wall = time.strftime('%H:%M:%S', time.localtime(record['timestamp'] + clock_offset))
+    millis = int((record['timestamp'] + clock_offset) % 1 * 1000)
+    source = SOURCES[record['source']]
+    line = f"{wall}.{millis:03d} {source:<6} #{record['device']:<3} {'down' if record['state'] else 'up  '} " \
+           f"{record['key'].decode():<6}"
+    if record['level']: line += f" IR{record['level']}"
+    if record['frame_id']: line += f" frame {record['frame_id']}"
+    if not math.isnan(record['latency_ms']): line += f" {record['latency_ms']:.1f} ms"
+    return line
+
+
+def summarize(records, clock_offset, total):
+    if not len(records):
+        print("📝 日志是空的")
+        return
+    start = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(records['timestamp'][0] + clock_offset))
+    span = records['timestamp'][-1] - records['timestamp'][0]
+    lost = total - len(records)
+    print(f"📝 {len(records)} events from {start}, {span:.1f} s" + (f" (最旧的 {lost} 条已被覆盖)" if lost else ""))
+
+    print(f"\n{'source':<8} {'events':>7} {'per s':>7} {'peak/s':>7}")
+    for source, (count, rate, peak) in event_rates(records).items():
+        print(f"{source:<8} {count:>7} {rate:>7.1f} {peak:>7}")
+
+    stats = latency_stats(records)
+    if stats:
+        print(f"\n{'latency':<8} {'n':>7} {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+        for source, (count, p50, p90, p99, worst) in stats.items():
+            print(f"{source:<8} {count:>7} {p50:>7.1f} {p90:>7.1f} {p99:>7.1f} {worst:>7.1f}")
+
+    holds, held = hold_durations(records)
+    if holds:
+        print(f"\n{'hold':<14} {'n':>5} {'p50 ms':>8} {'p90 ms':>8} {'max ms':>8}")
+        for (source, key), durations in sorted(holds.items()):
+            d = np.array(durations) * 1000
+            p50, p90 = np.percentile(d, [50, 90])
+            print(f"{source + ' ' + key:<14} {len(d):>5} {p50:>8.1f} {p90:>8.1f} {d.max():>8.1f}")
+    if held:
+        print(f"\n⚠️  日志结尾仍按着 (没有松开记录): {', '.join(f'{s} {k}' for s, k in held)}")
+
+
+def follow(path, interval=0.1):
+    """像 tail -f 一样实时打印新事件 (代替检测循环里原来的 IR 打印)"""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        capacity, clock_offset, seen = read_header(mm, path)
+        try:
+            while True:
+                total = read_header(mm, path)[2]
+                for record in ordered_records(mm, capacity, total, seen):
+                    print(format_event(record, clock_offset))
+                seen = total
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            mm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="读取事件日志 (.chjn)：按键按住时长、事件频率、延迟分位数")
+    parser.add_argument('journal')
+    parser.add_argument('--follow', action='store_true', help="实时打印新事件 (控制器运行时另开一个窗口)")
+    parser.add_argument('--events', action='store_true', help="逐条打印全部事件")
+    parser.add_argument('--csv', help="把全部事件导出为 CSV")
+    args = parser.parse_args()
+
+    if args.follow:
+        follow(args.journal)
+        return
+
+    records, clock_offset, total = load_journal(args.journal)
+    if args.events:
+        for record in records:
+            print(format_event(record, clock_offset))
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['time', 'source', 'device', 'key', 'state', 'level', 'frame_id', 'latency_ms'])
+            for r in records:
+                writer.writerow([f"{r['timestamp'] + clock_offset:.6f}", SOURCES[r['source']], r['device'],
+                                 r['key'].decode(), int(r['state']), r['level'], r['frame_id'],
+                                 '' if math.isnan(r['latency_ms']) else f"{r['latency_ms']:.2f}"])
+        print(f"📝 {len(records)} events -> {args.csv}")
+    summarize(records, clock_offset, total)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import os
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import argparse
+import json
+import math
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# ==========================================
+#  端到端 (画面 -> 按键) 延迟基准
+# ==========================================
+# 每种管线模式在独立的子进程里跑完整的 webb.py 检测循环：摄像头换成合成画面 (synthetic.py)，
+# 按键输出换成带时间戳的 RecordingBackend。光斑穿过 IR 分界线的时刻由轨迹精确算出，
+# 与对应 IR 键的 key_down 时间相减就是 "画面 -> 按键" 延迟。两者都是 perf_counter 时钟，跨进程可直接相减。
+#
+# glass: 从光斑真正穿线算起 (含最多 1 帧的采样等待)
+# frame: 从第一张能看到穿线的帧的曝光时刻算起 (处理 + 分发)
+MODES = {
+    # run_camera_loop：采集线程 + 本进程推理 (默认配置)
+    'inline': {},
+    # 不用采集线程，推理循环直接读摄像头
+    'inline-sync': {'USE_CAPTURE_THREAD': False},
+    'predict': {'PREDICT_FILTER': 'alpha-beta'},
+    'gated': {'MOTION_GATE': True},
+    'background': {'MOTION_ENGINE': 'background'},
+    'governor': {'QUALITY_TARGET_MS': 8.3},
+    # 采集 + 推理在视觉进程里，结果经共享内存回来
+    'process': {'VISION_PROCESS': True},
+    # 多摄像头路径 (只接一个 Air 摄像头)：视觉进程 + CameraFusion
+    'multicam': {'CAMERAS': [{'kind': 'air'}]},
+}
+
+
+def match_crossings(crossings, downs, start_at, fps, ready, early=0.1, late=0.5):
+    """crossings: [(场景时间, 等级), ...]；downs: [(perf_counter, 等级), ...] (IR 键按下事件)
+
+    每次穿线在 [穿线 - early, 穿线 + late] 内找同一等级最早的、还没用过的按下事件，
+    窗口不超过下一次进入同一等级的时刻 (漏掉的穿线不会借用下一轮的按键)。
+    管线就绪 (ready) 之前的穿线、停留不到一帧 (摄像头根本拍不到) 的等级不计入。
+    返回 (glass 延迟列表, frame 延迟列表, 漏掉次数, 跳过次数)
+    """
+    glass, frame, missed, skipped = [], [], 0, 0
+    used = set()
+    for i, (tc, level) in enumerate(crossings):
+        t = start_at + tc
+        if level <= 0: continue
+        dwell = (crossings[i + 1][0] if i + 1 < len(crossings) else math.inf) - tc
+        if t < ready or dwell < 1 / fps:
+            skipped += 1
+            continue
+        again = next((start_at + c for c, lv in crossings[i + 1:] if lv == level), math.inf)
+        found = next((j for j, (td, lv) in enumerate(downs)
+                      if j not in used and lv == level and t - early <= td <= min(t + late, again)), None)
+        if found is None:
+            missed += 1
+            continue
+        used.add(found)
+        glass.append(downs[found][0] - t)
+        frame.append(downs[found][0] - (start_at + math.ceil(tc * fps) / fps))
+    return glass, frame, missed, skipped
+
+
+def run_child(mode, scene, fps, lead, input_delay, result_path):
+    """子进程：按 mode 改 webb.py 的配置，跑完整个合成场景，把按键事件和延迟写进 result_path"""
+    import webb
+    from output import InputDispatcher, RecordingBackend
+    from synthetic import make_scene
+    from touch import KeyOwnership
+
+    for name, value in MODES[mode].items():
+        setattr(webb, name, value)
+    webb.HEADLESS = True
+    webb.PREVIEW_FPS = 0
+    webb.REPLAY_PATH = None
+    webb.RECORD_PATH = None
+    # 场景从 lead 秒之后开始，之前是空画面，供管线加载模型 / 预热
+    start_at = time.perf_counter() + lead
+    spec = {'scene': scene, 'fps': fps, 'start_at': start_at}
+    webb.SYNTHETIC = spec
+    if webb.CAMERAS: webb.CAMERAS = [dict(camera, synthetic=spec) for camera in webb.CAMERAS]
+    backend = RecordingBackend(delay=input_delay)
+    webb.input_dispatcher = InputDispatcher(backend)
+    webb.key_state = KeyOwnership(webb.input_dispatcher)
+
+    # 检测循环结束时用 os._exit(0) 带走 Flask 线程；这个子进程里没有 Flask，改成可以接住的退出，退出前还要统计
+    def finish(code=0):
+        raise SystemExit(code)
+    os._exit = finish
+    try:
+        if webb.CAMERAS: webb.run_multi_camera_loop()
+        elif webb.VISION_PROCESS: webb.run_vision_process_loop()
+        else: webb.run_camera_loop()
+    except SystemExit:
+        pass
+
+    armed = [end for name, _, end in webb.timeline.stages if name == 'armed']
+    ready = webb.timeline.origin + armed[0] if armed else start_at
+    levels = {key: level for level, key in webb.IR_KEY_MAP.items()}
+    downs = [(t, levels[key]) for t, key, down in list(backend.events) if down and key in levels]
+    crossings = make_scene(scene).crossings(webb.AIR_TOP_LIMIT, webb.AIR_BOTTOM_LIMIT)
+    glass, frame, missed, skipped = match_crossings(crossings, downs, start_at, fps, ready)
+    with open(result_path, 'w') as f:
+        json.dump({'mode': mode, 'crossings': len(crossings), 'missed': missed, 'skipped': skipped,
+                   'events': len(backend.events), 'ready_s': ready - webb.timeline.origin,
+                   'glass': glass, 'frame': frame}, f)
+
+
+def summarize(result):
+    matched = len(result['glass'])
+    line = f"{result['mode']:<12} {matched:>4}/{matched + result['missed']:<4} {result['skipped']:>4}"
+    if not matched:
+        return line + "  (没有匹配到按键)"
+    glass = np.array(result['glass']) * 1000
+    frame = np.array(result['frame']) * 1000
+    p50, p90, p99 = np.percentile(glass, [50, 90, 99])
+    return (line + f" {p50:8.1f} {p90:8.1f} {p99:8.1f} {glass.max():8.1f} {np.median(frame):9.1f}"
+            f" {result['ready_s']:7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用合成画面测各管线模式的 画面 -> 按键 端到端延迟 (不需要摄像头)")
+    parser.add_argument('--mode', action='append', help=f"要测的模式 (可多次指定，默认全部): {', '.join(MODES)}")
+    parser.add_argument('--scene', default='sweep', help="合成场景 (synthetic.py): sweep / fast / steps")
+    parser.add_argument('--fps', type=int, default=60, help="合成摄像头帧率")
+    parser.add_argument('--lead', type=float, default=5.0, help="场景开始前留给启动 / 预热的秒数")
+    parser.add_argument('--input-delay', type=float, default=0.0, help="模拟一次系统按键调用的耗时 (秒)")
+    parser.add_argument('--json', help="把原始结果 (每次穿线的延迟) 写到 JSON")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.scene, args.fps, args.lead, args.input_delay, args.result)
+        return
+
+    modes = args.mode or list(MODES)
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"未知模式 '{mode}'，可选: {', '.join(MODES)}")
+
+    print(f"🧪 scene '{args.scene}' @ {args.fps} fps, input delay {args.input_delay * 1000:.1f} ms")
+    print(f"{'mode':<12} {'matched':>9} {'skip':>4} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'frame p50':>9} {'ready s':>7}")
+    print("-" * 84)
+    results = []
+    for mode in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            result_path = os.path.join(tmp, 'result.json')
+            log_path = os.path.join(tmp, 'child.log')
+            # 子进程的输出 (IR 打印等) 写文件，不用管道：视觉进程可能比子进程晚退出，会一直占着管道
+            with open(log_path, 'w') as log:
+                code = subprocess.call([sys.executable, os.path.abspath(__file__), '--child', mode,
+                                        '--scene', args.scene, '--fps', str(args.fps), '--lead', str(args.lead),
+                                        '--input-delay', str(args.input_delay), '--result', result_path],
+                                       stdout=log, stderr=subprocess.STDOUT)
+            if code != 0 or not os.path.exists(result_path):
+                with open(log_path) as log:
+                    print(f"{mode:<12} 失败 (exit {code})\n" + ''.join(log.readlines()[-15:]))
+                continue
+            with open(result_path) as f:
+                result = json.load(f)
+        results.append(result)
+        print(summarize(result))
+    print("(matched = 测到按键的穿线次数 / 就绪后的穿线次数；skip = 管线就绪前 / 停留不到一帧的穿线；frame = 从第一张能看到穿线的帧算起)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f)
+
+
+if __name__ == '__main__':
+    main()
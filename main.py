@@ -1,20 +1,40 @@
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3' 
 
+from startup import ArmGate, StartupTimeline, run_parallel, warm_up
+timeline = StartupTimeline()   # 启动计时从这里开始
+
 import cv2
-import mediapipe as mp
 import time
-import pydirectinput 
+import numpy as np
+
+from capture import FrameGrabber
+from find_cameras import apply_mode, best_mode
+from journal import EventJournal
+from metrics import StageTimer, draw_metrics_overlay
+from output import InputDispatcher, make_backend
+from preprocess import FramePreprocessor
+from preview import PreviewStreamer
+from recording import FrameRecorder, ReplayCapture
+# vision (MediaPipe，导入要 1 秒左右) 在加载模型的线程里导入，和打开摄像头并行
+timeline.mark('imports', 0.0)
 
 # --- 核心配置 ---
 ENABLE_INPUT = True 
-pydirectinput.PAUSE = 0 
-pydirectinput.FAILSAFE = False 
+# 按键输出后端：'pydirectinput' = 模拟键盘 (Windows)；'recording' = 只记录事件 (Linux 测试)
+# 'shared-memory' = 直接写 Brokenithm 共享内存 (需 segatools.ini 加载 chuniio-mux.dll)
+# 键盘模拟由独立的分发线程发送，检测循环不会被慢的系统输入调用卡住
+INPUT_BACKEND = 'pydirectinput'
+INPUT_PARAMS = {}   # 'recording': {'path': 'keys.log'}；'shared-memory': {'path': 文件} 用普通文件代替命名共享内存
+# 事件日志 (.chjn)：每次按键变化记一条二进制记录，python journal.py journal_ground.chjn 统计；None = 关闭
+JOURNAL_PATH = 'journal_ground.chjn'
 
 # ==========================================
 #  画面与范围调整 (请根据实际情况修改)
 # ==========================================
 CAMERA_INDEX = 1
+# 先运行一次 python find_cameras.py：按它缓存的测试结果，在 1280x720 下选帧率最高的像素格式 (MJPG / YUY2)
+USE_CAMERA_CACHE = True
 
 # 1. 旋转设置
 # 如果你的摄像头是竖着装的，需要旋转画面让它变横
@@ -30,15 +50,35 @@ ROTATE_TYPE = None
 ROI_X_MIN = 0.25
 ROI_X_MAX = 0.75
 
+# 3. MediaPipe 推理区域 (x_min, y_min, x_max, y_max)，只把这块子图送进模型，None = 全图
+# 默认全图：Air (手腕高于 AIR_THRESHOLD) 在整个画面里都要能判定，而区域外的手模型看不到。
+# 只在确定 Air 也只会在中间出现时再收窄，例如左右比 ROI 各多留 0.1：
+# INFER_ROI = (max(0.0, ROI_X_MIN - 0.1), 0.0, min(1.0, ROI_X_MAX + 0.1), 1.0)
+INFER_ROI = None
+INFER_SCALE = 0.5   # 子图再缩小的比例，1.0 = 不缩放
+
+# 4. 光流跟踪：每 TRACK_INTERVAL 帧跑一次 MediaPipe，中间帧用 LK 光流跟踪指尖，0 = 关闭
+TRACK_INTERVAL = 0
+TRACK_MIN_CONFIDENCE = 0.6
+
 # 防抖帧数
 DEBOUNCE_FRAMES = 1
 
-print("=" * 50)
-print("✓ 启动中... (竖屏处理 + 窄范围模式)")
-print("=" * 50 + "\n") 
+# 独立采集线程 (最新帧优先，处理不过来的旧帧直接丢弃)
+USE_CAPTURE_THREAD = True
+CAPTURE_RING_SIZE = 3
 
-mp_drawing = mp.solutions.drawing_utils
-mp_hands = mp.solutions.hands
+# 逐阶段耗时统计：在预览窗口左上角显示各阶段 p50/p99，退出时打印汇总
+SHOW_METRICS_OVERLAY = False
+
+# 无头模式：检测循环不画任何标注、不开窗口
+# PREVIEW_FPS > 0 时由独立线程按该帧率在拷贝上绘制并显示预览窗口，0 = 完全不显示
+HEADLESS = False
+PREVIEW_FPS = 15
+
+# 录制 / 回放 (.chrec)，None = 关闭
+RECORD_PATH = None
+REPLAY_PATH = None
 
 SLIDER_KEYS = 16
 AIR_THRESHOLD = 0.60
@@ -58,142 +98,173 @@ KEY_MAPPING = {
 }
 AIR_KEY = 'space' 
 
-cap = cv2.VideoCapture(CAMERA_INDEX)
-# 尝试设置高分辨率，旋转后会更清晰
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-
-key_timers = {} 
-air_timer = 0
-last_active_keys = set()
-last_active_air = False
-
-with mp_hands.Hands(
-    max_num_hands=2,
-    model_complexity=0,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.8) as hands: 
-
-    while cap.isOpened():
-        success, image = cap.read()
-        if not success: continue
-
-        # --- 1. 画面旋转处理 ---
-        if ROTATE_TYPE is not None:
-            image = cv2.rotate(image, ROTATE_TYPE)
-
-        # 镜像翻转（左右翻转，使画面符合直觉，如同照镜子）
-        image = cv2.flip(image, 1)
-
-        image.flags.writeable = False
-        results = hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-        image.flags.writeable = True
-
-        h, w, c = image.shape
-        
-        # --- 2. 绘制辅助线 ---
-        
-        # (A) ROI 左右边界线 (蓝色粗线) - 你的手必须在这个范围内才有效
-        roi_left_px = int(w * ROI_X_MIN)
-        roi_right_px = int(w * ROI_X_MAX)
-        cv2.line(image, (roi_left_px, 0), (roi_left_px, h), (255, 0, 0), 3)
-        cv2.line(image, (roi_right_px, 0), (roi_right_px, h), (255, 0, 0), 3)
-
-        # (B) 触摸阈值线 (绿色)
-        base_thresh = FINGER_CONFIG[8]['threshold']
-        cv2.line(image, (0, int(h * base_thresh)), (w, int(h * base_thresh)), (0, 255, 0), 2)
-        
-        # (C) 键位分割线 (只在 ROI 范围内画)
-        roi_width = roi_right_px - roi_left_px
-        for i in range(1, SLIDER_KEYS):
-            # 这里的比例是相对于 ROI 的，不是全屏
-            offset = int(roi_width * (i / SLIDER_KEYS))
-            x_pos = roi_left_px + offset
-            cv2.line(image, (x_pos, int(h * base_thresh)), (x_pos, h), (0, 255, 255), 1)
-
-        raw_keys_this_frame = set()
-        raw_air_this_frame = False
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                mp_drawing.draw_landmarks(image, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-                
-                # Air 判定 (全屏有效，不受 ROI 限制)
-                wrist = hand_landmarks.landmark[0] 
-                if wrist.y < AIR_THRESHOLD:
-                    raw_air_this_frame = True
-                    cv2.putText(image, "AIR!", (int(wrist.x*w), int(wrist.y*h)-20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-
-                # Ground 判定 (必须在 ROI 范围内)
-                for tip_id, config in FINGER_CONFIG.items():
-                    tip = hand_landmarks.landmark[tip_id]    
-                    pip = hand_landmarks.landmark[tip_id - 2]
-                    
-                    # 基础判定：低于阈值 + 手指伸直
-                    is_pressing = tip.y > config['threshold'] and tip.y > pip.y + 0.02
-                    
-                    # === 核心修改：判定 X 是否在 ROI 范围内 ===
-                    in_range = ROI_X_MIN < tip.x < ROI_X_MAX
-                    
-                    if is_pressing and in_range:
-                        # 归一化计算：把 (ROI_MIN ~ ROI_MAX) 映射到 (0 ~ 1)
-                        normalized_x = (tip.x - ROI_X_MIN) / (ROI_X_MAX - ROI_X_MIN)
-                        
-                        key_index = int(normalized_x * SLIDER_KEYS)
-                        key_index = max(0, min(key_index, SLIDER_KEYS - 1))
-                        
-                        raw_keys_this_frame.add(key_index)
-                        
-                        # 视觉反馈
-                        cv2.circle(image, (int(tip.x*w), int(tip.y*h)), 15, (0, 255, 0), -1)
-                    elif is_pressing and not in_range:
-                        # 虽然按下了，但在范围外 -> 画灰色点提示
-                        cv2.circle(image, (int(tip.x*w), int(tip.y*h)), 10, (100, 100, 100), -1)
-
-        # --- 3. 状态管理与输入 (保持防抖逻辑) ---
-        
-        # 更新计时器
-        for k in raw_keys_this_frame:
-            key_timers[k] = DEBOUNCE_FRAMES
-            
-        active_keys_stable = set()
-        keys_to_delete = []
-        for k in key_timers:
-            if key_timers[k] > 0:
-                active_keys_stable.add(k)
-                key_timers[k] -= 1
-            else:
-                keys_to_delete.append(k)
-        for k in keys_to_delete: del key_timers[k]
-
-        if raw_air_this_frame: air_timer = DEBOUNCE_FRAMES
-        is_air_stable = air_timer > 0
-        if air_timer > 0: air_timer -= 1
-
-        # 显示文本
-        status_text = "KEYS: " + " ".join(map(str, sorted(list(active_keys_stable))))
-        cv2.putText(image, status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-        # 硬件输入
-        if ENABLE_INPUT:
-            keys_to_press = active_keys_stable - last_active_keys
-            for k in keys_to_press:
-                if k in KEY_MAPPING: pydirectinput.keyDown(KEY_MAPPING[k])
+def open_capture():
+    if REPLAY_PATH:
+        print(f"📼 Replaying {REPLAY_PATH}")
+        cap = ReplayCapture(REPLAY_PATH, realtime=True, loop=True)
+    else:
+        cap = cv2.VideoCapture(CAMERA_INDEX)
+        # 尝试设置高分辨率，旋转后会更清晰
+        mode = best_mode(CAMERA_INDEX, 1280, 720, cap=cap) if USE_CAMERA_CACHE else None
+        apply_mode(cap, mode or {'width': 1280, 'height': 720})
+    if USE_CAPTURE_THREAD:
+        cap = FrameGrabber(cap, CAPTURE_RING_SIZE).start()
+    return cap
+
+def create_ground_detector():
+    from vision import GroundDetector
+    return GroundDetector(FINGER_CONFIG, roi_x_min=ROI_X_MIN, roi_x_max=ROI_X_MAX,
+                          air_threshold=AIR_THRESHOLD, slider_keys=SLIDER_KEYS,
+                          max_num_hands=2, model_complexity=0,
+                          min_detection_confidence=0.7, min_tracking_confidence=0.8,
+                          infer_roi=INFER_ROI, infer_scale=INFER_SCALE,
+                          track_interval=TRACK_INTERVAL, track_min_confidence=TRACK_MIN_CONFIDENCE)
+
+def load_ground_detector(preprocessor):
+    """导入 MediaPipe + 创建检测器 + 在假帧上预热，返回 (detector, 稳态推理耗时毫秒)"""
+    detector = create_ground_detector()
+    with timeline.stage('warmup'):
+        frames, steady_ms = warm_up(detector.landmarker, preprocessor.process(np.zeros((720, 1280, 3), np.uint8)))
+    print(f"🔥 model warmed up in {frames} inferences, steady {steady_ms:.1f} ms")
+    return detector, steady_ms
+
+def run_camera_loop():
+    # 旋转 + 镜像合并成一步，写入预分配缓冲区
+    preprocessor = FramePreprocessor(ROTATE_TYPE, mirror=True)
+    # 打开摄像头 和 加载 + 预热模型 并行
+    loaded = run_parallel(timeline, camera=open_capture, model=lambda: load_ground_detector(preprocessor))
+    cap = loaded['camera']
+    detector, steady_ms = loaded['model']
+    # 稳态之前不输出按键：刚打开的摄像头前几帧又慢又旧
+    arm_gate = ArmGate(steady_ms)
+    from vision import draw_ground_overlay   # 上面加载模型时已经导入
+    recorder = FrameRecorder(RECORD_PATH) if RECORD_PATH else None
+    dispatcher = InputDispatcher(make_backend(INPUT_BACKEND, **INPUT_PARAMS)) if ENABLE_INPUT else None
+    journal = EventJournal(JOURNAL_PATH) if JOURNAL_PATH else None
+
+    key_timers = {} 
+    air_timer = 0
+    last_active_keys = set()
+    last_active_air = False
+
+    timer = StageTimer()
+
+    with detector:
+        detector.timer = timer
+
+        def render(image, payload):
+            result, active_keys = payload
+            draw_ground_overlay(image, result, detector)
+            # 显示文本
+            status_text = "KEYS: " + " ".join(map(str, sorted(list(active_keys))))
+            cv2.putText(image, status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            if SHOW_METRICS_OVERLAY: draw_metrics_overlay(image, timer, origin=(10, 60))
+
+        preview_streamer = None
+        if HEADLESS and PREVIEW_FPS > 0:
+            preview_streamer = PreviewStreamer(render, max_fps=PREVIEW_FPS, window_name='Chunithm CV Preview')
+
+        while cap.isOpened():
+            timer.start_frame()
+            success, image = cap.read()
+            if not success: continue
+            timer.lap('read')
+            work_start = time.perf_counter()
+
+            if recorder is not None:
+                recorder.write(image, getattr(cap, 'timestamp', None))
+
+            # --- 1. 画面旋转 + 镜像翻转 (左右翻转，使画面符合直觉，如同照镜子) ---
+            image = preprocessor.process(image)
+            timer.lap('rotate')
+
+            result = detector.process(image, getattr(cap, 'timestamp', None),
+                                      preprocessor.gray() if TRACK_INTERVAL else None)
+            raw_keys_this_frame = result.keys
+            raw_air_this_frame = result.air
+            if not arm_gate.armed:
+                if arm_gate.update(time.perf_counter() - work_start):
+                    timeline.mark('armed')
+                    print(f"✅ Input armed after {arm_gate.seen} frames")
+                    timeline.report()
+                else:
+                    raw_keys_this_frame, raw_air_this_frame = set(), False
+
+            # --- 2. 状态管理与输入 (保持防抖逻辑) ---
             
-            keys_to_release = last_active_keys - active_keys_stable
-            for k in keys_to_release:
-                if k in KEY_MAPPING: pydirectinput.keyUp(KEY_MAPPING[k])
+            # 更新计时器
+            for k in raw_keys_this_frame:
+                key_timers[k] = DEBOUNCE_FRAMES
+                
+            active_keys_stable = set()
+            keys_to_delete = []
+            for k in key_timers:
+                if key_timers[k] > 0:
+                    active_keys_stable.add(k)
+                    key_timers[k] -= 1
+                else:
+                    keys_to_delete.append(k)
+            for k in keys_to_delete: del key_timers[k]
+
+            if raw_air_this_frame: air_timer = DEBOUNCE_FRAMES
+            is_air_stable = air_timer > 0
+            if air_timer > 0: air_timer -= 1
+
+            # 硬件输入 + 事件日志
+            changes = [(KEY_MAPPING[k], True) for k in active_keys_stable - last_active_keys if k in KEY_MAPPING]
+            changes += [(KEY_MAPPING[k], False) for k in last_active_keys - active_keys_stable if k in KEY_MAPPING]
+            if is_air_stable != last_active_air: changes.append((AIR_KEY, is_air_stable))
+            if changes:
+                stamp = getattr(cap, 'timestamp', None)
+                latency = time.perf_counter() - stamp if stamp else np.nan
+                for key, down in changes:
+                    if dispatcher is not None:
+                        if down: dispatcher.key_down(key)
+                        else: dispatcher.key_up(key)
+                    if journal is not None:
+                        journal.log('ground', key, down, frame_id=getattr(cap, 'frame_id', 0), latency=latency)
+
+            last_active_keys = active_keys_stable
+            last_active_air = is_air_stable
+            timer.lap('input')
+
+            # --- 3. 绘制辅助线 / 关键点 (无头模式交给预览线程在拷贝上画) ---
+            if not HEADLESS:
+                render(image, (result, active_keys_stable))
+            elif preview_streamer is not None:
+                preview_streamer.submit(image, (result, active_keys_stable))
+            timer.lap('draw')
 
-            if is_air_stable and not last_active_air:
-                pydirectinput.keyDown(AIR_KEY)
-            elif not is_air_stable and last_active_air:
-                pydirectinput.keyUp(AIR_KEY)
+            if not HEADLESS:
+                cv2.imshow('Chunithm CV Controller (Rotated)', image)
+                if cv2.waitKey(1) & 0xFF == 27: break
+                timer.lap('gui')
+            timer.end_frame()
 
-        last_active_keys = active_keys_stable
-        last_active_air = is_air_stable
+    if recorder is not None:
+        recorder.close()
+        print(f"🔴 {recorder.frames_written} frames recorded to {RECORD_PATH}")
+    if USE_CAPTURE_THREAD:
+        print(f"📷 captured {cap.frames_captured} frames, dropped {cap.frames_dropped}")
+    if TRACK_INTERVAL:
+        print(f"🚦 hands.process ran {detector.stats['hands_runs']}x, tracked {detector.stats['hands_tracked']}x")
+    if dispatcher is not None:
+        print(f"⌨  {dispatcher.stats['input_events']} key events, {dispatcher.stats['input_coalesced']} coalesced")
+    for name, s in timer.snapshot()['stages'].items():
+        print(f"⏱  {name:<7} p50 {s['p50_ms']:6.2f} ms  p99 {s['p99_ms']:6.2f} ms")
+    if preview_streamer is not None:
+        preview_streamer.stop()
+    if dispatcher is not None:
+        dispatcher.close()
+    if journal is not None:
+        journal.close()
+        print(f"📝 {journal.total} events journaled to {JOURNAL_PATH}")
+    cap.release()
+    if not HEADLESS: cv2.destroyAllWindows()
 
-        cv2.imshow('Chunithm CV Controller (Rotated)', image)
-        if cv2.waitKey(1) & 0xFF == 27: break
+if __name__ == '__main__':
+    print("=" * 50)
+    print("✓ 启动中... (竖屏处理 + 窄范围模式)")
+    print("=" * 50 + "\n") 
 
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+    run_camera_loop()
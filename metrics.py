@@ -0,0 +1,130 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# 直方图桶上限 (毫秒)，最后隐含 +Inf
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 4, 8.3, 16.7, 33.3, 66.7)
+
+
+class NullTimer:
+    """不计时的占位对象，检测器默认使用它，热路径上只多一次空函数调用"""
+
+    def start_frame(self): pass
+    def lap(self, name): pass
+    def end_frame(self): pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class StageTimer:
+    """逐阶段计时，每个阶段保留最近 window 个样本 (滚动窗口)
+
+    热路径只做 perf_counter + 列表赋值；分位数 / 直方图在读取时 (/metrics、叠加层) 才计算。
+    用法: start_frame() -> lap('read') -> lap('rotate') ... -> end_frame()
+    record() 可以在多个线程里同时调用 (触摸延迟由各个 Socket.IO 线程写入)，
+    start_frame / lap / end_frame 只能由一个线程 (检测循环) 使用。
+    """
+
+    def __init__(self, window=1024, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.window = window
+        self.buckets_ms = buckets_ms
+        self._samples = {}   # name -> [秒, ...] 环形
+        self._index = {}     # name -> 下一个写入位置
+        self._count = {}     # name -> 累计样本数
+        self._sum = {}       # name -> 累计秒数
+        self.counters = {}   # 额外的计数/状态 (丢帧数等)，由调用方直接写
+        self._frame_start = 0.0
+        self._lap_start = 0.0
+        self._overlay_cache = []
+        self._overlay_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = []
+                self._index[name] = 0
+                self._count[name] = 0
+                self._sum[name] = 0.0
+            if len(samples) < self.window:
+                samples.append(seconds)
+            else:
+                i = self._index[name]
+                samples[i] = seconds
+                self._index[name] = (i + 1) % self.window
+            self._count[name] += 1
+            self._sum[name] += seconds
+
+    def start_frame(self):
+        self._frame_start = self._lap_start = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.record(name, now - self._lap_start)
+        self._lap_start = now
+
+    def end_frame(self):
+        self.record('frame', time.perf_counter() - self._frame_start)
+
+    def snapshot(self):
+        # 持锁只复制原始数据，分位数在锁外算，不拖慢写入方
+        with self._lock:
+            copied = [(name, list(samples), self._count[name], self._sum[name])
+                      for name, samples in self._samples.items()]
+            counters = dict(self.counters)
+        stages = {}
+        for name, samples, count, total in copied:
+            ms = np.array(samples) * 1000
+            if not len(ms): continue
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            counts = np.searchsorted(np.sort(ms), self.buckets_ms, side='right')
+            stages[name] = {
+                'count': count,
+                'sum_ms': total * 1000,
+                'window': len(ms),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(p50),
+                'p90_ms': float(p90),
+                'p99_ms': float(p99),
+                'max_ms': float(ms.max()),
+                # 累积直方图 (le 语义，与 Prometheus 一致)
+                'buckets': dict(zip([str(b) for b in self.buckets_ms] + ['+Inf'],
+                                    [int(c) for c in counts] + [len(ms)])),
+            }
+        return {'window': self.window, 'stages': stages, 'counters': counters}
+
+    def to_prometheus(self, prefix='chuni'):
+        """Prometheus 文本格式：分位数取自滚动窗口，_sum / _count 为累计值 (summary 语义)"""
+        snap = self.snapshot()
+        lines = [f'# HELP {prefix}_stage_seconds Per-stage frame time (quantiles over the last {self.window} frames)',
+                 f'# TYPE {prefix}_stage_seconds summary']
+        for name, s in snap['stages'].items():
+            for q in ('50', '90', '99'):
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="0.{q}"}} {s[f"p{q}_ms"] / 1000:.9f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["sum_ms"] / 1000:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+        for name, value in snap['counters'].items():
+            lines.append(f'# TYPE {prefix}_{name} gauge')
+            lines.append(f'{prefix}_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def overlay_lines(self, refresh=0.5):
+        """叠加层文本，每 refresh 秒才重新计算一次"""
+        now = time.perf_counter()
+        if now - self._overlay_time >= refresh:
+            self._overlay_time = now
+            self._overlay_cache = [f"{name:<7} p50 {s['p50_ms']:5.2f}  p99 {s['p99_ms']:6.2f} ms"
+                                   for name, s in self.snapshot()['stages'].items()]
+        return self._overlay_cache
+
+
+def draw_metrics_overlay(image, timer, origin=(10, 20)):
+    x, y = origin
+    for line in timer.overlay_lines():
+        cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 0, 0), 3)
+        cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
+        y += 16
@@ -0,0 +1,126 @@
+import cv2
+import numpy as np
+
+from metrics import NULL_TIMER
+from preprocess import BufferPool
+
+
+class MotionBlob:
+    """一次运动检测结果，坐标为输入灰度图 (判定区) 的像素坐标"""
+
+    def __init__(self, cx, cy, box=None):
+        self.cx = cx
+        self.cy = cy
+        self.box = box   # (x, y, w, h)，帧差引擎没有外接框时为 None
+
+
+class FrameDiffMotion:
+    """原版运动检测：全分辨率 21x21 高斯模糊，和上一帧做差，取整张掩码的质心
+
+    area_min 沿用原来的含义：与 cv2.moments 的 m00 (= 255 x 运动像素数) 比较。
+    """
+
+    def __init__(self, sensitivity=25, area_min=500):
+        self.sensitivity = sensitivity
+        self.area_min = area_min
+        self.pool = BufferPool()
+        self.prev = None
+
+    def detect(self, gray, timer=NULL_TIMER):
+        # 模糊结果在两块缓冲区之间轮换，上一帧的留作 prev
+        blurred = self.pool.get('blur_b' if self.prev is self.pool.get('blur_a', gray.shape) else 'blur_a', gray.shape)
+        cv2.GaussianBlur(gray, (21, 21), 0, dst=blurred)
+        timer.lap('blur')
+
+        blob = None
+        if self.prev is not None and self.prev.shape == blurred.shape:
+            thresh = self.pool.get('thresh', blurred.shape)
+            cv2.absdiff(self.prev, blurred, dst=thresh)
+            cv2.threshold(thresh, self.sensitivity, 255, cv2.THRESH_BINARY, dst=thresh)
+
+            M = cv2.moments(thresh)
+            if M["m00"] > self.area_min:
+                blob = MotionBlob(int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]))
+
+        self.prev = blurred
+        return blob
+
+
+class BackgroundMotion:
+    """金字塔降采样 + 指数加权背景模型的运动检测
+
+    先 pyrDown levels 次 (每级像素数 /4)，在小图上与背景模型做差；背景用 accumulateWeighted
+    更新，静止像素按 alpha 学习、运动像素按 alpha * fg_alpha_ratio 慢速学习，
+    所以缓慢抬手、手停在空中都不会立刻被背景吞掉。连通域中选顶端最高的区域
+    (面积相同时取更大的)，输出其质心和外接框，而不是整张掩码的质心。
+
+    area_min: 全分辨率下的最小运动面积 (像素)。
+    """
+
+    def __init__(self, sensitivity=25, area_min=400, levels=2, alpha=0.05, fg_alpha_ratio=0.1):
+        self.sensitivity = sensitivity
+        self.area_min = area_min
+        self.levels = levels
+        self.alpha = alpha
+        self.fg_alpha = alpha * fg_alpha_ratio
+        self.pool = BufferPool()
+        self.background = None   # float32 背景模型 (降采样后)
+
+    def _downscale(self, gray):
+        small = gray
+        for level in range(self.levels):
+            h, w = small.shape[:2]
+            dst = self.pool.get(f'pyr{level}', ((h + 1) // 2, (w + 1) // 2))
+            small = cv2.pyrDown(small, dst=dst)
+        return small
+
+    def detect(self, gray, timer=NULL_TIMER):
+        small = self._downscale(gray)
+        smooth = self.pool.get('smooth', small.shape)
+        cv2.GaussianBlur(small, (5, 5), 0, dst=smooth)
+        timer.lap('blur')
+
+        if self.background is None or self.background.shape != smooth.shape:
+            self.background = smooth.astype(np.float32)
+            return None
+
+        bg8 = self.pool.get('bg8', smooth.shape)
+        cv2.convertScaleAbs(self.background, dst=bg8)
+        mask = self.pool.get('mask', smooth.shape)
+        cv2.absdiff(smooth, bg8, dst=mask)
+        cv2.threshold(mask, self.sensitivity, 255, cv2.THRESH_BINARY, dst=mask)
+
+        still = self.pool.get('still', smooth.shape)
+        cv2.bitwise_not(mask, dst=still)
+        cv2.accumulateWeighted(smooth, self.background, self.alpha, mask=still)
+        cv2.accumulateWeighted(smooth, self.background, self.fg_alpha, mask=mask)
+
+        n, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if n <= 1:
+            return None
+
+        scale = 1 << self.levels
+        stats = stats[1:]
+        centroids = centroids[1:]
+        big = stats[:, cv2.CC_STAT_AREA] * (scale * scale) >= self.area_min
+        if not big.any():
+            return None
+        candidates = np.flatnonzero(big)
+        # 顶端最高 (y 最小)；并列时面积更大的优先
+        order = np.lexsort((-stats[candidates, cv2.CC_STAT_AREA], stats[candidates, cv2.CC_STAT_TOP]))
+        i = candidates[order[0]]
+        x, y, w, h = stats[i, :4] * scale
+        cx, cy = centroids[i] * scale
+        return MotionBlob(int(cx), int(cy), (int(x), int(y), int(w), int(h)))
+
+
+MOTION_ENGINES = {
+    'diff': FrameDiffMotion,
+    'background': BackgroundMotion,
+}
+
+
+def make_motion_engine(kind, **params):
+    if kind not in MOTION_ENGINES:
+        raise ValueError(f"未知运动检测引擎 '{kind}'，可选: {', '.join(MOTION_ENGINES)}")
+    return MOTION_ENGINES[kind](**params)
@@ -0,0 +1,128 @@
+import multiprocessing as mp
+import time
+
+from vision_worker import VisionProcess
+
+
+class FusedState:
+    """所有摄像头合并后的输入状态"""
+
+    def __init__(self):
+        self.level = 0          # Air 摄像头里最高的 IR 等级
+        self.keys = set()       # 地面摄像头按下的键位 (从左数的下标) 的并集
+        self.air = False        # 任一地面摄像头检测到抬手
+        self.timestamp = 0.0    # 参与合并的结果里最新的采集时间 (perf_counter)
+        self.skew = 0.0         # 参与合并的结果之间的采集时间差 (秒)
+        self.stale = []         # 结果过期、本次不参与合并的摄像头下标
+
+
+class CameraFusion:
+    """多摄像头：每个摄像头一个视觉进程 (VisionProcess)，按采集时间戳合并成一份输入状态
+
+    cameras: [{'kind': 'air' | 'ground', 'capture': {...}, 'detector': {...}, 'rotate': ..., ...}, ...]
+    每一项原样传给 VisionProcess / run_vision_worker。所有进程共用一个通知信号量，
+    任一摄像头出了新结果就唤醒；每个摄像头只保留最新一帧，慢的摄像头不会拖住快的。
+    某个摄像头超过 stale_after 秒没有新结果 (卡住 / 掉线) 时，它的按键视为松开，而不是一直按住。
+
+    防抖按各自摄像头的帧数计：结果消失后再保持 debounce_frames 帧 (与单摄像头循环一致)。
+    """
+
+    def __init__(self, cameras, stale_after=0.25, debounce_frames=0):
+        ctx = mp.get_context('spawn')
+        self.ready = ctx.Semaphore(0)
+        self.workers = [VisionProcess(ready=self.ready, **spec) for spec in cameras]
+        self.stale_after = stale_after
+        self.debounce_frames = debounce_frames
+        self.latest = [None] * len(self.workers)    # 每个摄像头最新的结果快照
+        self._held = [(0, set(), False)] * len(self.workers)   # 每个摄像头防抖后的 (level, keys, air)
+        self._timers = [{} for _ in self.workers]   # 每个摄像头：防抖项 -> 剩余帧数
+        self.stats = {'fusion_updates': 0, 'fusion_stale': 0}
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        return self
+
+    def is_alive(self):
+        # 任何一个摄像头进程退出 (ESC / 打不开摄像头) 就整体结束
+        return all(worker.is_alive() for worker in self.workers)
+
+    def _debounce(self, index, active):
+        timers = self._timers[index]
+        held = set(active)
+        for item in active:
+            timers[item] = self.debounce_frames
+        for item in list(timers):
+            if item in active: continue
+            if timers[item] > 0:
+                timers[item] -= 1
+                held.add(item)
+            else:
+                del timers[item]
+        return held
+
+    def _apply(self, index, snapshot):
+        self.latest[index] = snapshot
+        if self.workers[index].kind == 'air':
+            level = int(snapshot['level'])
+            timers = self._timers[index]
+            # 与 IrKeyOutput 相同：等级归零后沿用最近一次的非零等级 debounce_frames 帧
+            if level > 0:
+                timers['level'] = self.debounce_frames
+            elif timers.get('level', 0) > 0:
+                timers['level'] -= 1
+                level = self._held[index][0]
+            self._held[index] = (level, set(), False)
+        else:
+            mask = int(snapshot['keys'])
+            active = {i for i in range(32) if mask >> i & 1}
+            if snapshot['air']: active.add('air')
+            held = self._debounce(index, active)
+            self._held[index] = (0, held - {'air'}, 'air' in held)
+
+    def wait(self, timeout=0.1):
+        """等到任一摄像头有新结果 (或超时)，按采集时间顺序并入后返回 FusedState
+
+        超时也返回当前状态，所有摄像头都卡住时过期的按键照样会松开。
+        """
+        while self.ready.acquire(False):
+            pass
+        updates = [(i, s) for i, s in enumerate(w.poll() for w in self.workers) if s is not None]
+        if not updates and self.ready.acquire(timeout=timeout):
+            updates = [(i, s) for i, s in enumerate(w.poll() for w in self.workers) if s is not None]
+        for index, snapshot in sorted(updates, key=lambda u: float(u[1]['timestamp'])):
+            self._apply(index, snapshot)
+        self.stats['fusion_updates'] += len(updates)
+        return self.fused()
+
+    def fused(self):
+        state = FusedState()
+        now = time.perf_counter()
+        stamps = []
+        for index, snapshot in enumerate(self.latest):
+            if snapshot is None:
+                continue
+            timestamp = float(snapshot['timestamp'])
+            if now - timestamp > self.stale_after:
+                state.stale.append(index)
+                continue
+            level, keys, air = self._held[index]
+            state.level = max(state.level, level)
+            state.keys |= keys
+            state.air = state.air or air
+            stamps.append(timestamp)
+        if stamps:
+            state.timestamp = max(stamps)
+            state.skew = max(stamps) - min(stamps)
+        self.stats['fusion_stale'] += len(state.stale)
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
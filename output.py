@@ -0,0 +1,228 @@
+import collections
+import threading
+import time
+
+from sharedmem import AIR_ALL_KEY, AIR_COUNT, DEFAULT_IR_KEYS, DEFAULT_SLIDER_KEYS, SliderSharedMemory
+
+
+class PyDirectInputBackend:
+    """原来的键盘模拟输出 (Windows, 需要管理员权限)，pydirectinput 在构造时才导入"""
+
+    def __init__(self):
+        import pydirectinput
+        pydirectinput.PAUSE = 0
+        pydirectinput.FAILSAFE = False
+        self._pdi = pydirectinput
+
+    def send(self, batch):
+        for key, down in batch:
+            if down: self._pdi.keyDown(key)
+            else: self._pdi.keyUp(key)
+
+    def close(self):
+        pass
+
+
+class RecordingBackend:
+    """不碰系统输入，只记录带时间戳的按键事件 (Linux 上测试 / 基准测试用)
+
+    events: [(perf_counter 时间戳, key, down), ...]；path 不为 None 时同时逐行写入文本文件
+    ("<时间戳> down|up <key>")。delay 模拟一次系统输入调用的耗时 (秒)，用于测量分发线程的影响。
+    """
+
+    def __init__(self, path=None, delay=0.0):
+        self.events = []
+        self.delay = delay
+        self._file = open(path, 'w', encoding='utf-8') if path else None
+
+    def send(self, batch):
+        for key, down in batch:
+            if self.delay: time.sleep(self.delay)
+            t = time.perf_counter()
+            self.events.append((t, key, down))
+            if self._file is not None:
+                self._file.write(f"{t:.6f} {'down' if down else 'up'} {key}\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SharedMemoryBackend:
+    """把按键翻译成 Brokenithm 共享内存里的触摸格压力 / IR 光束 (sharedmem.py)
+
+    写共享内存只要几微秒，所以 direct = True：InputDispatcher 在调用线程里直接写，不经过分发线程。
+    slider_keys: 从左到右的 16 个键名；ir_keys: IR1 -> IR6 的键名；AIR_ALL_KEY 挡住全部光束。
+    光束状态由仍按着的键重新算出：松开 AIR_ALL_KEY 时，单独的 IR 键按着的光束保持挡住。
+    """
+
+    direct = True
+
+    def __init__(self, path=None, slider_keys=DEFAULT_SLIDER_KEYS, ir_keys=DEFAULT_IR_KEYS):
+        self.memory = SliderSharedMemory(path)
+        self.slider_keys = {key: i for i, key in enumerate(slider_keys)}
+        self.key_count = len(slider_keys)
+        self.ir_keys = {key: i for i, key in enumerate(ir_keys)}
+        self.beams = set()      # 单独按着的 IR 键对应的光束下标
+        self.air_all = False    # AIR_ALL_KEY 是否按着
+
+    def send(self, batch):
+        air_changed = False
+        for key, down in batch:
+            if key in self.slider_keys:
+                self.memory.set_key(self.slider_keys[key], down, self.key_count)
+            elif key in self.ir_keys:
+                if down: self.beams.add(self.ir_keys[key])
+                else: self.beams.discard(self.ir_keys[key])
+                air_changed = True
+            elif key == AIR_ALL_KEY:
+                self.air_all = down
+                air_changed = True
+        if air_changed:
+            self.memory.set_air([self.air_all or i in self.beams for i in range(AIR_COUNT)])
+
+    def close(self):
+        self.memory.close()
+
+
+BACKENDS = {
+    'pydirectinput': PyDirectInputBackend,
+    'recording': RecordingBackend,
+    'shared-memory': SharedMemoryBackend,
+}
+
+
+def make_backend(kind, **params):
+    if kind not in BACKENDS:
+        raise ValueError(f"未知输出后端 '{kind}'，可选: {', '.join(BACKENDS)}")
+    return BACKENDS[kind](**params)
+
+
+class InputDispatcher:
+    """单线程按键分发：检测循环和网页事件只把 (key, down) 放进队列就返回，
+    慢的系统输入调用全部在分发线程里做，不再阻塞 CV 循环或持锁的 Socket.IO 回调
+
+    队列用 collections.deque (CPython 下 append / popleft 是原子操作，不需要加锁)。
+    分发线程每次把队列里积压的事件一次取完 (tick > 0 时先再等 tick 秒凑一批)，按键合并后整批发送：
+    重复的 down / up 直接丢弃；一批内按下又松开 (点按) 默认保留为一对 down + up，
+    避免快速点击被合并掉 (keep_taps=False 时丢弃)。每批先发松开、再发按下，再发点按。
+
+    后端声明 direct = True (共享内存这类几乎零开销的输出) 时不启动线程，在调用线程里直接发送；
+    检测循环、Socket.IO 回调、UDP 监听线程会同时调用，所以 direct 模式下每次发送持锁。
+    """
+
+    def __init__(self, backend, tick=0.0, keep_taps=True):
+        self.backend = backend
+        self.tick = tick
+        self.keep_taps = keep_taps
+        self.pressed = set()    # 后端当前按下的键 (只在分发线程里修改；direct 模式下持 _direct_lock 修改)
+        self._direct_lock = threading.Lock()
+
+        self._queue = collections.deque()
+        self._wake = threading.Event()
+        self._running = True
+        self.stats = {'input_events': 0, 'input_coalesced': 0, 'input_batches': 0, 'input_lag_ms': 0.0}
+
+        self.direct = getattr(backend, 'direct', False)
+        self._thread = None
+        if not self.direct:
+            self._thread = threading.Thread(target=self._dispatch_loop, name="InputDispatcher", daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def key_down(self, key):
+        if self.direct: return self._send_direct(key, True)
+        self._queue.append((key, True, time.perf_counter()))
+        self._wake.set()
+
+    def key_up(self, key):
+        if self.direct: return self._send_direct(key, False)
+        self._queue.append((key, False, time.perf_counter()))
+        self._wake.set()
+
+    def _send_direct(self, key, down):
+        with self._direct_lock:
+            self.stats['input_events'] += 1
+            if down == (key in self.pressed):
+                self.stats['input_coalesced'] += 1
+                return
+            if down: self.pressed.add(key)
+            else: self.pressed.discard(key)
+            self.backend.send([(key, down)])
+
+    def coalesce(self, events):
+        """把一批 (key, down, t) 合并成要发送的 [(key, down), ...]"""
+        states = {}   # key -> 这一批里依次出现的目标状态
+        for key, down, _ in events:
+            states.setdefault(key, []).append(down)
+
+        releases, presses, taps = [], [], []
+        for key, seq in states.items():
+            was_down = key in self.pressed
+            final = seq[-1]
+            if final != was_down:
+                (presses if final else releases).append((key, final))
+            elif self.keep_taps and any(down != was_down for down in seq):
+                if was_down:
+                    # 按住时松开又按下 = 重新按一次
+                    releases.append((key, False))
+                    presses.append((key, True))
+                else:
+                    taps += [(key, True), (key, False)]
+        return releases + presses + taps
+
+    def _dispatch_loop(self):
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+            if self.tick: time.sleep(self.tick)
+
+            events, markers = [], []
+            while self._queue:
+                item = self._queue.popleft()
+                (markers if isinstance(item, threading.Event) else events).append(item)
+
+            if events:
+                batch = self.coalesce(events)
+                for key, down in batch:
+                    if down: self.pressed.add(key)
+                    else: self.pressed.discard(key)
+                if batch:
+                    self.backend.send(batch)
+                    self.stats['input_batches'] += 1
+
+                self.stats['input_events'] += len(events)
+                self.stats['input_coalesced'] += len(events) - len(batch)
+                # 本批最早的事件从入队到发送完成的时间 (峰值缓慢衰减)
+                lag = (time.perf_counter() - events[0][2]) * 1000
+                self.stats['input_lag_ms'] = max(self.stats['input_lag_ms'] * 0.95, lag)
+
+            for marker in markers:
+                marker.set()
+
+    def flush(self, timeout=1.0):
+        """等待此前入队的事件全部发送完 (测试 / 退出时用)"""
+        if self.direct: return True
+        marker = threading.Event()
+        self._queue.append(marker)
+        self._wake.set()
+        return marker.wait(timeout)
+
+    def close(self):
+        """松开所有仍按下的键并停止分发线程"""
+        self.flush()
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        with self._direct_lock:
+            if self.pressed:
+                self.backend.send([(key, False) for key in sorted(self.pressed)])
+                self.pressed.clear()
+            self.backend.close()
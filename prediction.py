@@ -0,0 +1,124 @@
+import numpy as np
+
+
+class AlphaBetaFilter:
+    """α-β 滤波：匀速模型，平滑位置并估计速度
+
+    alpha 越大越跟手 (越少平滑)，beta 决定速度估计对残差的响应速度。
+    两次测量间隔超过 max_gap 秒 (手离开画面) 时重新初始化，避免带着旧速度乱飞。
+    """
+
+    def __init__(self, alpha=0.5, beta=0.1, max_gap=0.1):
+        self.alpha = alpha
+        self.beta = beta
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        self.x = 0.0
+        self.v = 0.0
+        self.t = None
+
+    def update(self, y, t):
+        if self.t is None or t - self.t > self.max_gap or t <= self.t:
+            self.x, self.v, self.t = y, 0.0, t
+            return self.x
+        dt = t - self.t
+        x_pred = self.x + self.v * dt
+        residual = y - x_pred
+        self.x = x_pred + self.alpha * residual
+        self.v = self.v + self.beta * residual / dt
+        self.t = t
+        return self.x
+
+    def predict(self, horizon):
+        return self.x + self.v * horizon
+
+
+class KalmanFilter1D:
+    """一维匀速卡尔曼滤波，状态 [位置, 速度]
+
+    q: 加速度噪声强度 (越大越相信新测量)，r: 测量噪声方差 (归一化坐标的平方)。
+    """
+
+    def __init__(self, q=50.0, r=1e-4, max_gap=0.1):
+        self.q = q
+        self.r = r
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        self.state = np.zeros(2)
+        self.P = np.eye(2)
+        self.t = None
+
+    def update(self, y, t):
+        if self.t is None or t - self.t > self.max_gap or t <= self.t:
+            self.state = np.array([y, 0.0])
+            self.P = np.diag([self.r, 1.0])
+            self.t = t
+            return y
+        dt = t - self.t
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = self.q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        state = F @ self.state
+        P = F @ self.P @ F.T + Q
+
+        # H = [1, 0]
+        S = P[0, 0] + self.r
+        K = P[:, 0] / S
+        self.state = state + K * (y - state[0])
+        self.P = P - np.outer(K, P[0, :])
+        self.t = t
+        return float(self.state[0])
+
+    @property
+    def v(self):
+        return float(self.state[1])
+
+    def predict(self, horizon):
+        return float(self.state[0] + self.state[1] * horizon)
+
+
+FILTERS = {
+    'alpha-beta': AlphaBetaFilter,
+    'kalman': KalmanFilter1D,
+}
+
+
+def make_filter(kind, **params):
+    if kind not in FILTERS:
+        raise ValueError(f"未知滤波器 '{kind}'，可选: {', '.join(FILTERS)}")
+    return FILTERS[kind](**params)
+
+
+class LatencyPredictor:
+    """对融合后的 Y 做滤波，并按管线延迟向前外推
+
+    horizon=None 时自动使用实测的 "采集 -> 判定" 延迟 (指数平均) + extra (按键输出等固定延迟)；
+    这要求传入的时间戳和 time.perf_counter() 同一时钟 (FrameGrabber / ReplayCapture 的 timestamp)。
+    """
+
+    def __init__(self, kind='alpha-beta', horizon=None, extra=0.0, **params):
+        self.filter = make_filter(kind, **params)
+        self.horizon = horizon
+        self.extra = extra
+        self.measured_latency = 0.0
+
+    def observe_latency(self, latency):
+        if latency <= 0: return
+        if not self.measured_latency:
+            self.measured_latency = latency
+        else:
+            self.measured_latency = self.measured_latency * 0.95 + latency * 0.05
+
+    def current_horizon(self):
+        base = self.horizon if self.horizon is not None else self.measured_latency
+        return base + self.extra
+
+    def update(self, y, t):
+        """y == -1 表示本帧没有测量，返回 -1 (不外推)"""
+        if y == -1:
+            return -1
+        self.filter.update(y, t)
+        return self.filter.predict(self.current_horizon())
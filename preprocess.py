@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+
+class BufferPool:
+    """按名字缓存预分配的缓冲区，只有尺寸变化 (换分辨率) 时才重新分配"""
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype)
+        return buf
+
+
+class FramePreprocessor:
+    """旋转 + 镜像合并成一步，结果写入预分配缓冲区 (dst=)，热路径上不再分配整帧数组
+
+    顺时针 90° + 镜像 = 转置，逆时针 90° + 镜像 = 转置后上下左右翻转，
+    180° + 镜像 = 上下翻转；不旋转也不镜像时直接返回原帧 (零拷贝)。
+    process() 返回的 BGR 帧和 gray() 返回的灰度图在下一次 process() 之前有效。
+    """
+
+    def __init__(self, rotate=None, mirror=False):
+        self.rotate = rotate
+        self.mirror = mirror
+        self.pool = BufferPool()
+        self._bgr = None
+        self._gray = None
+
+    def _output_shape(self, frame):
+        h, w = frame.shape[:2]
+        if self.rotate in (cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_90_COUNTERCLOCKWISE):
+            h, w = w, h
+        return (h, w) + frame.shape[2:]
+
+    def process(self, frame):
+        self._gray = None
+        if self.rotate is None and not self.mirror:
+            self._bgr = frame
+            return frame
+
+        dst = self.pool.get('bgr', self._output_shape(frame))
+        if self.rotate is None:
+            cv2.flip(frame, 1, dst=dst)
+        elif not self.mirror:
+            cv2.rotate(frame, self.rotate, dst=dst)
+        elif self.rotate == cv2.ROTATE_90_CLOCKWISE:
+            cv2.transpose(frame, dst=dst)
+        elif self.rotate == cv2.ROTATE_90_COUNTERCLOCKWISE:
+            cv2.transpose(frame, dst=dst)
+            cv2.flip(dst, -1, dst=dst)
+        else:  # ROTATE_180
+            cv2.flip(frame, 0, dst=dst)
+        self._bgr = dst
+        return dst
+
+    def gray(self):
+        """当前帧的灰度图 (每帧最多转换一次，多个检测器共用)"""
+        if self._gray is None:
+            self._gray = self.pool.get('gray', self._bgr.shape[:2])
+            cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        return self._gray
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import cv2
+
+
+class PreviewStreamer:
+    """无头模式下的预览：在独立线程里按限定帧率绘制标注、编码 JPEG
+
+    检测循环只调用 submit()，超过帧率上限的帧直接忽略；
+    被采纳的帧拷贝一份交给预览线程，绘制 / 编码 / 显示都不占用检测循环的时间。
+    """
+
+    def __init__(self, render, max_fps=15, jpeg_quality=70, window_name=None):
+        self.render = render            # render(frame, payload)，在拷贝上原地绘制标注
+        self.interval = 1.0 / max_fps
+        self.jpeg_quality = jpeg_quality
+        self.window_name = window_name  # 不为 None 时同时在本地窗口显示
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._last_submit = 0.0
+        self._jpeg = None
+        self._jpeg_id = 0
+        self._running = True
+        self.frames_rendered = 0
+
+        self._thread = threading.Thread(target=self._render_loop, name="PreviewStreamer", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, payload=None):
+        now = time.perf_counter()
+        if now - self._last_submit < self.interval:
+            return
+        self._last_submit = now
+        # 采集 / 预处理缓冲区会被复用，这里必须拷贝
+        with self._cond:
+            self._pending = (frame.copy(), payload)
+            self._cond.notify_all()
+
+    def _render_loop(self):
+        while self._running:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or not self._running)
+                if not self._running: break
+                frame, payload = self._pending
+                self._pending = None
+
+            self.render(frame, payload)
+            ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                with self._cond:
+                    self._jpeg = buf.tobytes()
+                    self._jpeg_id += 1
+                    self._cond.notify_all()
+            self.frames_rendered += 1
+
+            if self.window_name is not None:
+                cv2.imshow(self.window_name, frame)
+                cv2.waitKey(1)
+
+    def mjpeg_frames(self):
+        """multipart/x-mixed-replace 生成器，供 Flask Response 使用"""
+        last_id = 0
+        while self._running:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jpeg_id != last_id or not self._running, timeout=1.0)
+                if self._jpeg_id == last_id: continue
+                last_id, jpeg = self._jpeg_id, self._jpeg
+            yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+        if self.window_name is not None:
+            cv2.destroyWindow(self.window_name)
@@ -0,0 +1,220 @@
+import argparse
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+# ==========================================
+#  录制文件格式 (.chrec)
+# ==========================================
+# 文件头: magic(4s) + version(H)
+# 每帧:   frame_id(I) + timestamp(d, 相对第一帧的秒数) + h(H) + w(H) + channels(B) + codec(B) + length(I) + payload
+MAGIC = b'CHRC'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sH')
+FRAME_HEADER = struct.Struct('<IdHHBBI')
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_PNG = 2
+CODECS = {'raw': CODEC_RAW, 'zlib': CODEC_ZLIB, 'png': CODEC_PNG}
+
+
+def encode_frame(frame, codec):
+    if codec == CODEC_RAW:
+        return np.ascontiguousarray(frame).tobytes()
+    if codec == CODEC_ZLIB:
+        return zlib.compress(np.ascontiguousarray(frame).tobytes(), 1)
+    # PNG 无损，压缩等级 1 兼顾速度
+    ok, buf = cv2.imencode('.png', frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    if not ok:
+        raise ValueError("PNG 编码失败")
+    return buf.tobytes()
+
+
+def decode_frame(payload, h, w, channels, codec):
+    shape = (h, w, channels) if channels > 1 else (h, w)
+    if codec == CODEC_RAW:
+        return np.frombuffer(payload, dtype=np.uint8).reshape(shape).copy()
+    if codec == CODEC_ZLIB:
+        return np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(shape).copy()
+    return cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+
+
+class FrameRecorder:
+    """把原始帧 + 采集时间戳写入 .chrec 文件 (后台线程编码/写盘，不阻塞检测循环)"""
+
+    def __init__(self, path, codec='png', max_queue=240):
+        self.codec = CODECS[codec]
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._t0 = None
+        self._next_id = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._thread = threading.Thread(target=self._write_loop, name="FrameRecorder", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, timestamp=None, frame_id=None):
+        if timestamp is None: timestamp = time.perf_counter()
+        if self._t0 is None: self._t0 = timestamp
+        self._next_id += 1
+        if frame_id is None: frame_id = self._next_id
+        try:
+            # 采集缓冲区会被复用，这里必须拷贝
+            self._queue.put_nowait((frame_id, timestamp - self._t0, frame.copy()))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None: break
+            frame_id, ts, frame = item
+            payload = encode_frame(frame, self.codec)
+            h, w = frame.shape[:2]
+            channels = frame.shape[2] if frame.ndim == 3 else 1
+            self._file.write(FRAME_HEADER.pack(frame_id, ts, h, w, channels, self.codec, len(payload)))
+            self._file.write(payload)
+            self.frames_written += 1
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+
+def iter_recording(path):
+    """逐帧读取 .chrec 文件，产出 (frame_id, timestamp, frame)"""
+    with open(path, 'rb') as f:
+        magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} 不是 .chrec 录制文件")
+        if version != VERSION:
+            raise ValueError(f"不支持的录制文件版本: {version}")
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size: break
+            frame_id, ts, h, w, channels, codec, length = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length: break
+            yield frame_id, ts, decode_frame(payload, h, w, channels, codec)
+
+
+class ReplayCapture:
+    """回放 .chrec 文件，接口与 cv2.VideoCapture 一致，可直接替换 cap
+
+    realtime=False 时尽快输出 (用于测吞吐)，realtime=True 时按录制时间戳节奏输出。
+    默认预先把整段录制解码到内存，避免解码时间混进基准测试。
+    """
+
+    def __init__(self, path, realtime=False, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.frames = list(iter_recording(path))
+        self.index = 0
+        self._opened = bool(self.frames)
+        self._start = None
+
+        self.frame_id = 0
+        self.timestamp = 0.0            # 本帧交付时间 (perf_counter)，作为"采集时间"
+        self.recorded_timestamp = 0.0   # 录制时的相对时间戳
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        if self.index >= len(self.frames):
+            if not self.loop:
+                self._opened = False
+                return False, None
+            self.index = 0
+            self._start = None
+
+        frame_id, ts, frame = self.frames[self.index]
+        self.index += 1
+
+        if self.realtime:
+            if self._start is None: self._start = time.perf_counter() - ts
+            delay = self._start + ts - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+
+        self.frame_id = frame_id
+        self.recorded_timestamp = ts
+        self.timestamp = time.perf_counter()
+        # 检测循环会在帧上绘制，交付副本保证回放可重复
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def set(self, prop_id, value):
+        return False
+
+    def get(self, prop_id):
+        if not self.frames: return 0
+        h, w = self.frames[0][2].shape[:2]
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH: return w
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT: return h
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT: return len(self.frames)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES: return self.index
+        if prop_id == cv2.CAP_PROP_FPS:
+            duration = self.frames[-1][1] - self.frames[0][1]
+            return (len(self.frames) - 1) / duration if duration > 0 else 0
+        return 0
+
+    def release(self):
+        self._opened = False
+
+
+def record_camera(camera_index, out_path, seconds, width, height, codec):
+    cap = cv2.VideoCapture(camera_index)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    recorder = FrameRecorder(out_path, codec)
+    print(f"🔴 Recording camera {camera_index} -> {out_path} ({seconds}s)...")
+    end = time.perf_counter() + seconds
+    while cap.isOpened() and time.perf_counter() < end:
+        success, image = cap.read()
+        if not success: continue
+        recorder.write(image, time.perf_counter())
+    cap.release()
+    recorder.close()
+    print(f"✓ {recorder.frames_written} frames written, {recorder.frames_dropped} dropped")
+
+
+def print_info(path):
+    cap = ReplayCapture(path)
+    print(f"{path}: {int(cap.get(cv2.CAP_PROP_FRAME_COUNT))} frames, "
+          f"{int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}, "
+          f"{cap.get(cv2.CAP_PROP_FPS):.1f} fps")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="录制 / 查看摄像头原始帧 (.chrec)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('record', help="从摄像头录制")
+    p.add_argument('--camera', type=int, default=0)
+    p.add_argument('--out', required=True)
+    p.add_argument('--seconds', type=float, default=10)
+    p.add_argument('--width', type=int, default=640)
+    p.add_argument('--height', type=int, default=480)
+    p.add_argument('--codec', choices=sorted(CODECS), default='png')
+
+    p = sub.add_parser('info', help="查看录制文件信息")
+    p.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record_camera(args.camera, args.out, args.seconds, args.width, args.height, args.codec)
+    else:
+        print_info(args.path)
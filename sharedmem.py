@@ -0,0 +1,147 @@
+import argparse
+import mmap
+import os
+import sys
+import time
+
+# ==========================================
+#  Brokenithm 共享内存布局 (chuniio-mux.dll / brokenithm.dll 读取)
+# ==========================================
+# struct {
+#     uint8_t airIoStatus[6];        // IR1 (最下) -> IR6 (最上)，非 0 = 光束被挡住
+#     uint8_t sliderIoStatus[32];    // 32 个触摸格的压力 0-255，下标 0 = cell1 (最右边)
+#     uint8_t ledRgbData[32 * 3];    // 游戏写入的滑条灯光
+#     uint8_t testBtn, serviceBtn, coinInsertion, cardRead;
+#     uint8_t remoteCardRead, remoteCardType, remoteCardId[10];
+# };
+SHARED_MEMORY_NAME = 'Local\\BROKENITHM_SHARED_BUFFER'
+SHARED_MEMORY_SIZE = 1024
+
+AIR_OFFSET, AIR_COUNT = 0, 6
+SLIDER_OFFSET, SLIDER_COUNT = 6, 32
+LED_OFFSET, LED_SIZE = 38, 32 * 3
+TEST_OFFSET = 134
+SERVICE_OFFSET = 135
+COIN_OFFSET = 136
+
+SLIDER_PRESSURE = 128   # 按下时写入的压力值 (与 Brokenithm 客户端一致)
+
+# 与 segatools.ini 的键盘映射一致：16 个键从左到右，每个键对应上下两个触摸格
+DEFAULT_SLIDER_KEYS = ['l', 'k', 'j', 'i', 'h', 'g', 'f', 'e', 'd', 'c', 'b', 'a', '9', '8', '7', '6']
+DEFAULT_IR_KEYS = ['m', 'n', 'o', 'p', 'q', 'r']
+AIR_ALL_KEY = 'space'   # io3 的 "ir" 键：一次挡住全部 6 道光束
+
+
+def key_cells(index, keys=16):
+    """从左数第 index 个键 (共 keys 个) 对应的 sliderIoStatus 下标 (触摸格从右往左编号)"""
+    width = SLIDER_COUNT // keys
+    first = (keys - 1 - index) * width
+    return range(first, first + width)
+
+
+def open_region(path=None, name=SHARED_MEMORY_NAME):
+    """path 为 None 时打开 Windows 命名共享内存，否则映射一个普通文件 (Linux 上测试用)"""
+    if path is None:
+        if sys.platform != 'win32':
+            raise OSError("命名共享内存只支持 Windows，其他平台请指定 path 映射文件")
+        return mmap.mmap(-1, SHARED_MEMORY_SIZE, tagname=name)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        if os.fstat(fd).st_size < SHARED_MEMORY_SIZE:
+            os.ftruncate(fd, SHARED_MEMORY_SIZE)
+        return mmap.mmap(fd, SHARED_MEMORY_SIZE)
+    finally:
+        os.close(fd)
+
+
+class SliderSharedMemory:
+    """直接写 Brokenithm 共享内存的滑条 / Air 状态，绕过键盘模拟
+
+    每次写入都是原地修改单个字节，chuniio 每次轮询读到的就是最新状态，没有系统输入延迟。
+    """
+
+    def __init__(self, path=None, name=SHARED_MEMORY_NAME):
+        self.path = path
+        self.region = open_region(path, name)
+        self.view = memoryview(self.region)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def set_cell(self, cell, pressure):
+        self.view[SLIDER_OFFSET + cell] = pressure
+
+    def set_slider(self, pressures):
+        """一次写入全部 32 个触摸格的压力 (下标 0 = cell1)"""
+        self.view[SLIDER_OFFSET:SLIDER_OFFSET + SLIDER_COUNT] = bytes(pressures)
+
+    def set_key(self, index, pressed, keys=16):
+        value = SLIDER_PRESSURE if pressed else 0
+        for cell in key_cells(index, keys):
+            self.view[SLIDER_OFFSET + cell] = value
+
+    def set_beam(self, beam, blocked):
+        """beam: 0 = IR1 (最下)"""
+        self.view[AIR_OFFSET + beam] = 1 if blocked else 0
+
+    def set_air(self, beams):
+        self.view[AIR_OFFSET:AIR_OFFSET + AIR_COUNT] = bytes(1 if b else 0 for b in beams)
+
+    def clear(self):
+        self.view[AIR_OFFSET:LED_OFFSET] = bytes(LED_OFFSET - AIR_OFFSET)
+
+    def close(self):
+        self.clear()
+        self.view.release()
+        self.region.close()
+
+
+class SharedMemoryReader:
+    """模拟 chuniio 一侧：只读当前的 Air / 滑条 / LED 状态 (测试和调试用)"""
+
+    def __init__(self, path=None, name=SHARED_MEMORY_NAME):
+        self.region = open_region(path, name)
+
+    def air(self):
+        return list(self.region[AIR_OFFSET:AIR_OFFSET + AIR_COUNT])
+
+    def slider(self):
+        return list(self.region[SLIDER_OFFSET:SLIDER_OFFSET + SLIDER_COUNT])
+
+    def leds(self):
+        data = self.region[LED_OFFSET:LED_OFFSET + LED_SIZE]
+        return [tuple(data[i:i + 3]) for i in range(0, LED_SIZE, 3)]
+
+    def close(self):
+        self.region.close()
+
+
+def format_state(reader):
+    # 按屏幕方向 (从左到右) 显示，触摸格是从右往左编号的
+    slider = ''.join('#' if p else '.' for p in reversed(reader.slider()))
+    air = ''.join(str(i + 1) if b else '-' for i, b in enumerate(reader.air()))
+    return f"slider [{slider}]  air [{air}]"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="查看 Brokenithm 共享内存中的滑条 / Air 状态")
+    parser.add_argument('--path', help="映射文件路径 (默认打开 Windows 命名共享内存)")
+    parser.add_argument('--interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    reader = SharedMemoryReader(args.path)
+    last = None
+    try:
+        while True:
+            line = format_state(reader)
+            if line != last:
+                print(line)
+                last = line
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
@@ -0,0 +1,135 @@
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimeline:
+    """分阶段记录启动耗时 (time-to-ready)，时间都相对 origin (进程开始导入的时刻)
+
+    stage() 记录一段耗时，可以在多个线程里同时用 (并行的阶段会有重叠)；
+    mark() 记录一个时间点 (例如 'armed' = 开始输出按键)。
+    """
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.stages = []     # [(name, start, end), ...] 相对 origin 的秒数，按结束时间排列
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def stage(self, name):
+        start = self._now()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages.append((name, start, self._now()))
+
+    def mark(self, name, start=None):
+        """记录一个时间点；给出 start 时记录 start -> 现在 这一段"""
+        now = self._now()
+        with self._lock:
+            self.stages.append((name, now if start is None else start, now))
+        return now
+
+    def counters(self):
+        # 计数器名会直接成为 Prometheus 指标名，只能有 [a-zA-Z0-9_]
+        return {f"startup_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_ms": end * 1000 for name, _, end in self.stages}
+
+    def report(self):
+        print("⏱  启动耗时 (从进程启动算起):")
+        for name, start, end in self.stages:
+            span = f"{(end - start) * 1000:7.0f} ms" if end > start else " " * 10
+            print(f"   {name:<12} {start:6.2f}s -> {end:6.2f}s  {span}")
+
+
+def run_parallel(timeline=None, **tasks):
+    """并行执行若干个无参函数 (各一个线程)，返回 {name: 结果}；任一任务抛异常则在这里重新抛出
+
+    timeline 不为 None 时每个任务记为一个同名阶段。
+    """
+    results, errors = {}, {}
+
+    def run(name, task):
+        try:
+            if timeline is None:
+                results[name] = task()
+            else:
+                with timeline.stage(name):
+                    results[name] = task()
+        except BaseException as e:
+            errors[name] = e
+
+    threads = [threading.Thread(target=run, args=item, name=f"Startup-{item[0]}", daemon=True)
+               for item in tasks.items()]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    for name in tasks:
+        if name in errors:
+            raise errors[name]
+    return results
+
+
+def wait_listening(port, host='127.0.0.1', timeout=5.0):
+    """等到本机端口可以连接 (服务器线程已经开始监听)，超时返回 False"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.01)
+    return False
+
+
+def warm_up(landmarker, frame, min_frames=5, max_frames=40, tolerance=0.2):
+    """在假帧上跑 MediaPipe 直到耗时稳定，返回 (推理次数, 稳态耗时毫秒)
+
+    第一次 hands.process 要初始化计算图 / 分配张量，前几次明显偏慢；连续 min_frames 次的
+    最大值不超过最小值的 (1 + tolerance) 倍即视为稳定。直接调用模型，不经过光流跟踪，也不计入 stats。
+    """
+    costs = []
+    for _ in range(max_frames):
+        start = time.perf_counter()
+        landmarker.hands.process(landmarker.crop.prepare(frame))
+        costs.append(time.perf_counter() - start)
+        recent = costs[-min_frames:]
+        if len(recent) == min_frames and max(recent) <= min(recent) * (1 + tolerance):
+            break
+    recent = sorted(costs[-min_frames:])
+    steady = recent[len(recent) // 2]
+    landmarker.cost = steady
+    return len(costs), steady * 1000
+
+
+class ArmGate:
+    """预热后真实帧的处理耗时也回到稳态，才开始输出按键
+
+    摄像头刚打开时自动曝光 / 驱动缓冲会让前几帧又慢又旧，这时的判定不可靠。
+    最近 frames 帧的处理耗时都不超过 steady_ms * factor 就放行；最多等 timeout 秒 (机器就是慢的情况)。
+    放行之后一直保持放行。
+    """
+
+    def __init__(self, steady_ms, factor=2.0, frames=10, timeout=3.0):
+        self.limit = steady_ms * factor / 1000
+        self.frames = frames
+        self.timeout = timeout
+        self.armed = False
+        self.seen = 0
+        self._calm = 0
+        self._start = None
+
+    def update(self, seconds):
+        if self.armed:
+            return True
+        if self._start is None:
+            self._start = time.perf_counter()
+        self.seen += 1
+        self._calm = self._calm + 1 if seconds <= self.limit else 0
+        if self._calm >= self.frames or time.perf_counter() - self._start >= self.timeout:
+            self.armed = True
+        return self.armed
@@ -0,0 +1,253 @@
+import argparse
+import csv
+import math
+import time
+
+import cv2
+import numpy as np
+
+# ==========================================
+#  合成画面：按脚本移动的光斑，穿过 IR 分界线的时刻精确已知
+# ==========================================
+# 轨迹写在 "预处理之后" 的画面坐标里 (旋转 / 镜像之后、检测器看到的画面，归一化 0~1)，
+# SyntheticCapture 再按管线的 rotate / mirror 反向变换成摄像头方向的原始帧。
+# MediaPipe 认不出光斑，Air 管线靠运动检测 (帧差重心) 出结果；开着 MediaPipe 时模型照样每帧跑，耗时计入延迟。
+
+# cv2.rotate 的反方向
+INVERSE_ROTATION = {
+    cv2.ROTATE_90_CLOCKWISE: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    cv2.ROTATE_90_COUNTERCLOCKWISE: cv2.ROTATE_90_CLOCKWISE,
+    cv2.ROTATE_180: cv2.ROTATE_180,
+}
+
+
+class Scene:
+    """关键帧轨迹 [(t, x, y), ...] 之间线性插值；wiggle 让光斑停在某一层时也左右晃动 (帧差才有结果)
+
+    时间 t < 0 或超过 duration 时画面里没有光斑。
+    """
+
+    def __init__(self, keyframes, radius=0.06, wiggle=0.03, wiggle_hz=8.0, background=30, color=220):
+        self.keyframes = sorted(keyframes)
+        self.radius = radius
+        self.wiggle = wiggle
+        self.wiggle_hz = wiggle_hz
+        self.background = background
+        self.color = color
+        self.duration = self.keyframes[-1][0]
+
+    def position(self, t):
+        """t 时刻光斑中心 (x, y)，画面里没有光斑时返回 None"""
+        if t < 0 or t > self.duration:
+            return None
+        times = [k[0] for k in self.keyframes]
+        x = float(np.interp(t, times, [k[1] for k in self.keyframes]))
+        y = float(np.interp(t, times, [k[2] for k in self.keyframes]))
+        return x + self.wiggle * math.sin(2 * math.pi * self.wiggle_hz * t), y
+
+    def render(self, t, image):
+        """把 t 时刻的画面画进 image (预处理之后的方向)"""
+        image[:] = self.background
+        pos = self.position(t)
+        if pos is not None:
+            h, w = image.shape[:2]
+            cv2.circle(image, (int(pos[0] * w), int(pos[1] * h)), int(self.radius * min(w, h)),
+                       (self.color,) * 3, -1, cv2.LINE_AA)
+        return image
+
+    def crossings(self, air_top=0.5, air_bottom=1.0):
+        """光斑中心穿过 IR 分界线的时刻：[(t, 穿过之后的等级), ...]，按时间排列"""
+        from vision import get_ir_level
+
+        segment = (air_bottom - air_top) / 6
+        bounds = [air_top] + [air_bottom - k * segment for k in range(1, 6)]
+        events = []
+        for (t0, _, y0), (t1, _, y1) in zip(self.keyframes, self.keyframes[1:]):
+            if y0 == y1: continue
+            for b in bounds:
+                if min(y0, y1) < b < max(y0, y1):
+                    t = t0 + (b - y0) / (y1 - y0) * (t1 - t0)
+                    after = y0 + (y1 - y0) * min(1.0, (t - t0 + 1e-4) / (t1 - t0))
+                    events.append((t, get_ir_level(after, air_top, air_bottom)))
+        return sorted(events)
+
+    def intervals(self, air_top=0.5, air_bottom=1.0):
+        """每一层被占据的时间段 [(level, start, end), ...] (tune.py 的标注格式)"""
+        from vision import get_ir_level
+
+        start_pos = self.position(0.0)
+        level = get_ir_level(self.keyframes[0][2], air_top, air_bottom) if start_pos else 0
+        start = 0.0
+        out = []
+        for t, new_level in self.crossings(air_top, air_bottom) + [(self.duration, 0)]:
+            if level > 0 and t > start:
+                out.append((level, start, t))
+            level, start = new_level, t
+        return out
+
+
+def sweep_scene(period=1.0, repeats=10, top=0.52, bottom=0.98, x=0.5, **params):
+    """匀速上下扫过全部 6 层：period 秒一个来回"""
+    keyframes = [(0.0, x, bottom)]
+    for i in range(repeats):
+        keyframes.append((i * period + period / 2, x, top))
+        keyframes.append(((i + 1) * period, x, bottom))
+    return Scene(keyframes, **params)
+
+
+def steps_scene(hold=0.4, move=0.02, levels=(1, 3, 6, 2, 5, 4), repeats=3, x=0.5, air_top=0.5, air_bottom=1.0, **params):
+    """在各层中心之间快速跳 (move 秒) 再停住 hold 秒：阶跃响应"""
+    segment = (air_bottom - air_top) / 6
+    center = lambda level: air_bottom - (level - 0.5) * segment
+    t = 0.0
+    keyframes = [(t, x, center(levels[0]))]
+    for _ in range(repeats):
+        for level in levels:
+            keyframes.append((t + move, x, center(level)))
+            t += move + hold
+            keyframes.append((t, x, center(level)))
+    return Scene(keyframes, **params)
+
+
+SCENES = {
+    'sweep': sweep_scene,
+    # 快速挥手：一个来回 0.3 秒，每层只停留一两帧
+    'fast': lambda **params: sweep_scene(**dict({'period': 0.3, 'repeats': 30}, **params)),
+    'steps': steps_scene,
+}
+
+
+def make_scene(kind, **params):
+    if kind not in SCENES:
+        raise ValueError(f"未知合成场景 '{kind}'，可选: {', '.join(SCENES)}")
+    return SCENES[kind](**params)
+
+
+class SyntheticCapture:
+    """合成摄像头：接口与 cv2.VideoCapture 一致，可以直接替换 cap (也能放进 FrameGrabber)
+
+    第 k 帧在 start_at + k / fps (perf_counter 时钟) 时刻 "曝光"，画的是场景在 k / fps 时刻的样子；
+    realtime=True 时 read() 等到下一个帧时刻才返回，读得慢时跳过中间的帧 (相当于驱动只缓冲 1 帧)。
+    start_at 可以是将来的时刻 (之前只输出没有光斑的画面，供管线预热)，None = 第一次 read() 的时刻。
+    场景结束后 isOpened() 返回 False。
+    """
+
+    def __init__(self, scene, width=640, height=480, fps=60, rotate=None, mirror=False, start_at=None, realtime=True):
+        self.scene = scene
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.rotate = rotate
+        self.mirror = mirror
+        self.start_at = start_at
+        self.realtime = realtime
+        rotated = rotate in (cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        self._canvas = np.zeros((width, height, 3) if rotated else (height, width, 3), np.uint8)
+        self._next = None     # 下一个可以交付的帧序号
+        self._opened = True
+
+        self.frame_id = 0
+        self.timestamp = 0.0          # 本帧曝光时刻 (perf_counter)
+        self.scene_time = 0.0         # 本帧对应的场景时间 (秒)
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        now = time.perf_counter()
+        if self.start_at is None: self.start_at = now
+        k = math.ceil((now - self.start_at) * self.fps) if self.realtime else (self._next or 0)
+        if self._next is not None: k = max(k, self._next)
+        tick = self.start_at + k / self.fps
+        if k / self.fps > self.scene.duration:
+            self._opened = False
+            return False, None
+        if self.realtime:
+            delay = tick - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+        self._next = k + 1
+
+        self.scene.render(k / self.fps, self._canvas)
+        frame = self._canvas
+        if self.mirror: frame = cv2.flip(frame, 1)
+        if self.rotate is not None: frame = cv2.rotate(frame, INVERSE_ROTATION[self.rotate])
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            frame = image
+        elif frame is self._canvas:
+            frame = frame.copy()
+
+        self.frame_id += 1
+        self.timestamp = tick
+        self.scene_time = k / self.fps
+        return True, frame
+
+    def frame_after(self, t):
+        """场景时间 t 之后第一帧的曝光时刻 (perf_counter)：穿线最早在这一帧里可见"""
+        return self.start_at + math.ceil(t * self.fps) / self.fps
+
+    def set(self, prop_id, value):
+        return False
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH: return self.width
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT: return self.height
+        if prop_id == cv2.CAP_PROP_FPS: return self.fps
+        return 0
+
+    def release(self):
+        self._opened = False
+
+
+def open_synthetic(spec, width=640, height=480, rotate=None, mirror=False):
+    """spec: 场景名，或 {'scene': 名字, 'fps': .., 'start_at': .., 其余键传给场景}"""
+    if isinstance(spec, str): spec = {'scene': spec}
+    params = dict(spec)
+    kind = params.pop('scene')
+    fps = params.pop('fps', 60)
+    start_at = params.pop('start_at', None)
+    print(f"🧪 Synthetic camera: scene '{kind}' @ {fps} fps")
+    return SyntheticCapture(make_scene(kind, **params), width, height, fps, rotate, mirror, start_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把合成场景写成录制文件 (.chrec) + 标注 (.labels.csv)，给 bench.py / tune.py 用")
+    parser.add_argument('--scene', choices=sorted(SCENES), default='sweep')
+    parser.add_argument('--fps', type=int, default=60)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--rotate', choices=['none', 'cw', 'ccw'], default='cw', help="管线的旋转方向 (默认同 webb.py)")
+    parser.add_argument('--air-top', type=float, default=0.5)
+    parser.add_argument('--air-bottom', type=float, default=1.0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+
+    from recording import CODEC_ZLIB, FILE_HEADER, FRAME_HEADER, MAGIC, VERSION, encode_frame
+
+    rotate = {'none': None, 'cw': cv2.ROTATE_90_CLOCKWISE, 'ccw': cv2.ROTATE_90_COUNTERCLOCKWISE}[args.rotate]
+    scene = make_scene(args.scene)
+    cap = SyntheticCapture(scene, args.width, args.height, args.fps, rotate, start_at=0.0, realtime=False)
+    # 离线生成比实时快得多，不用 FrameRecorder (队列满会丢帧)，直接同步写
+    with open(args.out, 'wb') as f:
+        f.write(FILE_HEADER.pack(MAGIC, VERSION))
+        while True:
+            success, frame = cap.read()
+            if not success: break
+            payload = encode_frame(frame, CODEC_ZLIB)
+            h, w = frame.shape[:2]
+            f.write(FRAME_HEADER.pack(cap.frame_id, cap.timestamp, h, w, 3, CODEC_ZLIB, len(payload)))
+            f.write(payload)
+
+    labels = args.out.rsplit('.', 1)[0] + '.labels.csv'
+    with open(labels, 'w', newline='') as f:
+        f.write("# key,start,end  (录制时间戳，秒) —— synthetic.py 按轨迹计算\n")
+        writer = csv.writer(f)
+        for level, start, end in scene.intervals(args.air_top, args.air_bottom):
+            writer.writerow([f'IR{level}', f'{start:.4f}', f'{end:.4f}'])
+    print(f"🔴 {cap.frame_id} frames -> {args.out}, labels -> {labels}")
+
+
+if __name__ == '__main__':
+    main()
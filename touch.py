@@ -0,0 +1,235 @@
+import asyncio
+import struct
+import threading
+import time
+
+# ==========================================
+#  平板触摸协议 (Socket.IO 二进制消息 'touch'，UDP 包格式相同)
+# ==========================================
+# 每个触摸帧发送一次完整状态：seq(H) + mask(H 或 I) [+ stamp(d)]，小端
+#   4 字节: 16 键位掩码，bit i = 从左数第 i 个键
+#   6 字节: 32 触摸格位掩码，bit i = 从左数第 i 格 (每两格对应一个键)
+#   再加 8 字节 (12 / 14 字节): 客户端换算到服务器时钟的发送时间 (Unix 毫秒)，用于统计单程延迟
+# seq 每条消息 +1 (16 位回绕)，服务器丢弃乱序 / 重复的旧消息。
+# 客户端即使状态不变也会定时重发 (心跳)，所以服务器永远以最后一条为准，不会残留卡键。
+SEQ = struct.Struct('<H')
+MASK16 = struct.Struct('<HH')
+MASK32 = struct.Struct('<HI')
+STAMP = struct.Struct('<d')
+
+
+def encode_touch(seq, mask, cells=16, stamp=None):
+    data = (MASK16 if cells == 16 else MASK32).pack(seq & 0xFFFF, mask)
+    return data + STAMP.pack(stamp) if stamp is not None else data
+
+
+def decode_touch(payload):
+    """返回 (seq, 16 键掩码, stamp 或 None)；32 格掩码按两格一键合并；不是二进制消息时抛 ValueError"""
+    if not isinstance(payload, (bytes, bytearray)):
+        raise ValueError(f"触摸消息类型错误: {type(payload).__name__}")
+    stamp = None
+    if len(payload) in (MASK16.size + STAMP.size, MASK32.size + STAMP.size):
+        stamp, = STAMP.unpack_from(payload, len(payload) - STAMP.size)
+        payload = payload[:-STAMP.size]
+    if len(payload) == MASK16.size:
+        seq, mask = MASK16.unpack(payload)
+        return seq, mask, stamp
+    if len(payload) == MASK32.size:
+        seq, cells = MASK32.unpack(payload)
+        mask = 0
+        for i in range(16):
+            if cells >> (i * 2) & 0b11: mask |= 1 << i
+        return seq, mask, stamp
+    raise ValueError(f"触摸消息长度错误: {len(payload)} 字节")
+
+
+def seq_newer(seq, last):
+    """16 位序号比较 (考虑回绕)：seq 比 last 新则返回 True"""
+    return 0 < (seq - last) & 0xFFFF < 0x8000
+
+
+class TouchDecoder:
+    """单个客户端的触摸状态：收到新掩码后与上一次做一次异或，得到按下 / 松开的键"""
+
+    def __init__(self, keys):
+        self.keys = keys        # 从左到右的键名，下标与掩码的 bit 对应
+        self.mask = 0
+        self.seq = None
+        self.stamp = None       # 最近一条消息的发送时间 (服务器时钟 Unix 毫秒)，客户端没带时为 None
+        self.messages = 0
+        self.stale = 0          # 被丢弃的乱序 / 重复消息数
+        # 同一设备的消息可能在不同的 Socket.IO 线程里同时处理：调用方持有 lock 完成 update + 应用变化，
+        # 否则两条消息的变化可能以相反顺序生效
+        self.lock = threading.Lock()
+
+    def update(self, payload):
+        """返回 [(key, down), ...]；乱序消息返回空列表"""
+        seq, mask, self.stamp = decode_touch(payload)
+        self.messages += 1
+        if self.seq is not None and not seq_newer(seq, self.seq):
+            self.stale += 1
+            return []
+        self.seq = seq
+        changed = mask ^ self.mask
+        self.mask = mask
+        return [(key, bool(mask >> i & 1)) for i, key in enumerate(self.keys) if changed >> i & 1]
+
+    def release_all(self):
+        released = [(key, False) for i, key in enumerate(self.keys) if self.mask >> i & 1]
+        self.mask = 0
+        return released
+
+
+class _TouchDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.server.handle_packet(data, addr)
+        # 原样回送序号，客户端据此测量往返延迟
+        self.transport.sendto(data[:SEQ.size], addr)
+
+
+class UdpTouchServer:
+    """轻量 UDP 触摸监听 (与 Socket.IO 并行)，包格式与二进制 'touch' 消息相同
+
+    asyncio 数据报端点跑在独立线程里，每个来源地址一个 TouchDecoder (丢弃乱序包)；
+    某个来源超过 release_timeout 秒没有任何包 (客户端应持续发送心跳) 就自动松开它按下的键。
+    on_change(source, [(key, down), ...]) 在监听线程里调用，source 形如 'udp:ip:port'。
+    """
+
+    def __init__(self, keys, on_change, host='0.0.0.0', port=3001, release_timeout=0.5):
+        self.keys = keys
+        self.on_change = on_change
+        self.host = host
+        self.port = port
+        self.release_timeout = release_timeout
+        self.decoders = {}      # addr -> TouchDecoder
+        self._last_seen = {}    # addr -> 最后一次收到包的时间
+        self.timeouts = 0       # 因心跳超时自动松开的次数
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="UdpTouchServer", daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        transport, _ = self._loop.run_until_complete(self._loop.create_datagram_endpoint(
+            lambda: _TouchDatagramProtocol(self), local_addr=(self.host, self.port)))
+        self.port = transport.get_extra_info('sockname')[1]   # port=0 时取实际端口
+        self._loop.create_task(self._watchdog())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            transport.close()
+            self._loop.close()
+
+    def handle_packet(self, data, addr):
+        decoder = self.decoders.get(addr)
+        if decoder is None:
+            decoder = self.decoders[addr] = TouchDecoder(self.keys)
+        self._last_seen[addr] = time.perf_counter()
+        try:
+            changes = decoder.update(data)
+        except ValueError:
+            return
+        if changes:
+            self.on_change(f"udp:{addr[0]}:{addr[1]}", changes)
+
+    async def _watchdog(self):
+        while True:
+            await asyncio.sleep(self.release_timeout / 4)
+            now = time.perf_counter()
+            for addr, seen in list(self._last_seen.items()):
+                if now - seen < self.release_timeout: continue
+                del self._last_seen[addr]
+                changes = self.decoders.pop(addr).release_all()
+                self.timeouts += 1
+                if changes:
+                    self.on_change(f"udp:{addr[0]}:{addr[1]}", changes)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=1.0)
+
+
+class KeyOwnership:
+    """多设备按键合并：每个来源 (Socket.IO sid / UDP 地址) 各自记录按下的键，
+    按引用计数合并成输出，只有计数 0 -> 1 才按下、1 -> 0 才松开
+
+    一个设备松开 / 同步 / 断线只影响它自己按住的键，另一台设备按着的同一个键不会被松开。
+    每次操作的开销只与变化的键数有关，和连接的设备数无关。
+    """
+
+    def __init__(self, output):
+        self.output = output    # 有 key_down / key_up 的对象 (InputDispatcher)
+        self.owned = {}         # source -> set(key)，只保留至少按着一个键的来源
+        self.refcount = {}      # key -> 按住它的来源数
+        self._lock = threading.Lock()
+
+    def _press(self, source, key):
+        keys = self.owned.setdefault(source, set())
+        if key in keys: return
+        keys.add(key)
+        count = self.refcount.get(key, 0)
+        self.refcount[key] = count + 1
+        if count == 0: self.output.key_down(key)
+
+    def _release(self, source, key):
+        keys = self.owned.get(source)
+        if not keys or key not in keys: return
+        keys.remove(key)
+        if not keys: del self.owned[source]
+        count = self.refcount[key] - 1
+        if count:
+            self.refcount[key] = count
+        else:
+            del self.refcount[key]
+            self.output.key_up(key)
+
+    def press(self, source, key):
+        with self._lock:
+            self._press(source, key)
+
+    def release(self, source, key):
+        with self._lock:
+            self._release(source, key)
+
+    def apply(self, source, changes):
+        """changes: [(key, down), ...] (TouchDecoder.update 的结果)"""
+        with self._lock:
+            for key, down in changes:
+                if down: self._press(source, key)
+                else: self._release(source, key)
+
+    def sync(self, source, keys):
+        """旧协议的 sync_keys：松开这个来源按着、但客户端已经不再按的键，返回松开的键"""
+        with self._lock:
+            released = list(self.owned.get(source, set()) - set(keys))
+            for key in released:
+                self._release(source, key)
+        return released
+
+    def drop(self, source):
+        """设备断线：立即松开它按着的所有键，返回松开的键"""
+        with self._lock:
+            released = list(self.owned.get(source, ()))
+            for key in released:
+                self._release(source, key)
+        return released
+
+    def pressed(self):
+        with self._lock:
+            return set(self.refcount)
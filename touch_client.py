@@ -0,0 +1,101 @@
+import argparse
+import socket
+import time
+
+import numpy as np
+
+from touch import SEQ, encode_touch
+
+
+def slide_masks(count):
+    """模拟手指从左滑到右再滑回来 (每帧按住相邻两个键)"""
+    positions = list(range(15)) + list(range(14, 0, -1))
+    for i in range(count):
+        p = positions[i % len(positions)]
+        yield 0b11 << p
+
+
+def run_udp(host, port, count, rate, timeout=0.5):
+    """返回每个包的往返延迟 (秒)，超时的包记为 None"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(timeout)
+    interval = 1.0 / rate
+    rtts = []
+    for seq, mask in enumerate(slide_masks(count), 1):
+        start = time.perf_counter()
+        sock.sendto(encode_touch(seq, mask), (host, port))
+        rtt = None
+        try:
+            while rtt is None:
+                data, _ = sock.recvfrom(64)
+                # 丢掉之前超时包迟到的回复
+                if len(data) >= SEQ.size and SEQ.unpack_from(data)[0] == seq & 0xFFFF:
+                    rtt = time.perf_counter() - start
+        except socket.timeout:
+            pass
+        rtts.append(rtt)
+        time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+    # 最后发一个全松开，避免测试结束后留下按住的键
+    sock.sendto(encode_touch(count + 1, 0), (host, port))
+    sock.close()
+    return rtts
+
+
+def run_socketio(url, count, rate, timeout=0.5):
+    import socketio
+
+    client = socketio.Client()
+    try:
+        # 只用 WebSocket 才能测到真实的推送延迟 (需要 websocket-client)
+        client.connect(url, transports=['websocket'])
+    except socketio.exceptions.ConnectionError:
+        print("⚠️  WebSocket 连接失败 (没装 websocket-client?)，改用默认传输 (可能是长轮询，延迟偏高)")
+        client = socketio.Client()
+        client.connect(url)
+    interval = 1.0 / rate
+    rtts = []
+    try:
+        for seq, mask in enumerate(slide_masks(count), 1):
+            start = time.perf_counter()
+            try:
+                client.call('touch', encode_touch(seq, mask), timeout=timeout)
+                rtts.append(time.perf_counter() - start)
+            except socketio.exceptions.TimeoutError:
+                rtts.append(None)
+            time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+        try:
+            client.call('touch', encode_touch(count + 1, 0), timeout=timeout)
+        except socketio.exceptions.TimeoutError:
+            pass   # 丢了最后一个 ack 不影响已经测到的往返延迟
+    finally:
+        client.disconnect()
+    return rtts
+
+
+def summarize(name, rtts):
+    ok = np.array([r for r in rtts if r is not None]) * 1000
+    lost = len(rtts) - len(ok)
+    if not len(ok):
+        return f"{name:<10} 全部超时 ({lost} 个包)"
+    p50, p99 = np.percentile(ok, [50, 99])
+    # 抖动：相邻两次往返延迟之差的平均绝对值 (RFC 3550 的思路)
+    jitter = np.mean(np.abs(np.diff(ok))) if len(ok) > 1 else 0.0
+    return (f"{name:<10} {len(ok):>6} {lost:>5} {ok.mean():>8.3f} {p50:>8.3f} "
+            f"{p99:>8.3f} {ok.max():>8.3f} {jitter:>8.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="触摸协议测试客户端：测量 UDP / Socket.IO 的往返延迟与抖动")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--udp-port', type=int, default=3001, help="0 = 不测 UDP")
+    parser.add_argument('--port', type=int, default=3000, help="Socket.IO 端口，0 = 不测")
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=120, help="每秒发送的触摸帧数")
+    args = parser.parse_args()
+
+    print(f"{'transport':<10} {'ok':>6} {'lost':>5} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'jitter':>8}")
+    print("-" * 70)
+    if args.udp_port:
+        print(summarize('udp', run_udp(args.host, args.udp_port, args.count, args.rate)))
+    if args.port:
+        print(summarize('socketio', run_socketio(f"http://{args.host}:{args.port}", args.count, args.rate)))
@@ -0,0 +1,543 @@
+import os
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+import argparse
+import ast
+import csv
+import hashlib
+import inspect
+import itertools
+import json
+import multiprocessing as mp
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from bench import CONFIGS, PIPELINES, parse_overrides
+from metrics import NULL_TIMER
+from motion import MotionBlob
+from preprocess import FramePreprocessor
+from recording import iter_recording
+from vision import DEFAULT_FINGER_CONFIG, AirDetector, AirResult, HandLandmarker
+from vision_worker import NUM_LANDMARKS
+
+# ==========================================
+#  参数分组
+# ==========================================
+# 只有模型参数变化才需要重跑 MediaPipe；运动参数变化只重跑帧差 (要解码帧，但很快)；
+# 其余参数 (判定范围、阈值、滤波、防抖) 全部在缓存的关键点 / 运动重心上重放，不碰图像。
+MODEL_PARAMS = ('max_num_hands', 'model_complexity', 'min_detection_confidence', 'min_tracking_confidence',
+                'infer_roi', 'infer_scale', 'track_interval', 'track_min_confidence')
+# 运动检测只看 air_top 以下的区域，所以 air_top 也算运动参数
+MOTION_PARAMS = ('air_top', 'motion_sensitivity', 'motion_area_min', 'motion_engine', 'motion_params')
+# 由调参器自己处理、不传给检测器的参数：
+#   debounce_frames          = webb.py / main.py 的 DEBOUNCE_FRAMES
+#   finger_threshold         = 所有手指的阈值；finger_threshold_<指尖 id> 只改一根手指
+TUNER_PARAMS = ('debounce_frames',)
+
+CACHE_DIR = 'tune_cache'
+
+
+def detector_defaults(pipeline):
+    factory = PIPELINES[pipeline]['factory']
+    return {name: p.default for name, p in inspect.signature(factory).parameters.items()
+            if p.default is not inspect.Parameter.empty}
+
+
+def split_params(pipeline, params):
+    """把一组配置拆成 (模型参数, 运动参数, 检测器其余参数, 调参器参数)；模型 / 运动参数补全检测器默认值"""
+    defaults = detector_defaults(pipeline)
+    model = {k: params.get(k, defaults[k]) for k in MODEL_PARAMS}
+    motion = {k: params.get(k, defaults[k]) for k in MOTION_PARAMS} if pipeline == 'air' else {}
+    tuner = {k: v for k, v in params.items() if k in TUNER_PARAMS or k.startswith('finger_threshold')}
+    post = {k: v for k, v in params.items() if k not in model and k not in motion and k not in tuner}
+    if 'finger_threshold' in tuner or any(k.startswith('finger_threshold_') for k in tuner):
+        config = {tip: dict(c) for tip, c in (post.get('finger_config') or DEFAULT_FINGER_CONFIG).items()}
+        for tip, c in config.items():
+            c['threshold'] = tuner.get(f'finger_threshold_{tip}', tuner.get('finger_threshold', c['threshold']))
+        post['finger_config'] = config
+    return model, motion, post, tuner
+
+
+# ==========================================
+#  中间结果缓存 (tune_cache/*.npz)
+# ==========================================
+def cache_path(recording, pipeline, stage, params):
+    """缓存文件名 = 录制文件 (路径 + 大小 + 修改时间) + 管线 + 该阶段参数 的哈希"""
+    st = os.stat(recording)
+    key = json.dumps({'recording': os.path.abspath(recording), 'size': st.st_size, 'mtime': st.st_mtime,
+                      'pipeline': pipeline, 'stage': stage, 'params': params}, sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(recording))[0]
+    return os.path.join(CACHE_DIR, f"{name}.{pipeline}.{stage}.{digest}.npz")
+
+
+def save_npz(path, **arrays):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)   # 多个进程同时写同一个缓存时不会读到半个文件
+
+
+def iter_frames(recording, pipeline):
+    """逐帧产出 (录制时间戳, 预处理后的图像, 整帧灰度图)，旋转 / 镜像与 bench.py 一致"""
+    spec = PIPELINES[pipeline]
+    preprocessor = FramePreprocessor(spec['rotate'], spec['flip'])
+    for _, ts, frame in iter_recording(recording):
+        image = preprocessor.process(frame)
+        yield ts, image, preprocessor.gray()
+
+
+def extract_landmarks(recording, pipeline, model, path):
+    """跑一遍 MediaPipe，保存每帧的关键点和推理耗时"""
+    landmarker = HandLandmarker(**model)
+    timestamps, hands_ms, counts, points = [], [], [], []
+    shape = (0, 0, 3)
+    try:
+        for ts, image, gray in iter_frames(recording, pipeline):
+            start = time.perf_counter()
+            hands = landmarker.process(image, gray)[:model['max_num_hands']]
+            hands_ms.append((time.perf_counter() - start) * 1000)
+            timestamps.append(ts)
+            shape = image.shape
+            frame = np.zeros((model['max_num_hands'], NUM_LANDMARKS, 3), np.float32)
+            for i, hl in enumerate(hands):
+                frame[i] = [(p.x, p.y, p.z) for p in hl.landmark]
+            counts.append(len(hands))
+            points.append(frame)
+    finally:
+        landmarker.close()
+    save_npz(path, timestamps=np.array(timestamps), hands_ms=np.array(hands_ms, np.float32),
+             counts=np.array(counts, np.uint8), shape=np.array(shape),
+             landmarks=np.array(points).reshape(len(points), model['max_num_hands'], NUM_LANDMARKS, 3))
+
+
+class MotionTap:
+    """包住真实的运动引擎，记下每帧的结果 (判定区内坐标) 和耗时"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.blobs = []
+        self.ms = []
+
+    def detect(self, gray, timer=NULL_TIMER):
+        start = time.perf_counter()
+        blob = self.engine.detect(gray, timer)
+        self.ms.append((time.perf_counter() - start) * 1000)
+        self.blobs.append((blob.cx, blob.cy) if blob is not None else (-1, -1))
+        return blob
+
+
+def extract_motion(recording, motion, path):
+    """只跑运动检测 (不加载 MediaPipe)，保存每帧的运动重心和耗时"""
+    detector = AirDetector(motion_only=True, **motion)
+    detector.motion = tap = MotionTap(detector.motion)
+    timestamps = []
+    shape = (0, 0, 3)
+    for ts, image, gray in iter_frames(recording, 'air'):
+        detector.detect_motion(image, AirResult(), gray)
+        timestamps.append(ts)
+        shape = image.shape
+    save_npz(path, timestamps=np.array(timestamps), shape=np.array(shape),
+             blobs=np.array(tap.blobs, np.int32).reshape(-1, 2), motion_ms=np.array(tap.ms, np.float32))
+
+
+def run_extract(task):
+    """进程池任务：('landmarks' | 'motion', 录制文件, 管线, 参数, 缓存文件)"""
+    stage, recording, pipeline, params, path = task
+    start = time.perf_counter()
+    if stage == 'landmarks': extract_landmarks(recording, pipeline, params, path)
+    else: extract_motion(recording, params, path)
+    return stage, recording, time.perf_counter() - start
+
+
+@lru_cache(maxsize=16)
+def load_landmarks(path):
+    """读缓存，把关键点还原成 MediaPipe 的 NormalizedLandmarkList (检测器的判定代码原样使用)"""
+    data = np.load(path)
+    frames = []
+    for count, hands in zip(data['counts'], data['landmarks']):
+        frame = []
+        for points in hands[:count]:
+            hl = landmark_pb2.NormalizedLandmarkList()
+            for x, y, z in points:
+                hl.landmark.add(x=float(x), y=float(y), z=float(z))
+            frame.append(hl)
+        frames.append(frame)
+    return data['timestamps'], data['hands_ms'], tuple(data['shape']), frames
+
+
+@lru_cache(maxsize=16)
+def load_motion(path):
+    data = np.load(path)
+    return data['timestamps'], tuple(data['shape']), data['blobs'], data['motion_ms']
+
+
+class CachedLandmarker:
+    """HandLandmarker 的替身：按 frame 返回缓存的关键点 (由调用方在每帧之前设置 frame)"""
+
+    def __init__(self, frames, hands_ms):
+        self.frames = frames
+        self.frame = 0
+        self.cost = float(np.median(hands_ms)) / 1000 if len(hands_ms) else 0.0
+        self.stats = {'hands_runs': 0, 'hands_tracked': 0}
+
+    def process(self, image, gray=None):
+        self.stats['hands_runs'] += 1
+        return self.frames[self.frame]
+
+    def close(self):
+        pass
+
+
+class CachedMotion:
+    """运动引擎的替身：按 frame 返回缓存的运动重心"""
+
+    def __init__(self, blobs):
+        self.blobs = blobs
+        self.frame = 0
+
+    def detect(self, gray, timer=NULL_TIMER):
+        cx, cy = self.blobs[self.frame]
+        return MotionBlob(int(cx), int(cy)) if cx >= 0 else None
+
+
+# ==========================================
+#  在缓存上重放判定 + 防抖，与标注比对
+# ==========================================
+class AirDebounce:
+    """与 webb.py 的 IrKeyOutput 相同：等级归零后再保持 debounce_frames 帧"""
+
+    def __init__(self, debounce_frames):
+        self.debounce_frames = debounce_frames
+        self.timer = 0
+        self.level = 0
+
+    def update(self, result):
+        if result.level > 0:
+            self.level = result.level
+            self.timer = self.debounce_frames
+        elif self.timer > 0:
+            self.timer -= 1
+        else:
+            self.level = 0
+        return {f'IR{self.level}'} if self.level else set()
+
+
+class GroundDebounce:
+    """与 main.py 的按键 / Air 计时器相同：最后一次检测到之后共保持 debounce_frames 帧"""
+
+    def __init__(self, debounce_frames):
+        self.debounce_frames = debounce_frames
+        self.timers = {}
+
+    def update(self, result):
+        seen = {str(k) for k in result.keys}
+        if result.air: seen.add('air')
+        for k in seen:
+            self.timers[k] = self.debounce_frames
+        active = set()
+        for k in list(self.timers):
+            if self.timers[k] > 0:
+                active.add(k)
+                self.timers[k] -= 1
+            else:
+                del self.timers[k]
+        return active
+
+
+DEBOUNCERS = {'air': AirDebounce, 'ground': GroundDebounce}
+DEFAULT_DEBOUNCE = {'air': 2, 'ground': 1}   # 与 webb.py / main.py 的 DEBOUNCE_FRAMES 保持一致 (改配置时同步改这里)
+
+
+def needs_landmarks(pipeline, post):
+    return not (pipeline == 'air' and post.get('motion_only'))
+
+
+def replay(recording, pipeline, params):
+    """在缓存上跑一遍检测器 (不加载 MediaPipe)，返回 (时间戳, 每帧输出的按键集合, 每帧处理耗时毫秒)"""
+    model, motion, post, tuner = split_params(pipeline, params)
+    landmarker = motion_engine = None
+    cost = 0.0
+    if needs_landmarks(pipeline, post):
+        timestamps, hands_ms, shape, frames = load_landmarks(cache_path(recording, pipeline, 'landmarks', model))
+        landmarker = CachedLandmarker(frames, hands_ms)
+        cost += landmarker.cost * 1000
+    if pipeline == 'air':
+        timestamps, shape, blobs, motion_ms = load_motion(cache_path(recording, pipeline, 'motion', motion))
+        motion_engine = CachedMotion(blobs)
+        cost += float(np.mean(motion_ms)) if len(motion_ms) else 0.0
+        if post.get('predict_filter') and post.get('predict_horizon') is None:
+            # 回放没有真实的 "采集 -> 判定" 延迟，用录制时测得的推理耗时代替
+            post['predict_horizon'] = cost / 1000
+        post.update(motion)
+    detector = PIPELINES[pipeline]['factory'](landmarker=landmarker, **post)
+    if motion_engine is not None: detector.motion = motion_engine
+    if getattr(detector, 'predictor', None) is not None: detector.measure_latency = False   # 时间戳是录制时间
+    debounce = DEBOUNCERS[pipeline](tuner.get('debounce_frames', DEFAULT_DEBOUNCE[pipeline]))
+
+    image = np.zeros(shape, np.uint8)
+    gray = np.zeros(shape[:2], np.uint8)
+    outputs = []
+    start = time.perf_counter()
+    for i, ts in enumerate(timestamps):
+        if landmarker is not None: landmarker.frame = i
+        if motion_engine is not None: motion_engine.frame = i
+        outputs.append(debounce.update(detector.process(image, float(ts), gray)))
+    post_ms = (time.perf_counter() - start) * 1000 / max(1, len(timestamps))
+    return timestamps, outputs, cost + post_ms
+
+
+def output_intervals(timestamps, outputs):
+    """每帧的按键集合 -> [(key, 按下时间, 松开时间), ...]"""
+    intervals, opened = [], {}
+    for ts, keys in zip(timestamps, outputs):
+        for k in keys - set(opened):
+            opened[k] = ts
+        for k in set(opened) - keys:
+            intervals.append((k, opened.pop(k), ts))
+    end = timestamps[-1] if len(timestamps) else 0.0
+    intervals.extend((k, start, end) for k, start in opened.items())
+    return sorted(intervals, key=lambda iv: iv[1])
+
+
+def load_labels(path):
+    """标注文件 (CSV)：每行 key,start,end，时间为录制时间戳 (秒，相对第一帧)；# 开头为注释
+
+    key: air 管线为 IR1 ~ IR6；ground 管线为键位下标 0 ~ 15 或 air
+    """
+    labels = []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0].lstrip().startswith('#'): continue
+            key, start, end = (c.strip() for c in row[:3])
+            labels.append((key, float(start), float(end)))
+    return labels
+
+
+def score(timestamps, outputs, labels, tolerance):
+    """逐帧 (TP / FP / FN) + 逐次按压 (命中、误触、按下 / 松开相对标注的延迟) 统计
+
+    输出区间与标注区间同键且有重叠 (按下最多提前 tolerance 秒) 即算命中；
+    按下延迟 = 第一个命中区间的按下时间 - 标注开始，负数 = 提前。
+    """
+    tp = fp = fn = 0
+    for ts, keys in zip(timestamps, outputs):
+        truth = {k for k, s, e in labels if s <= ts < e}
+        tp += len(keys & truth)
+        fp += len(keys - truth)
+        fn += len(truth - keys)
+
+    events = output_intervals(timestamps, outputs)
+    matched = set()
+    hits, onsets, releases = 0, [], []
+    for key, s, e in labels:
+        found = [i for i, (k, start, _) in enumerate(events) if k == key and s - tolerance <= start < e]
+        if not found: continue
+        hits += 1
+        matched.update(found)
+        onsets.append(events[found[0]][1] - s)
+        releases.append(max(events[i][2] for i in found) - e)
+    overlapping = {i for i, (k, start, end) in enumerate(events)
+                   for key, s, e in labels if k == key and start < e and end > s}
+    false = len(set(range(len(events))) - matched - overlapping)
+    return {'tp': tp, 'fp': fp, 'fn': fn, 'labels': len(labels), 'hits': hits, 'false': false,
+            'onsets': onsets, 'releases': releases}
+
+
+def run_evaluate(task):
+    """进程池任务：一组配置在所有录制文件上的结果 (计数相加、延迟合并)"""
+    index, pipeline, params, recordings, tolerance = task
+    total = {'tp': 0, 'fp': 0, 'fn': 0, 'labels': 0, 'hits': 0, 'false': 0, 'onsets': [], 'releases': []}
+    costs = []
+    for recording, labels in recordings:
+        timestamps, outputs, cost = replay(recording, pipeline, params)
+        for key, value in score(timestamps, outputs, labels, tolerance).items():
+            total[key] += value
+        costs.append(cost)
+    return index, total, float(np.mean(costs))
+
+
+def summarize(total, cost_ms):
+    precision = total['tp'] / (total['tp'] + total['fp']) if total['tp'] + total['fp'] else 0.0
+    recall = total['tp'] / (total['tp'] + total['fn']) if total['tp'] + total['fn'] else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    # + 0.0：-0.0 (刚好贴着标注按下) 显示成 0
+    onset = np.round(np.percentile(np.array(total['onsets']) * 1000, [50, 90]), 1) + 0.0 if total['onsets'] \
+        else (float('nan'),) * 2
+    release = float(np.median(total['releases'])) * 1000 if total['releases'] else float('nan')
+    return {'f1': f1, 'precision': precision, 'recall': recall, 'hits': total['hits'], 'labels': total['labels'],
+            'false': total['false'], 'onset_p50_ms': onset[0], 'onset_p90_ms': onset[1],
+            'release_p50_ms': release, 'cost_ms': cost_ms,
+            # 比标注晚了多少才按下 + 每帧处理耗时 = 这组参数相对 "理想判定" 增加的延迟
+            'latency_ms': (onset[0] if total['onsets'] else 0.0) + cost_ms}
+
+
+def mark_pareto(rows):
+    """准确率 (F1) 不低于它、延迟也不高于它的配置不存在时，这组配置在帕累托前沿上"""
+    for row in rows:
+        row['pareto'] = not any(o is not row and o['f1'] >= row['f1'] and o['latency_ms'] <= row['latency_ms']
+                                and (o['f1'] > row['f1'] or o['latency_ms'] < row['latency_ms']) for o in rows)
+
+
+# ==========================================
+#  参数空间
+# ==========================================
+def parse_values(text):
+    """'0.4,0.5,0.6' / 'diff,background' / 'None,(0.05,0.4,0.95,1.0)' / '0.3:0.7' (随机搜索的区间)"""
+    if ':' in text and '(' not in text:
+        lo, hi = (parse_overrides([f'v={v}'])['v'] for v in text.split(':', 1))
+        return ('range', lo, hi)
+    try:
+        values = ast.literal_eval(f'[{text}]')
+    except (ValueError, SyntaxError):
+        values = [parse_overrides([f'v={v}'])['v'] for v in text.split(',')]
+    return list(values)
+
+
+def build_space(pairs):
+    space = {}
+    for pair in pairs:
+        key, _, text = pair.partition('=')
+        space[key] = parse_values(text)
+    return space
+
+
+def grid_configs(space):
+    for key, values in space.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"网格搜索不支持区间 ({key})，请列出取值或改用 --random")
+    keys = list(space)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(space[k] for k in keys))]
+
+
+def random_configs(space, n, seed=None):
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                _, lo, hi = values
+                config[key] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) \
+                    else round(rng.uniform(lo, hi), 4)
+            else:
+                config[key] = rng.choice(values)
+        configs.append(config)
+    # 重复的配置只跑一次
+    unique = {json.dumps(c, sort_keys=True, default=str): c for c in configs}
+    return list(unique.values())
+
+
+def labels_path(recording):
+    return os.path.splitext(recording)[0] + '.labels.csv'
+
+
+def write_labels(path, intervals, min_duration=0.05):
+    with open(path, 'w', newline='') as f:
+        f.write("# key,start,end  (录制时间戳，秒) —— 由 tune.py --write-labels 生成，请手工修正\n")
+        writer = csv.writer(f)
+        for key, start, end in intervals:
+            if end - start >= min_duration:
+                writer.writerow([key, f'{start:.3f}', f'{end:.3f}'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在录制文件 + 标注的按压区间上并行搜索检测参数，输出准确率与增加的延迟")
+    parser.add_argument('recordings', nargs='+', help="录制文件 (.chrec)，标注默认读同名的 .labels.csv")
+    parser.add_argument('--pipeline', choices=sorted(PIPELINES), default='air')
+    parser.add_argument('--labels', help="标注文件 (只有一个录制文件时可用)")
+    parser.add_argument('--config', default='baseline', help="bench.py 里的命名配置作为基础参数")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help="覆盖基础参数")
+    parser.add_argument('--grid', action='append', default=[], metavar='KEY=V1,V2,...',
+                        help="要搜索的参数及取值 (可多次指定)；--random 时也可写区间 KEY=LO:HI")
+    parser.add_argument('--random', type=int, metavar='N', help="随机搜索 N 组，而不是完整网格")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--tolerance', type=float, default=0.1, help="按下最多提前多少秒仍算命中")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="进程数")
+    parser.add_argument('--top', type=int, default=20, help="输出前几名")
+    parser.add_argument('--csv', help="把全部结果写到 CSV")
+    parser.add_argument('--write-labels', action='store_true',
+                        help="用基础参数的输出生成初始标注 (不覆盖已有文件)，手工修正后再调参")
+    args = parser.parse_args()
+
+    if args.labels and len(args.recordings) > 1:
+        parser.error("--labels 只能配合单个录制文件使用")
+    if args.config not in CONFIGS[args.pipeline]:
+        parser.error(f"未知配置 '{args.config}'，可选: {', '.join(CONFIGS[args.pipeline])}")
+    base = dict(CONFIGS[args.pipeline][args.config], **parse_overrides(args.set))
+    space = build_space(args.grid)
+    try:
+        configs = random_configs(space, args.random, args.seed) if args.random else grid_configs(space)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.write_labels: configs = [{}]
+    configs = [dict(base, **c) for c in configs]
+
+    # 1. 缺的缓存：每组不同的模型参数跑一遍 MediaPipe，每组运动参数跑一遍帧差
+    tasks = {}
+    for recording in args.recordings:
+        for params in configs:
+            model, motion, post, _ = split_params(args.pipeline, params)
+            stages = [('landmarks', model)] if needs_landmarks(args.pipeline, post) else []
+            if args.pipeline == 'air': stages.append(('motion', motion))
+            for stage, stage_params in stages:
+                path = cache_path(recording, args.pipeline, stage, stage_params)
+                if path not in tasks and not os.path.exists(path):
+                    tasks[path] = (stage, recording, args.pipeline, stage_params, path)
+
+    ctx = mp.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=ctx) as pool:
+        if tasks:
+            print(f"📦 extracting {len(tasks)} cache entries ({sum(t[0] == 'landmarks' for t in tasks.values())} MediaPipe passes)...")
+            for stage, recording, seconds in pool.map(run_extract, tasks.values()):
+                print(f"   {stage:<9} {os.path.basename(recording)}  {seconds:6.1f} s")
+
+        if args.write_labels:
+            for recording in args.recordings:
+                path = args.labels or labels_path(recording)
+                if os.path.exists(path):
+                    print(f"⚠️  {path} 已存在，跳过")
+                    continue
+                timestamps, outputs, _ = replay(recording, args.pipeline, configs[0])
+                write_labels(path, output_intervals(timestamps, outputs))
+                print(f"✅ labels written to {path}")
+            return
+
+        recordings = [(r, load_labels(args.labels or labels_path(r))) for r in args.recordings]
+        # 2. 每组配置在缓存上重放判定逻辑 (不跑模型)，按组分给进程池
+        print(f"🔍 evaluating {len(configs)} configs on {len(recordings)} recordings ({args.jobs} processes)...")
+        tasks = [(i, args.pipeline, params, recordings, args.tolerance) for i, params in enumerate(configs)]
+        rows = [None] * len(configs)
+        chunksize = max(1, len(tasks) // (args.jobs * 4))
+        for index, total, cost_ms in pool.map(run_evaluate, tasks, chunksize=chunksize):
+            rows[index] = dict(summarize(total, cost_ms), params={k: configs[index][k] for k in space})
+
+    mark_pareto(rows)
+    rows.sort(key=lambda r: (-r['f1'], r['latency_ms']))
+    print(f"\n{'':1} {'f1':>5} {'recall':>6} {'prec':>5} {'hits':>9} {'false':>5} {'onset p50':>9} {'p90':>6} "
+          f"{'release':>7} {'cost ms':>7} {'latency':>7}  params")
+    print("-" * 100)
+    for row in rows[:args.top]:
+        print(f"{'*' if row['pareto'] else ' '} {row['f1']:5.3f} {row['recall']:6.3f} {row['precision']:5.3f} "
+              f"{row['hits']:>4}/{row['labels']:<4} {row['false']:>5} {row['onset_p50_ms']:9.0f} {row['onset_p90_ms']:6.0f} "
+              f"{row['release_p50_ms']:7.0f} {row['cost_ms']:7.2f} {row['latency_ms']:7.0f}  "
+              + ' '.join(f'{k}={v}' for k, v in row['params'].items()))
+    print("(* = 帕累托前沿：没有其他配置同时更准、更快；latency = 按下延迟 p50 + 每帧处理耗时)")
+
+    if args.csv:
+        fields = [k for k in rows[0] if k != 'params'] + list(space)
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(dict({k: v for k, v in row.items() if k != 'params'}, **row['params']))
+        print(f"📝 {len(rows)} results written to {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,547 @@
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from metrics import NULL_TIMER
+from motion import make_motion_engine
+from prediction import LatencyPredictor
+from preprocess import BufferPool
+
+mp_hands = mp.solutions.hands
+mp_drawing = mp.solutions.drawing_utils
+
+WRIST = 0
+
+# 默认手指阈值 (与 main.py 一致)：指尖 landmark id -> 阈值
+DEFAULT_FINGER_CONFIG = {
+    8:  {'name': 'Index',  'threshold': 0.75},
+    12: {'name': 'Middle', 'threshold': 0.78},
+    16: {'name': 'Ring',   'threshold': 0.75}
+}
+
+
+# --- 下半屏 6 等分逻辑 ---
+def get_ir_level(y_pos, air_top=0.5, air_bottom=1.0):
+    # y_pos: 0.0 (顶) ~ 1.0 (底)
+
+    # 1. 如果手太高 (超过中线)，视为未触发
+    if y_pos < air_top: return 0
+    # 2. 如果手太低 (低于底线)，视为 IR1 (修正误差)
+    if y_pos > air_bottom: return 1
+
+    # 3. 计算有效区域高度 (默认 0.5)
+    valid_height = air_bottom - air_top
+
+    # 4. 计算手距离底部的距离 (距离底部越远，IR等级越高)
+    distance_up = air_bottom - y_pos
+
+    # 5. 映射到 1-6 (+1 是因为 int 向下取整)
+    level = int((distance_up / valid_height) * 6) + 1
+
+    return max(1, min(6, level))
+
+
+class InferenceCrop:
+    """把 MediaPipe 的输入裁剪 / 缩小成子图，再把关键点映射回全图归一化坐标
+
+    roi: (x_min, y_min, x_max, y_max) 全图归一化坐标，None = 不裁剪
+    scale: 子图缩放比例，1.0 = 不缩放 (缩放不影响归一化坐标，无需映射)
+    """
+
+    def __init__(self, roi=None, scale=1.0):
+        self.roi = roi
+        self.scale = scale
+        self.pool = BufferPool()
+        self._box = None   # (x0, y0, cw, ch, w, h)，最近一次 prepare 的裁剪框 (像素)
+
+    def prepare(self, image):
+        """返回送入 hands.process 的 RGB 子图 (预分配缓冲区，下一次 prepare 前有效)"""
+        sub = image
+        self._box = None
+        if self.roi is not None:
+            h, w = image.shape[:2]
+            x0, y0 = int(self.roi[0] * w), int(self.roi[1] * h)
+            x1, y1 = int(self.roi[2] * w), int(self.roi[3] * h)
+            sub = image[y0:y1, x0:x1]
+            self._box = (x0, y0, x1 - x0, y1 - y0, w, h)
+        if self.scale != 1.0:
+            ch, cw = sub.shape[:2]
+            size = (max(1, int(cw * self.scale)), max(1, int(ch * self.scale)))
+            resized = self.pool.get('resized', (size[1], size[0]) + sub.shape[2:])
+            sub = cv2.resize(sub, size, dst=resized, interpolation=cv2.INTER_AREA)
+        # 先缩小再转 RGB，转换的像素更少
+        rgb = self.pool.get('rgb', sub.shape)
+        return cv2.cvtColor(sub, cv2.COLOR_BGR2RGB, dst=rgb)
+
+    def remap(self, multi_hand_landmarks):
+        """原地把子图归一化坐标换算成全图归一化坐标，之后的判定逻辑无需改动"""
+        if self._box is None or not multi_hand_landmarks:
+            return
+        x0, y0, cw, ch, w, h = self._box
+        sx, sy = cw / w, ch / h
+        ox, oy = x0 / w, y0 / h
+        for hand_landmarks in multi_hand_landmarks:
+            for lm in hand_landmarks.landmark:
+                lm.x = ox + lm.x * sx
+                lm.y = oy + lm.y * sy
+                # z 与 x 同尺度 (以图像宽度为单位)
+                lm.z = lm.z * sx
+
+
+class LKHandTracker:
+    """关键帧之间用金字塔 Lucas-Kanade 光流跟踪 21 个手部关键点
+
+    关键帧 (MediaPipe 完整检测) 之后，每帧只在每个关键点周围的小窗口里算光流，
+    并做前向-后向一致性检查。跟踪成功的点比例就是置信度，低于 min_confidence
+    或距离上一个关键帧满 keyframe_interval 帧时，要求重新做完整检测。
+    """
+
+    def __init__(self, keyframe_interval=4, min_confidence=0.6, win_size=15, max_level=2, fb_threshold=1.5):
+        self.keyframe_interval = keyframe_interval
+        self.min_confidence = min_confidence
+        self.fb_threshold = fb_threshold
+        self.lk_params = dict(winSize=(win_size, win_size), maxLevel=max_level,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.pool = BufferPool()
+        self.prev_gray = None     # 上一帧灰度图的私有拷贝 (调用方的缓冲区会被复用)
+        self.points = None        # (N*21, 1, 2) 像素坐标
+        self.hands = []           # 关键帧的 landmark 列表 (跟踪时复制后改写 x/y)
+        self.frames_since_keyframe = 0
+        self.confidence = 0.0
+
+    def _keep(self, gray):
+        # 两块缓冲区轮换：track() 时 prev_gray 仍在使用，不能直接覆盖
+        name = 'prev_b' if self.prev_gray is self.pool.get('prev_a', gray.shape) else 'prev_a'
+        buf = self.pool.get(name, gray.shape)
+        np.copyto(buf, gray)
+        self.prev_gray = buf
+
+    def reset(self, gray, multi_hand_landmarks):
+        h, w = gray.shape[:2]
+        self._keep(gray)
+        self.hands = list(multi_hand_landmarks)
+        self.frames_since_keyframe = 0
+        self.confidence = 1.0 if self.hands else 0.0
+        self.points = np.array([[lm.x * w, lm.y * h] for hl in self.hands for lm in hl.landmark],
+                               dtype=np.float32).reshape(-1, 1, 2)
+
+    def needs_keyframe(self):
+        return (self.prev_gray is None or not self.hands
+                or self.frames_since_keyframe >= self.keyframe_interval
+                or self.confidence < self.min_confidence)
+
+    def track(self, gray):
+        """返回跟踪后的 landmark 列表；置信度不足时返回 None，调用方应立即做完整检测"""
+        p1, st1, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.points, None, **self.lk_params)
+        p0r, st2, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, p1, None, **self.lk_params)
+        fb_error = np.abs(self.points - p0r).reshape(-1, 2).max(axis=1)
+        good = (st1.ravel() == 1) & (st2.ravel() == 1) & (fb_error < self.fb_threshold)
+
+        # 每只手取跟踪成功的点比例，以最差的那只手作为整体置信度
+        self.confidence = float(good.reshape(len(self.hands), -1).mean(axis=1).min())
+        if self.confidence < self.min_confidence:
+            return None
+
+        # 丢失的点停在原位
+        self.points = np.where(good.reshape(-1, 1, 1), p1, self.points)
+        self._keep(gray)
+        self.frames_since_keyframe += 1
+
+        h, w = gray.shape[:2]
+        tracked = []
+        flat = self.points.reshape(-1, 2)
+        for i, hl in enumerate(self.hands):
+            # 每帧输出新对象，避免预览线程拿到的结果被下一帧改写
+            copy = landmark_pb2.NormalizedLandmarkList()
+            copy.CopyFrom(hl)
+            for j, lm in enumerate(copy.landmark):
+                x, y = flat[i * len(hl.landmark) + j]
+                lm.x, lm.y = float(x) / w, float(y) / h
+            tracked.append(copy)
+        return tracked
+
+
+class HandLandmarker:
+    """MediaPipe Hands 封装：推理裁剪 (InferenceCrop) + 可选的光流跟踪 (LKHandTracker)
+
+    track_interval > 0 时每 track_interval 帧 (或跟踪置信度不足时) 才跑一次模型，
+    中间的帧用光流跟踪关键点，判定逻辑照常在相机帧率下运行。
+    """
+
+    def __init__(self, max_num_hands=2, model_complexity=0,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 infer_roi=None, infer_scale=1.0, track_interval=0, track_min_confidence=0.6):
+        self.hands_params = dict(max_num_hands=max_num_hands, model_complexity=model_complexity,
+                                 min_detection_confidence=min_detection_confidence,
+                                 min_tracking_confidence=min_tracking_confidence)
+        self.hands = mp_hands.Hands(**self.hands_params)
+        self.crop = InferenceCrop(infer_roi, infer_scale)
+        self.pool = BufferPool()
+        self.tracker = LKHandTracker(track_interval, track_min_confidence) if track_interval > 0 else None
+        self.cost = 0.0    # hands.process 耗时的指数平均 (秒)
+        self.last_source = None
+        self.stats = {'hands_runs': 0, 'hands_tracked': 0}
+
+    def close(self):
+        self.hands.close()
+
+    def set_max_num_hands(self, max_num_hands):
+        """MediaPipe 不能在运行中改手数，只能重建模型 (一次几十毫秒)"""
+        if max_num_hands == self.hands_params['max_num_hands']:
+            return
+        self.hands.close()
+        self.hands_params['max_num_hands'] = max_num_hands
+        self.hands = mp_hands.Hands(**self.hands_params)
+        if self.tracker is not None:
+            self.tracker.hands = []   # 下一帧强制重新检测
+
+    def process(self, image, gray=None):
+        """返回全图归一化坐标下的 multi_hand_landmarks (没有手时为空列表)
+
+        gray: 可选的整帧灰度图 (FramePreprocessor.gray())，开启跟踪时复用，省一次转换
+        """
+        if self.tracker is not None:
+            if gray is None:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self.pool.get('gray', image.shape[:2]))
+            if not self.tracker.needs_keyframe():
+                tracked = self.tracker.track(gray)
+                if tracked is not None:
+                    self.stats['hands_tracked'] += 1
+                    self.last_source = 'flow'
+                    return tracked
+
+        start = time.perf_counter()
+        results = self.hands.process(self.crop.prepare(image))
+        landmarks = results.multi_hand_landmarks or []
+        self.crop.remap(landmarks)
+        elapsed = time.perf_counter() - start
+        self.cost = elapsed if not self.cost else self.cost * 0.9 + elapsed * 0.1
+        self.stats['hands_runs'] += 1
+        self.last_source = 'model'
+
+        if self.tracker is not None:
+            self.tracker.reset(gray, landmarks)
+        return landmarks
+
+
+class AirResult:
+    """单帧 Air 检测结果 (坐标均为全图归一化坐标)"""
+
+    def __init__(self):
+        self.level = 0
+        self.final_y = -1
+        self.raw_y = -1            # 滤波 / 预测之前的融合 Y
+        self.hand_y = -1
+        self.motion_y = -1
+        self.motion_point = None   # 运动重心 (像素坐标)，仅用于绘制
+        self.motion_box = None     # 运动区域外接框 (x, y, w, h 像素坐标)，仅背景模型引擎有
+        self.wrists = []           # 判定范围内的手腕 (x, y)
+        self.hand_landmarks = []
+        self.gated = False         # True = 本帧跳过了 MediaPipe，手腕结果沿用上一次
+
+
+class AirDetector:
+    """webb.py 的 Air 检测：运动重心 + MediaPipe 手腕高度融合
+
+    motion_engine 选择运动检测算法 (motion.py)：'diff' 为原版全分辨率帧差，
+    'background' 为金字塔降采样 + 背景模型，取最高的运动区域；motion_params 传给引擎构造函数。
+    motion_only=True 时完全不加载 MediaPipe，只用运动检测 (低配机器 / 基准测试)。
+
+    motion_gate=True 时用帧差做门控：画面静止就跳过 hands.process，沿用上一次的手腕结果
+    (即保持上一次的 IR 等级)，但最多沿用 gate_keepalive 秒，到期强制重跑一次模型确认。
+
+    predict_filter 不为 None 时，融合后的 Y 先经过滤波 (prediction.py)，再按管线延迟向前外推。
+
+    landmarker: 现成的 HandLandmarker 兼容对象 (例如 tune.py 回放缓存的关键点)，给出时不加载 MediaPipe。
+    """
+
+    def __init__(self, air_top=0.5, air_bottom=1.0, roi_x_min=0.05, roi_x_max=0.95,
+                 motion_sensitivity=25, motion_area_min=500,
+                 motion_engine='diff', motion_params=None, motion_only=False,
+                 max_num_hands=2, model_complexity=0,
+                 min_detection_confidence=0.3, min_tracking_confidence=0.3,
+                 infer_roi=None, infer_scale=1.0,
+                 motion_gate=False, gate_keepalive=0.25,
+                 track_interval=0, track_min_confidence=0.6,
+                 predict_filter=None, predict_horizon=None, predict_extra=0.0, predict_params=None,
+                 landmarker=None):
+        self.air_top = air_top
+        self.air_bottom = air_bottom
+        self.roi_x_min = roi_x_min
+        self.roi_x_max = roi_x_max
+        # 帧差引擎的 area_min 是 moments 的 m00 (255 x 像素数)，背景模型引擎的是像素数，所以只给帧差传
+        engine_params = {'sensitivity': motion_sensitivity}
+        if motion_engine == 'diff': engine_params['area_min'] = motion_area_min
+        engine_params.update(motion_params or {})
+        self.motion = make_motion_engine(motion_engine, **engine_params)
+        self.motion_only = motion_only
+        self.landmarker = landmarker
+        if landmarker is None and not motion_only:
+            self.landmarker = HandLandmarker(max_num_hands, model_complexity,
+                                             min_detection_confidence, min_tracking_confidence,
+                                             infer_roi, infer_scale, track_interval, track_min_confidence)
+        self.pool = BufferPool()
+        self.timer = NULL_TIMER
+
+        self.motion_gate = motion_gate
+        self.gate_keepalive = gate_keepalive
+        self._last_hands = None       # 上一次手部检测的结果 (hand_y, wrists, hand_landmarks)
+        self._last_hands_time = 0.0
+        self.stats = self.landmarker.stats if self.landmarker else {'hands_runs': 0, 'hands_tracked': 0}
+        self.stats.update(hands_gated=0, hands_saved_ms=0.0)
+
+        self.predictor = None
+        if predict_filter is not None:
+            self.predictor = LatencyPredictor(predict_filter, predict_horizon, predict_extra, **(predict_params or {}))
+        # process() 按 perf_counter - timestamp 自动测 "采集 -> 判定" 延迟 (自动外推时长用)；
+        # 离线回放传的是录制时间戳 (不同时钟)，调用方设为 False，自己调用 predictor.observe_latency
+        self.measure_latency = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.landmarker: self.landmarker.close()
+
+    def detect_motion(self, image, result, gray=None):
+        h, w = image.shape[:2]
+        mid_y = int(h * self.air_top)
+
+        # 只检测下半屏 (mid_y 到 h)；有整帧灰度图时直接取视图，不再转换
+        if gray is not None:
+            gray = gray[mid_y:h, 0:w]
+        else:
+            gray = cv2.cvtColor(image[mid_y:h, 0:w], cv2.COLOR_BGR2GRAY, dst=self.pool.get('gray', (h - mid_y, w)))
+        blob = self.motion.detect(gray, self.timer)
+        if blob is not None:
+            # 引擎返回的是相对判定区的坐标，转换回全图坐标 (加上 mid_y 偏移)
+            cy_global = blob.cy + mid_y
+            result.motion_y = cy_global / h
+            result.motion_point = (blob.cx, cy_global)
+            if blob.box is not None:
+                x, y, bw, bh = blob.box
+                result.motion_box = (x, y + mid_y, bw, bh)
+        self.timer.lap('motion')
+
+    def should_run_hands(self, result, now):
+        """now: 这一帧的时间 (采集时间戳)，离线回放时按录制时间算保持时长，而不是按跑得多快"""
+        if not self.motion_gate or self._last_hands is None:
+            return True
+        if result.motion_y != -1:
+            return True
+        elapsed = now - self._last_hands_time
+        # 回放循环到开头时时间戳会倒退
+        return elapsed >= self.gate_keepalive or elapsed < 0
+
+    def set_quality(self, infer_scale=None, max_num_hands=None, motion_only=None):
+        """运行中调整画质 (QualityGovernor)：推理子图缩放、最多检测几只手、是否只用运动检测"""
+        if self.landmarker is None:
+            return
+        if infer_scale is not None: self.landmarker.crop.scale = infer_scale
+        if max_num_hands is not None: self.landmarker.set_max_num_hands(max_num_hands)
+        if motion_only is not None: self.motion_only = motion_only
+        # 切换前的手部结果不再可信，门控不能沿用
+        self._last_hands = None
+
+    def detect_hands(self, image, result, gray=None, now=None):
+        if self.landmarker is None or self.motion_only:
+            return
+        if now is None: now = time.perf_counter()
+        if not self.should_run_hands(result, now):
+            result.hand_y, result.wrists, result.hand_landmarks = self._last_hands
+            result.gated = True
+            self.stats['hands_gated'] += 1
+            self.stats['hands_saved_ms'] += self.landmarker.cost * 1000
+            self.timer.lap('hands')
+            return
+
+        multi_hand_landmarks = self.landmarker.process(image, gray)
+        self._last_hands_time = now
+        self.timer.lap('hands')
+
+        if multi_hand_landmarks:
+            result.hand_landmarks = multi_hand_landmarks
+            min_y = 1.0  # 找最高的手 (Y值最小)
+            found = False
+            for hl in multi_hand_landmarks:
+                wrist = hl.landmark[WRIST]
+                # 必须在 X 范围内，且在判定区内
+                if self.roi_x_min < wrist.x < self.roi_x_max and wrist.y > self.air_top:
+                    if wrist.y < min_y:
+                        min_y = wrist.y
+                        found = True
+                    result.wrists.append((wrist.x, wrist.y))
+            if found: result.hand_y = min_y
+        self._last_hands = (result.hand_y, result.wrists, result.hand_landmarks)
+
+    def process(self, image, timestamp=None, gray=None):
+        """timestamp: 这一帧的采集时间 (perf_counter 时钟)，用于滤波的 dt 和自动测量延迟
+        gray: 可选的整帧灰度图 (FramePreprocessor.gray())，运动检测和光流跟踪共用
+        """
+        result = AirResult()
+        self.detect_motion(image, result, gray)
+        self.detect_hands(image, result, gray, timestamp)
+
+        # 融合判定：优先手腕，其次运动重心
+        if result.hand_y != -1: result.raw_y = result.hand_y
+        elif result.motion_y != -1: result.raw_y = result.motion_y
+        result.final_y = result.raw_y
+
+        if self.predictor is not None:
+            now = time.perf_counter()
+            result.final_y = self.predictor.update(result.raw_y, timestamp if timestamp is not None else now)
+            if result.final_y != -1: result.final_y = min(1.0, max(0.0, result.final_y))
+            if timestamp is not None and self.measure_latency: self.predictor.observe_latency(now - timestamp)
+
+        if result.final_y != -1:
+            result.level = get_ir_level(result.final_y, self.air_top, self.air_bottom)
+        return result
+
+
+def draw_air_overlay(image, result, air_top=0.5):
+    h, w = image.shape[:2]
+    mid_y = int(h * air_top)
+
+    if result.motion_box is not None:
+        x, y, bw, bh = result.motion_box
+        cv2.rectangle(image, (x, y), (x + bw, y + bh), (255, 0, 0), 1)
+    if result.motion_point is not None:
+        cv2.circle(image, result.motion_point, 20, (255, 0, 0), 2)
+    for x, y in result.wrists:
+        cv2.circle(image, (int(x * w), int(y * h)), 15, (0, 255, 0), -1)
+
+    # 计算每层的高度 (像素)
+    segment_px = (h - mid_y) / 6
+
+    # 画顶部分界线 (蓝线)
+    cv2.line(image, (0, mid_y), (w, mid_y), (255, 0, 0), 2)
+    cv2.putText(image, f"AIR LIMIT ({int(air_top * 100)}%)", (10, mid_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
+
+    for i in range(1, 7):
+        # IR1 在最底下，IR6 在最上面(mid_y附近)
+        level_top_y = int(h - (i * segment_px))
+
+        color = (0, 255, 255) if i == result.level else (50, 50, 50)
+        thickness = 2 if i == result.level else 1
+
+        cv2.line(image, (0, level_top_y), (w, level_top_y), color, thickness)
+        # 文字画在线上方
+        cv2.putText(image, f"IR{i}", (10, level_top_y + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+
+
+class GroundResult:
+    """单帧地面检测结果 (坐标均为全图归一化坐标)"""
+
+    def __init__(self):
+        self.keys = set()
+        self.air = False
+        self.air_points = []       # 触发 Air 的手腕 (x, y)
+        self.tips = []             # 按下的指尖 (x, y, in_range)
+        self.hand_landmarks = []
+
+
+class GroundDetector:
+    """main.py 的地面检测：指尖低于阈值线即按下，按 ROI 内的 X 坐标映射到 16 键
+
+    landmarker: 同 AirDetector，给出时不加载 MediaPipe
+    """
+
+    def __init__(self, finger_config=None, roi_x_min=0.25, roi_x_max=0.75, air_threshold=0.60,
+                 slider_keys=16, max_num_hands=2, model_complexity=0,
+                 min_detection_confidence=0.7, min_tracking_confidence=0.8,
+                 infer_roi=None, infer_scale=1.0, track_interval=0, track_min_confidence=0.6,
+                 landmarker=None):
+        self.finger_config = finger_config or DEFAULT_FINGER_CONFIG
+        self.roi_x_min = roi_x_min
+        self.roi_x_max = roi_x_max
+        self.air_threshold = air_threshold
+        self.slider_keys = slider_keys
+        self.landmarker = landmarker or HandLandmarker(max_num_hands, model_complexity,
+                                                       min_detection_confidence, min_tracking_confidence,
+                                                       infer_roi, infer_scale, track_interval, track_min_confidence)
+        self.stats = self.landmarker.stats
+        self.timer = NULL_TIMER
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.landmarker.close()
+
+    def process(self, image, timestamp=None, gray=None):
+        result = GroundResult()
+
+        multi_hand_landmarks = self.landmarker.process(image, gray)
+        self.timer.lap('hands')
+
+        if not multi_hand_landmarks:
+            return result
+
+        result.hand_landmarks = multi_hand_landmarks
+        for hand_landmarks in multi_hand_landmarks:
+            # Air 判定 (全屏有效，不受 ROI 限制)
+            wrist = hand_landmarks.landmark[WRIST]
+            if wrist.y < self.air_threshold:
+                result.air = True
+                result.air_points.append((wrist.x, wrist.y))
+
+            # Ground 判定 (必须在 ROI 范围内)
+            for tip_id, config in self.finger_config.items():
+                tip = hand_landmarks.landmark[tip_id]
+                pip = hand_landmarks.landmark[tip_id - 2]
+
+                # 基础判定：低于阈值 + 手指伸直
+                is_pressing = tip.y > config['threshold'] and tip.y > pip.y + 0.02
+                if not is_pressing:
+                    continue
+
+                in_range = self.roi_x_min < tip.x < self.roi_x_max
+                result.tips.append((tip.x, tip.y, in_range))
+                if in_range:
+                    # 归一化计算：把 (ROI_MIN ~ ROI_MAX) 映射到 (0 ~ 1)
+                    normalized_x = (tip.x - self.roi_x_min) / (self.roi_x_max - self.roi_x_min)
+                    key_index = int(normalized_x * self.slider_keys)
+                    result.keys.add(max(0, min(key_index, self.slider_keys - 1)))
+        return result
+
+
+def draw_ground_overlay(image, result, detector):
+    h, w = image.shape[:2]
+
+    # (A) ROI 左右边界线 (蓝色粗线) - 手必须在这个范围内才有效
+    roi_left_px = int(w * detector.roi_x_min)
+    roi_right_px = int(w * detector.roi_x_max)
+    cv2.line(image, (roi_left_px, 0), (roi_left_px, h), (255, 0, 0), 3)
+    cv2.line(image, (roi_right_px, 0), (roi_right_px, h), (255, 0, 0), 3)
+
+    # (B) 触摸阈值线 (绿色)
+    base_thresh = next(iter(detector.finger_config.values()))['threshold']
+    cv2.line(image, (0, int(h * base_thresh)), (w, int(h * base_thresh)), (0, 255, 0), 2)
+
+    # (C) 键位分割线 (只在 ROI 范围内画，比例相对于 ROI)
+    roi_width = roi_right_px - roi_left_px
+    for i in range(1, detector.slider_keys):
+        x_pos = roi_left_px + int(roi_width * (i / detector.slider_keys))
+        cv2.line(image, (x_pos, int(h * base_thresh)), (x_pos, h), (0, 255, 255), 1)
+
+    for hand_landmarks in result.hand_landmarks:
+        mp_drawing.draw_landmarks(image, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+
+    for x, y in result.air_points:
+        cv2.putText(image, "AIR!", (int(x * w), int(y * h) - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+
+    for x, y, in_range in result.tips:
+        if in_range:
+            cv2.circle(image, (int(x * w), int(y * h)), 15, (0, 255, 0), -1)
+        else:
+            # 虽然按下了，但在范围外 -> 画灰色点提示
+            cv2.circle(image, (int(x * w), int(y * h)), 10, (100, 100, 100), -1)
@@ -0,0 +1,284 @@
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# ==========================================
+#  视觉进程 -> 输入进程的共享内存结果块
+# ==========================================
+# 一个定长记录，视觉进程每处理完一帧覆盖写一次，读方只关心最新一帧。
+# seqlock：写之前 seq 变成奇数，写完变成偶数；读方读到奇数或前后 seq 不一致就重读，
+# 不需要跨进程锁，写方永远不会被读方阻塞。
+# 时间字段都是 perf_counter 时钟 (Windows QPC / Linux CLOCK_MONOTONIC，跨进程可直接相减)。
+MAX_HANDS = 2
+NUM_LANDMARKS = 21
+
+RESULT_DTYPE = np.dtype([
+    ('seq', '<u4'),
+    ('frame_id', '<u4'),
+    ('timestamp', '<f8'),        # 这一帧的采集时间
+    ('published', '<f8'),        # 结果写入时间
+    ('frame_ms', '<f4'),         # 读到帧 -> 结果写入的处理耗时
+    ('level', 'i1'),             # IR 等级 0-6 (未经防抖)
+    ('gated', 'u1'),
+    ('num_hands', 'u1'),
+    ('num_wrists', 'u1'),
+    ('final_y', '<f4'),
+    ('raw_y', '<f4'),
+    ('hand_y', '<f4'),
+    ('motion_y', '<f4'),
+    ('keys', '<u4'),             # 地面检测按下的键位掩码，bit i = 从左数第 i 个键
+    ('air', 'u1'),               # 地面检测的抬手 Air
+    ('wrists', '<f4', (MAX_HANDS, 2)),
+    ('landmarks', '<f4', (MAX_HANDS, NUM_LANDMARKS, 3)),
+    ('frames_captured', '<u4'),
+    ('frames_dropped', '<u4'),
+    ('hands_runs', '<u4'),
+    ('quality_level', 'u1'),     # QualityGovernor 当前等级 (0 = 完整画质)
+])
+
+
+class VisionResultBlock:
+    """共享内存里的单条视觉结果 (RESULT_DTYPE)
+
+    create=True 由视觉进程 (写方) 创建，读方用同一个 name 打开；close() 只解除映射，
+    unlink() 由创建方在最后调用一次。
+    """
+
+    def __init__(self, name=None, create=False):
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=RESULT_DTYPE.itemsize)
+        self.name = self.shm.name
+        self._record = np.ndarray((), dtype=RESULT_DTYPE, buffer=self.shm.buf)
+        if create:
+            self._record.fill(0)
+
+    def write(self, result, frame_id=0, timestamp=0.0, frame_ms=0.0, stats=None):
+        """result: AirResult 或 GroundResult；stats: 采集 / 检测计数 (frames_captured, frames_dropped, hands_runs)"""
+        r = self._record
+        seq = int(r['seq'])
+        r['seq'] = seq + 1
+        r['frame_id'] = frame_id
+        r['timestamp'] = timestamp
+        r['frame_ms'] = frame_ms
+        if hasattr(result, 'keys'):
+            mask = 0
+            for k in result.keys: mask |= 1 << k
+            r['keys'] = mask
+            r['air'] = result.air
+            wrists = result.air_points[:MAX_HANDS]
+        else:
+            r['level'] = result.level
+            r['gated'] = result.gated
+            r['final_y'] = result.final_y
+            r['raw_y'] = result.raw_y
+            r['hand_y'] = result.hand_y
+            r['motion_y'] = result.motion_y
+            wrists = result.wrists[:MAX_HANDS]
+        r['num_wrists'] = len(wrists)
+        for i, xy in enumerate(wrists):
+            r['wrists'][i] = xy
+        hands = result.hand_landmarks[:MAX_HANDS]
+        r['num_hands'] = len(hands)
+        for i, hl in enumerate(hands):
+            r['landmarks'][i] = [(p.x, p.y, p.z) for p in hl.landmark]
+        for key, value in (stats or {}).items():
+            r[key] = value
+        r['published'] = time.perf_counter()
+        r['seq'] = seq + 2
+
+    def read(self, retries=100):
+        """返回最新结果的拷贝 (numpy 记录，按字段名取值)；还没有任何结果时返回 None"""
+        r = self._record
+        for _ in range(retries):
+            seq = int(r['seq'])
+            if seq & 1:
+                continue
+            snapshot = r.copy()
+            if int(r['seq']) == seq:
+                return snapshot if seq else None
+        return None
+
+    def close(self):
+        self._record = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def open_capture(camera_index=0, width=640, height=480, replay_path=None, use_thread=True, ring_size=3, use_cache=True,
+                 synthetic=None, rotate=None, mirror=False):
+    """synthetic: 合成画面 (synthetic.open_synthetic 的 spec)；rotate / mirror 只用于合成画面 (按管线的预处理反向渲染)"""
+    import cv2
+    from capture import FrameGrabber
+    from find_cameras import apply_mode, best_mode
+    from recording import ReplayCapture
+
+    if replay_path:
+        cap = ReplayCapture(replay_path, realtime=True, loop=True)
+    elif synthetic:
+        from synthetic import open_synthetic
+        cap = open_synthetic(synthetic, width, height, rotate, mirror)
+    else:
+        cap = cv2.VideoCapture(camera_index)
+        mode = best_mode(camera_index, width, height, cap=cap) if use_cache else None
+        apply_mode(cap, mode or {'width': width, 'height': height})
+    if use_thread:
+        cap = FrameGrabber(cap, ring_size).start()
+    return cap
+
+
+def run_vision_worker(block_name, ready, stop, kind='air', capture=None, detector=None, rotate=None, mirror=False,
+                      record_path=None, show_window=False, window_name=None, quality_target_ms=None):
+    """视觉进程入口：采集 + 预处理 + 检测，每帧结果写进共享内存并 ready.release()
+
+    kind: 'air' = AirDetector (webb.py 的手腕高度)，'ground' = GroundDetector (main.py 的指尖按键)
+    capture / detector 是 open_capture / 检测器的参数字典 (spawn 启动，参数必须可 pickle)。
+    stop.value 非 0 时退出；show_window=True 时在这个进程里画标注并显示预览窗口，按 ESC 结束 (同时置位 stop)。
+    quality_target_ms: 'air' 检测的自适应画质目标 (QualityGovernor)，None = 关闭
+    """
+    import cv2
+    from preprocess import FramePreprocessor
+    from recording import FrameRecorder
+    from governor import QualityGovernor, default_levels
+    from startup import ArmGate, run_parallel, warm_up
+
+    if kind not in ('air', 'ground'):
+        raise ValueError(f"未知的检测类型 '{kind}'，可选: air, ground")
+    block = VisionResultBlock(block_name)
+    capture = capture or {}
+    preprocessor = FramePreprocessor(rotate, mirror)
+
+    def load_detector():
+        from vision import AirDetector, GroundDetector
+        det = (AirDetector if kind == 'air' else GroundDetector)(**(detector or {}))
+        if det.landmarker is None:
+            return det, None
+        dummy = np.zeros((capture.get('height', 480), capture.get('width', 640), 3), np.uint8)
+        return det, warm_up(det.landmarker, preprocessor.process(dummy))[1]
+
+    # 打开摄像头 和 加载 + 预热模型 并行；处理耗时回到稳态之前不发布结果 (ArmGate)
+    loaded = run_parallel(camera=lambda: open_capture(rotate=rotate, mirror=mirror, **capture), model=load_detector)
+    cap = loaded['camera']
+    det, steady_ms = loaded['model']
+    arm_gate = ArmGate(steady_ms) if steady_ms else None
+    from vision import draw_air_overlay, draw_ground_overlay
+    recorder = FrameRecorder(record_path) if record_path else None
+    window_name = window_name or f"Chuni {kind} camera {capture.get('camera_index', 0)}"
+    threaded = capture.get('use_thread', True)
+    stats = {}
+
+    # 主进程被 os._exit / 强制结束时不会通知子进程，每帧检查一次父进程还在不在
+    parent = mp.parent_process()
+
+    with det:
+        governor = None
+        if kind == 'air' and quality_target_ms:
+            params = detector or {}
+            governor = QualityGovernor(det.set_quality, quality_target_ms,
+                                       default_levels(params.get('infer_scale', 1.0), params.get('max_num_hands', 2)))
+        while cap.isOpened() and not stop.value and parent.is_alive():
+            start = time.perf_counter()
+            success, image = cap.read()
+            if not success:
+                time.sleep(0.01)
+                continue
+            work_start = time.perf_counter()
+            timestamp = getattr(cap, 'timestamp', None)
+            if recorder is not None:
+                recorder.write(image, timestamp)
+            image = preprocessor.process(image)
+            result = det.process(image, timestamp, preprocessor.gray())
+
+            if governor is not None:
+                governor.update(time.perf_counter() - work_start)
+                stats['quality_level'] = governor.level
+            if arm_gate is not None and not arm_gate.update(time.perf_counter() - work_start):
+                continue
+            stats['hands_runs'] = det.stats['hands_runs']
+            if threaded:
+                stats['frames_captured'] = cap.frames_captured
+                stats['frames_dropped'] = cap.frames_dropped
+            block.write(result, getattr(cap, 'frame_id', 0), timestamp or start,
+                        (time.perf_counter() - work_start) * 1000, stats)
+            ready.release()
+
+            if show_window:
+                if kind == 'air': draw_air_overlay(image, result, det.air_top)
+                else: draw_ground_overlay(image, result, det)
+                cv2.imshow(window_name, image)
+                if cv2.waitKey(1) & 0xFF == 27:
+                    stop.value = 1
+
+    if recorder is not None:
+        recorder.close()
+        print(f"🔴 {recorder.frames_written} frames recorded to {record_path}")
+    cap.release()
+    if show_window: cv2.destroyAllWindows()
+    block.close()
+
+
+class VisionProcess:
+    """在独立进程里跑视觉管线，主进程通过共享内存读结果
+
+    MediaPipe / OpenCV 的 Python 部分不再和 Flask / Socket.IO 抢 GIL，多核机器上触摸延迟
+    与视觉负载无关。wait() 阻塞到有新结果 (或超时)，poll() 不阻塞；两者都只返回最新一帧，
+    消费慢时中间的结果被覆盖，不会积压。
+    """
+
+    def __init__(self, kind='air', ready=None, **kwargs):
+        """kwargs 原样传给 run_vision_worker；ready 可以传入多个进程共用的信号量 (CameraFusion)"""
+        # spawn：Windows 只支持 spawn；Linux 上也避免 fork 带着 Flask / 线程 / 摄像头句柄进子进程
+        ctx = mp.get_context('spawn')
+        self.kind = kind
+        self.block = VisionResultBlock(create=True)
+        # 通知用信号量、停止标志用无锁的共享字节：任何一方在持有锁时被杀掉，
+        # multiprocessing.Event 内部的锁就永远不会释放，另一方下一次 set / wait 会卡死
+        self.ready = ready if ready is not None else ctx.Semaphore(0)
+        self.stop_flag = ctx.RawValue('b', 0)
+        self.process = ctx.Process(target=run_vision_worker, args=(self.block.name, self.ready, self.stop_flag, kind),
+                                   kwargs=kwargs, name=f"VisionProcess-{kind}", daemon=True)
+        self._seq = 0
+
+    def start(self):
+        self.process.start()
+        return self
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def poll(self):
+        """有比上次返回更新的结果就返回它，否则返回 None"""
+        snapshot = self.block.read()
+        if snapshot is None or int(snapshot['seq']) == self._seq:
+            return None
+        self._seq = int(snapshot['seq'])
+        return snapshot
+
+    def wait(self, timeout=0.1):
+        # 先清掉已经积累的通知再读：之后写入的结果一定会再 release 一次，不会错过
+        while self.ready.acquire(False):
+            pass
+        snapshot = self.poll()
+        if snapshot is None and self.ready.acquire(timeout=timeout):
+            snapshot = self.poll()
+        return snapshot
+
+    def stop(self, timeout=2.0):
+        self.stop_flag.value = 1
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.stop()
+        self.block.close()
+        self.block.unlink()
@@ -1,20 +1,38 @@
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
-from flask import Flask, render_template_string
-from flask_socketio import SocketIO
+from startup import ArmGate, StartupTimeline, run_parallel, wait_listening, warm_up
+timeline = StartupTimeline()   # 启动计时从这里开始
+
 import socket
+import struct
 import threading
 import cv2
-import mediapipe as mp
-import time
 import numpy as np
-import pydirectinput
+import time
+
+from capture import FrameGrabber
+from find_cameras import apply_mode, best_mode
+from governor import QualityGovernor, default_levels
+from journal import EventJournal
+from metrics import StageTimer, draw_metrics_overlay
+from multicam import CameraFusion
+from output import InputDispatcher, make_backend
+from preprocess import FramePreprocessor
+from preview import PreviewStreamer
+from recording import FrameRecorder, ReplayCapture
+from touch import KeyOwnership, TouchDecoder, UdpTouchServer
+from vision_worker import VisionProcess
+# vision (MediaPipe，导入要 1 秒左右) 在摄像头线程里按需导入，和打开摄像头、启动网页服务并行；
+# Flask / Socket.IO 在 create_app() 里才导入：视觉进程 (spawn) 会重新导入本文件，不需要网页服务
+timeline.mark('imports', 0.0)
 
 # =================配置区域=================
 CAMERA_INDEX = 0   
 ROTATE_TYPE = cv2.ROTATE_90_CLOCKWISE 
 CAM_W, CAM_H = 640, 480
+# 先运行一次 python find_cameras.py：按它缓存的测试结果，在 CAM_W x CAM_H 下选帧率最高的像素格式 (MJPG / YUY2)
+USE_CAMERA_CACHE = True
 
 # 判定范围 (X轴)
 ROI_X_MIN, ROI_X_MAX = 0.05, 0.95
@@ -36,121 +54,246 @@ IR_KEY_MAP = {
     6: 'r'
 }
 
+# MediaPipe 推理区域 (x_min, y_min, x_max, y_max)，只把这块子图送进模型，None = 全图
+# 上沿比 AIR_TOP_LIMIT 多留一点余量，保证手腕刚进判定区时整只手还在画面里
+INFER_ROI = (ROI_X_MIN, AIR_TOP_LIMIT - 0.1, ROI_X_MAX, AIR_BOTTOM_LIMIT)
+INFER_SCALE = 0.5   # 子图再缩小的比例，1.0 = 不缩放
+
 MOTION_SENSITIVITY = 25 
 MOTION_AREA_MIN = 500 
 
+# 运动检测引擎：'diff' = 原版全分辨率帧差；'background' = 金字塔降采样 + 背景模型，
+# 取最高的运动区域 (更省 CPU，手停住也不会立刻丢)。启动时画面里不要有手，否则会留下残影
+MOTION_ENGINE = 'diff'
+MOTION_BLOB_AREA = 400   # 'background' 引擎的最小运动面积 (全分辨率像素数)
+
+# 运动门控：画面静止时跳过 MediaPipe，保持上一次的 IR 等级 (弱机器跑 120fps 用)
+# 静止时最多保持 GATE_KEEPALIVE 秒就强制重跑一次模型；门控统计见 /metrics 的 counters
+MOTION_GATE = False
+GATE_KEEPALIVE = 0.25
+
+# 光流跟踪：每 TRACK_INTERVAL 帧跑一次 MediaPipe，中间帧用 LK 光流跟踪手腕/指尖，0 = 关闭
+# 跟踪成功的关键点比例低于 TRACK_MIN_CONFIDENCE 时立即重新检测
+TRACK_INTERVAL = 0
+TRACK_MIN_CONFIDENCE = 0.6
+
+# 自适应画质：每帧处理耗时 (读到帧之后 -> 按键输出) 的 p90 超过 QUALITY_TARGET_MS 时逐级降级：
+# 缩小推理分辨率 -> 只检测一只手 -> 只用运动检测 (帧差)；有余量时逐级恢复，每次切换都会打印。None = 关闭
+QUALITY_TARGET_MS = None   # 例如 8.3 (120fps)
+
+# 独立采集线程 (最新帧优先，处理不过来的旧帧直接丢弃)
+USE_CAPTURE_THREAD = True
+CAPTURE_RING_SIZE = 3
+
+# 录制 / 回放 (.chrec)，None = 关闭
+# RECORD_PATH: 把摄像头原始帧录下来，用于 bench.py 离线测试
+# REPLAY_PATH: 用录制文件代替摄像头 (按原始节奏循环播放)
+RECORD_PATH = None
+REPLAY_PATH = None
+# 合成画面 (synthetic.py)：不接摄像头，用按脚本移动的光斑代替，用于测端到端延迟 (latency_bench.py)，None = 关闭
+# 场景名 'sweep' / 'fast' / 'steps'，或 {'scene': 'steps', 'fps': 120, ...}
+SYNTHETIC = None
+
+# 逐阶段耗时统计 (http://<ip>:3000/metrics，?format=prometheus 输出 Prometheus 文本)
+METRICS_WINDOW = 1024          # 每个阶段保留最近多少帧
+SHOW_METRICS_OVERLAY = False   # 在预览窗口左上角显示各阶段 p50/p99
+
+# 无头模式：检测循环不画任何标注、不开窗口 (机台上没人看预览时使用)
+# 预览改为 http://<ip>:3000/preview (MJPEG)，在独立线程里按 PREVIEW_FPS 限速绘制，0 = 关闭
+HEADLESS = False
+PREVIEW_FPS = 15
+
+# Air 高度预测：对融合后的 Y 做滤波，再按管线延迟向前外推，抵消采集+推理的滞后，None = 关闭
+PREDICT_FILTER = None      # 'alpha-beta' / 'kalman'
+PREDICT_HORIZON = None     # 外推时长 (秒)，None = 自动使用实测的 采集->判定 延迟 (需 USE_CAPTURE_THREAD)
+PREDICT_EXTRA = 0.0        # 额外补偿的固定延迟 (秒)，例如按键输出、游戏轮询
+PREDICT_PARAMS = {'alpha': 0.5, 'beta': 0.1}   # kalman 用 {'q': 50.0, 'r': 1e-4}
+DEBOUNCE_FRAMES = 2        # 开启滤波后抖动变小，可以适当调低
+
+# 视觉进程：采集 + 推理放到独立进程，结果 (IR 等级 / 手部关键点) 经共享内存传回本进程
+# MediaPipe / OpenCV 不再和 Flask / Socket.IO 抢 GIL，多核机器上触摸延迟不受视觉负载影响
+# 开启后预览窗口由视觉进程显示，/preview (MJPEG) 不可用；/metrics 改为 vision / handoff / capture_to_input 耗时
+VISION_PROCESS = False
+
+# 多摄像头：每个摄像头一个视觉进程，结果按采集时间合并成一份输入状态，None = 只用上面的 CAMERA_INDEX
+# 'air' = 手腕高度 -> IR 键 (同上)；'ground' = 指尖按键 (main.py 的地面检测) -> 滑条键 SLIDER_KEYS，抬手 -> GROUND_AIR_KEY
+# 地面摄像头的按键和平板触摸按来源合并，同一个键任一来源按着就保持按下
+# 每项可选: camera_index, width, height, rotate, mirror, replay_path, synthetic, detector (覆盖检测器参数)
+CAMERAS = None
+# CAMERAS = [
+#     {'kind': 'air', 'camera_index': 0, 'rotate': cv2.ROTATE_90_CLOCKWISE},
+#     {'kind': 'ground', 'camera_index': 1, 'width': 1280, 'height': 720, 'mirror': True,
+#      'detector': {'roi_x_min': 0.25, 'roi_x_max': 0.75, 'air_threshold': 0.6}},
+# ]
+CAMERA_STALE_AFTER = 0.25  # 某个摄像头超过这么多秒没有新结果 (卡住 / 掉线)，松开它贡献的按键
+GROUND_AIR_KEY = 'space'
+
+# 按键输出后端：'pydirectinput' = 模拟键盘 (Windows)；'recording' = 只记录事件，不碰系统输入 (Linux 测试)
+# 'shared-memory' = 直接写 Brokenithm 共享内存 (需 segatools.ini 加载 chuniio-mux.dll，不经过系统输入)
+# 键盘模拟交给独立的分发线程发送，检测循环和网页事件不会被慢的系统输入调用卡住
+INPUT_BACKEND = 'pydirectinput'
+INPUT_PARAMS = {}          # 'recording': {'path': 'keys.log'}；'shared-memory': {'path': 文件} 用普通文件代替命名共享内存
+
+# 平板触摸协议：'bitmask' = 每个触摸帧发一条二进制 16 键位掩码 (带序号，定时重发当心跳，不会卡键)
+# 'keys' = 旧协议，每个键变化发一条 keydown / keyup 字符串 + 每 300ms 一次 sync_keys
+TOUCH_PROTOCOL = 'bitmask'
+# 平板上从左到右 16 个键 (与 segatools.ini 的 [slider] 映射一致)
+SLIDER_KEYS = ['l', 'k', 'j', 'i', 'h', 'g', 'f', 'e', 'd', 'c', 'b', 'a', '9', '8', '7', '6']
+
+# UDP 触摸监听 (与 Socket.IO 并行，包格式同二进制协议)，None = 关闭
+# 客户端需要持续发送 (状态不变也要发心跳)，超过 UDP_RELEASE_TIMEOUT 秒没收到包自动松开
+UDP_PORT = 3001
+UDP_RELEASE_TIMEOUT = 0.5
+
+# 触摸延迟统计：网页客户端每秒和服务器对一次时钟，每个触摸事件带上发送时间
+# 各设备的单程延迟分位数见 http://<ip>:3000/latency，平板状态栏也会实时显示
+TOUCH_LATENCY_WINDOW = 512
+
+# 网页客户端离线缓存 (Service Worker，只在 https / localhost 访问时生效；局域网 http 下靠 ETag + 长缓存)
+SERVICE_WORKER = True
+
+# 事件日志：每次按键变化 (Air / 触摸 / UDP / 地面摄像头) 记一条 32 字节的二进制记录，后台线程写进环形文件，
+# 检测循环不再往控制台打印。python journal.py journal.chjn 统计按住时长 / 事件频率 / 延迟，--follow 实时查看
+# 启动时上一次的日志改名为 journal.chjn.prev；None = 关闭
+JOURNAL_PATH = 'journal.chjn'
+JOURNAL_CAPACITY = 1 << 18     # 环形文件保留的条数 (8 MB)，写满后覆盖最旧的
+
 HOST_IP = '0.0.0.0' 
 PORT = 3000
-
-pydirectinput.PAUSE = 0
-pydirectinput.FAILSAFE = False
 # =========================================
 
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
-    <title>Chuni Half-Screen IR</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.5.4/socket.io.min.js"></script>
-    <style>
-        body { background: #000; overflow: hidden; color: #fff; font-family: monospace; user-select: none; }
-        #status { position: fixed; top: 10px; left: 50%; transform: translateX(-50%); border: 1px solid #555; padding: 5px; background: rgba(0,0,0,0.5); pointer-events: none; z-index: 99; }
-        #keyboard { display: flex; height: 100vh; width: 100vw; }
-        .key { flex: 1; background: #111; box-shadow: inset 1px 0 0 0 rgba(255,255,255,0.1); touch-action: none; }
-        .key:nth-child(4n) { box-shadow: inset 2px 0 0 0 rgba(255, 215, 0, 0.6); }
-        .key.pressed { background: linear-gradient(to bottom, #00c6ff, #0072ff); }
-    </style>
-</head>
-<body>
-    <div id="status">Connecting...</div>
-    <div id="keyboard"></div>
-    <script>
-        try {
-            const socket = io({ transports: ['websocket'], upgrade: false, reconnectionDelay: 1000 });
-            const statusDiv = document.getElementById('status');
-            const keyMap = ['l','k','j','i', 'h','g','f','e', 'd','c','b','a', '9','8','7','6'];
-            
-            keyMap.forEach(k => {
-                let d = document.createElement('div'); d.className = 'key'; d.dataset.key = k;
-                document.getElementById('keyboard').appendChild(d);
-            });
-
-            socket.on('connect', () => { statusDiv.textContent = "READY (Half-Screen IR)"; statusDiv.style.color = "#0f0"; });
-            
-            const currentHeldKeys = new Set();
-            function updateVisuals() {
-                document.querySelectorAll('.key').forEach(el => {
-                    el.classList.toggle('pressed', currentHeldKeys.has(el.dataset.key));
-                });
-            }
-
-            function handleTouch(e) {
-                e.preventDefault(); 
-                const newHeldKeys = new Set();
-                const screenW = window.innerWidth;
-                const keyWidth = screenW / 16;
-                const edgeThreshold = keyWidth * 0.20; 
-
-                Array.from(e.touches).forEach(t => {
-                    let mainIndex = Math.floor(t.clientX / keyWidth);
-                    if (mainIndex >= 0 && mainIndex < 16) {
-                        newHeldKeys.add(keyMap[mainIndex]);
-                        let offset = t.clientX % keyWidth;
-                        if (offset < edgeThreshold && mainIndex > 0) newHeldKeys.add(keyMap[mainIndex - 1]);
-                        if (offset > (keyWidth - edgeThreshold) && mainIndex < 15) newHeldKeys.add(keyMap[mainIndex + 1]);
-                    }
-                });
-
-                newHeldKeys.forEach(k => { if (!currentHeldKeys.has(k)) socket.emit('keydown', k); });
-                currentHeldKeys.forEach(k => { if (!newHeldKeys.has(k)) socket.emit('keyup', k); });
-                currentHeldKeys.clear();
-                newHeldKeys.forEach(k => currentHeldKeys.add(k));
-                updateVisuals();
-            }
-            ['touchstart', 'touchmove', 'touchend', 'touchcancel'].forEach(evt => document.addEventListener(evt, handleTouch, {passive: false}));
-            setInterval(() => { if (socket.connected) socket.emit('sync_keys', Array.from(currentHeldKeys)); }, 300);
-        } catch(e) {}
-    </script>
-</body>
-</html>
-"""
-
-app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*", max_decode_packets=500, async_mode='threading')
-
-server_pressed_keys = set()
-lock = threading.Lock()
-
-@app.route('/')
-def index(): return render_template_string(HTML_TEMPLATE)
-
-@socketio.on('connect')
+app = None             # Flask，create_app() 创建
+socketio = None        # SocketIO
+client_assets = None   # ClientAssets
+request = Response = jsonify = None   # flask 的同名对象，create_app() 导入后填上
+
+# 每个设备 (Socket.IO sid / UDP 地址) 各自记录按下的键，按引用计数合并后交给 input_dispatcher
+touch_decoders = {}   # Socket.IO sid -> TouchDecoder (二进制协议)
+input_dispatcher = None
+key_state = None      # KeyOwnership
+udp_server = None
+journal = None        # EventJournal
+stage_timer = StageTimer(window=METRICS_WINDOW)
+# 触摸单程延迟 (客户端发送 -> 服务器收到)，按设备 IP 分开统计
+touch_latency = StageTimer(window=TOUCH_LATENCY_WINDOW, buckets_ms=(1, 2, 5, 10, 20, 50, 100, 200))
+device_clocks = {}    # 设备 IP -> 客户端上报的 {'rtt_ms', 'offset_ms'}
+preview_streamer = None
+
+def index(): return client_assets.response('index.html', request)
+
+def service_worker(): return client_assets.response('sw.js', request)
+
+def client_file(name): return client_assets.response(name, request, immutable=True)
+
+def metrics():
+    accept = request.headers.get('Accept', '')
+    if request.args.get('format') == 'prometheus' or 'openmetrics' in accept:
+        return Response(stage_timer.to_prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify(stage_timer.snapshot())
+
+def latency():
+    if request.args.get('format') == 'prometheus':
+        return Response(touch_latency.to_prometheus(prefix='chuni_touch'), mimetype='text/plain; version=0.0.4')
+    devices = touch_latency.snapshot()['stages']
+    for device, clock in list(device_clocks.items()):
+        devices.setdefault(device, {}).update(clock)
+    return jsonify(devices)
+
+def preview():
+    if preview_streamer is None:
+        return "Preview disabled (set HEADLESS = True and PREVIEW_FPS > 0)", 404
+    return Response(preview_streamer.mjpeg_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
 def handle_connect(): print("✅ DEVICE CONNECTED!")
 
-@socketio.on('keydown')
-def handle_keydown(key):
-    with lock:
-        if key not in server_pressed_keys:
-            pydirectinput.keyDown(key) 
-            server_pressed_keys.add(key)
-
-@socketio.on('keyup')
-def handle_keyup(key):
-    with lock:
-        if key in server_pressed_keys:
-            pydirectinput.keyUp(key)
-            server_pressed_keys.remove(key)
-
-@socketio.on('sync_keys')
+def record_latency(stamp):
+    # stamp: 客户端换算到服务器时钟的发送时间 (Unix 毫秒)，0 / None = 还没完成时钟同步
+    if stamp:
+        latency = max(0.0, time.time() - stamp / 1000)
+        touch_latency.record(request.remote_addr, latency)
+        return latency
+
+def journal_changes(source, device, changes, frame_id=0, latency=None):
+    # 记的是每个设备自己的按下 / 松开 (KeyOwnership 合并之前)，按住时长按设备配对
+    if journal is None or not changes: return
+    index = journal.device(device)
+    latency = np.nan if latency is None else latency
+    for key, down in changes:
+        journal.log(source, key, down, frame_id=frame_id, latency=latency, device=index)
+
+def handle_clock(report):
+    t1 = time.time() * 1000
+    if report and report.get('rtt') is not None:
+        device_clocks[request.remote_addr] = {'rtt_ms': report['rtt'], 'offset_ms': report.get('offset')}
+    stats = touch_latency.snapshot()['stages'].get(request.remote_addr, {})
+    return {'t1': t1, 'p50': stats.get('p50_ms'), 'p99': stats.get('p99_ms'), 't2': time.time() * 1000}
+
+def handle_disconnect():
+    touch_decoders.pop(request.sid, None)
+    released = key_state.drop(request.sid)
+    journal_changes('touch' if TOUCH_PROTOCOL == 'bitmask' else 'keys', request.sid, [(k, False) for k in released])
+
+def handle_touch(payload):
+    # 一条消息 = 这台设备整个触摸帧的状态，一次加锁完成所有按键变化
+    decoder = touch_decoders.get(request.sid)
+    if decoder is None:
+        # 同一设备的前两条消息可能在两个线程里同时到达，setdefault 保证只留一个 decoder
+        decoder = touch_decoders.setdefault(request.sid, TouchDecoder(SLIDER_KEYS))
+    with decoder.lock:
+        try:
+            changes = decoder.update(payload)
+        except (ValueError, struct.error):
+            return
+        key_state.apply(request.sid, changes)
+        journal_changes('touch', request.sid, changes, decoder.seq or 0, record_latency(decoder.stamp))
+    # 客户端带回调发送时作为 ack (touch_client.py 测往返延迟)
+    return True
+
+def handle_udp_touch(source, changes):
+    key_state.apply(source, changes)
+    journal_changes('udp', source, changes)
+
+def handle_keydown(key, stamp=None):
+    key_state.press(request.sid, key)
+    journal_changes('keys', request.sid, [(key, True)], latency=record_latency(stamp))
+
+def handle_keyup(key, stamp=None):
+    key_state.release(request.sid, key)
+    journal_changes('keys', request.sid, [(key, False)], latency=record_latency(stamp))
+
 def handle_sync(client_keys_list):
-    client_keys = set(client_keys_list)
-    with lock:
-        stuck_keys = server_pressed_keys - client_keys
-        for k in stuck_keys:
-            pydirectinput.keyUp(k)
-            server_pressed_keys.remove(k)
+    released = key_state.sync(request.sid, client_keys_list)
+    journal_changes('keys', request.sid, [(k, False) for k in released])
+
+def create_app():
+    """创建网页服务 (Flask + Socket.IO) 并注册路由 / 事件，只在主进程里调用一次
+
+    放在函数里而不是模块顶层：视觉进程用 spawn 启动，会重新导入 webb.py，
+    不应该为用不到的网页服务付导入 Flask (~0.3 秒) 和渲染网页客户端的开销。
+    """
+    global app, socketio, client_assets, request, Response, jsonify
+    from flask import Flask, Response, jsonify, request
+    from flask_socketio import SocketIO
+    from webclient import ClientAssets
+
+    app = Flask(__name__, static_folder=None)
+    socketio = SocketIO(app, cors_allowed_origins="*", max_decode_packets=500, async_mode='threading')
+    # 网页客户端 (client/ 目录) 启动时渲染一次，之后每次请求直接返回缓存的字节
+    client_assets = ClientAssets({'key_map': SLIDER_KEYS, 'protocol': TOUCH_PROTOCOL, 'service_worker': SERVICE_WORKER})
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/sw.js', view_func=service_worker)
+    app.add_url_rule('/client/<name>', view_func=client_file)
+    app.add_url_rule('/metrics', view_func=metrics)
+    app.add_url_rule('/latency', view_func=latency)
+    app.add_url_rule('/preview', view_func=preview)
+    socketio.on_event('connect', handle_connect)
+    socketio.on_event('clock', handle_clock)
+    socketio.on_event('disconnect', handle_disconnect)
+    socketio.on_event('touch', handle_touch)
+    socketio.on_event('keydown', handle_keydown)
+    socketio.on_event('keyup', handle_keyup)
+    socketio.on_event('sync_keys', handle_sync)
+    return app
 
 def get_local_ips():
     ips = []
@@ -161,171 +304,304 @@ def get_local_ips():
     except: pass
     return ips
 
-# --- 核心修改：下半屏 6 等分逻辑 ---
-def get_ir_level(y_pos):
-    # y_pos: 0.0 (顶) ~ 1.0 (底)
-    
-    # 1. 如果手太高 (超过中线)，视为未触发
-    if y_pos < AIR_TOP_LIMIT: return 0 
-    # 2. 如果手太低 (低于底线)，视为 IR1 (修正误差)
-    if y_pos > AIR_BOTTOM_LIMIT: return 1
-    
-    # 3. 计算有效区域高度 (0.5)
-    valid_height = AIR_BOTTOM_LIMIT - AIR_TOP_LIMIT
-    
-    # 4. 计算手距离底部的距离 (距离底部越远，IR等级越高)
-    # distance_up: 0.0 (在底部) ~ 0.5 (在中间)
-    distance_up = AIR_BOTTOM_LIMIT - y_pos
-    
-    # 5. 映射到 1-6
-    # level = (distance_up / valid_height) * 6
-    # +1 是因为 int 向下取整，我们需要 1-6
-    level = int((distance_up / valid_height) * 6) + 1
-    
-    return max(1, min(6, level))
+def open_capture():
+    if REPLAY_PATH:
+        print(f"📼 Replaying {REPLAY_PATH}")
+        cap = ReplayCapture(REPLAY_PATH, realtime=True, loop=True)
+    elif SYNTHETIC:
+        from synthetic import open_synthetic
+        cap = open_synthetic(SYNTHETIC, CAM_W, CAM_H, ROTATE_TYPE)
+    else:
+        cap = cv2.VideoCapture(CAMERA_INDEX)
+        mode = best_mode(CAMERA_INDEX, CAM_W, CAM_H, cap=cap) if USE_CAMERA_CACHE else None
+        apply_mode(cap, mode or {'width': CAM_W, 'height': CAM_H})
+    if USE_CAPTURE_THREAD:
+        cap = FrameGrabber(cap, CAPTURE_RING_SIZE).start()
+    return cap
+
+def air_detector_params():
+    return dict(air_top=AIR_TOP_LIMIT, air_bottom=AIR_BOTTOM_LIMIT,
+                roi_x_min=ROI_X_MIN, roi_x_max=ROI_X_MAX,
+                motion_sensitivity=MOTION_SENSITIVITY, motion_area_min=MOTION_AREA_MIN,
+                motion_engine=MOTION_ENGINE,
+                motion_params={'area_min': MOTION_BLOB_AREA} if MOTION_ENGINE == 'background' else None,
+                max_num_hands=2, model_complexity=0,
+                min_detection_confidence=0.3, min_tracking_confidence=0.3,
+                infer_roi=INFER_ROI, infer_scale=INFER_SCALE,
+                motion_gate=MOTION_GATE, gate_keepalive=GATE_KEEPALIVE,
+                track_interval=TRACK_INTERVAL, track_min_confidence=TRACK_MIN_CONFIDENCE,
+                predict_filter=PREDICT_FILTER, predict_horizon=PREDICT_HORIZON,
+                predict_extra=PREDICT_EXTRA, predict_params=PREDICT_PARAMS)
+
+def create_air_detector():
+    from vision import AirDetector
+    return AirDetector(**air_detector_params())
+
+def load_air_detector(preprocessor):
+    """导入 MediaPipe + 创建检测器 + 在假帧上预热，返回 (detector, 稳态推理耗时毫秒 或 None)"""
+    detector = create_air_detector()
+    if detector.landmarker is None:
+        return detector, None
+    with timeline.stage('warmup'):
+        frames, steady_ms = warm_up(detector.landmarker, preprocessor.process(np.zeros((CAM_H, CAM_W, 3), np.uint8)))
+    print(f"🔥 model warmed up in {frames} inferences, steady {steady_ms:.1f} ms")
+    return detector, steady_ms
+
+def render_preview(image, result):
+    from vision import draw_air_overlay
+    draw_air_overlay(image, result, AIR_TOP_LIMIT)
+    if SHOW_METRICS_OVERLAY: draw_metrics_overlay(image, stage_timer)
+
+class IrKeyOutput:
+    """IR 等级防抖 + 按键输出：等级归零后再保持 debounce_frames 帧才松开
+
+    每次换键记进事件日志，frame_id / timestamp (采集时间) 是触发这次变化的帧。
+    """
+
+    def __init__(self, debounce_frames):
+        self.debounce_frames = debounce_frames
+        self.debounce_timer = 0
+        self.active_level = 0
+
+    def update(self, level, frame_id=0, timestamp=None):
+        last_level = self.active_level
+        if level > 0:
+            self.active_level = level
+            self.debounce_timer = self.debounce_frames
+        elif self.debounce_timer > 0:
+            self.debounce_timer -= 1
+        else:
+            self.active_level = 0
+
+        if self.active_level != last_level:
+            latency = time.perf_counter() - timestamp if timestamp else np.nan
+            if last_level > 0:
+                input_dispatcher.key_up(IR_KEY_MAP[last_level])
+                if journal is not None: journal.log('air', IR_KEY_MAP[last_level], False, last_level, frame_id, latency)
+            if self.active_level > 0:
+                input_dispatcher.key_down(IR_KEY_MAP[self.active_level])
+                if journal is not None:
+                    journal.log('air', IR_KEY_MAP[self.active_level], True, self.active_level, frame_id, latency)
+        return self.active_level
+
+def update_input_counters(counters):
+    counters.update(input_dispatcher.stats)
+    counters['touch_devices_pressing'] = len(key_state.owned)
+    counters['touch_messages'] = sum(d.messages for d in list(touch_decoders.values()))
+    counters['touch_stale'] = sum(d.stale for d in list(touch_decoders.values()))
+    if udp_server is not None:
+        counters['udp_messages'] = sum(d.messages for d in list(udp_server.decoders.values()))
+        counters['udp_stale'] = sum(d.stale for d in list(udp_server.decoders.values()))
+        counters['udp_timeouts'] = udp_server.timeouts
+    if journal is not None:
+        counters['journal_events'] = journal.total
+        counters['journal_dropped'] = journal.dropped
+
+def report_ready(detail=''):
+    timeline.mark('armed')
+    print(f"✅ Air input armed {detail}".rstrip())
+    timeline.report()
+    stage_timer.counters.update(timeline.counters())
 
 def run_camera_loop():   
+    global preview_streamer
     print("📷 Camera starting (Bottom-Half IR Mode)...")
-    cap = cv2.VideoCapture(CAMERA_INDEX)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAM_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAM_H)
-
-    mp_hands = mp.solutions.hands
-    
-    active_ir_level = 0 
-    last_ir_level = 0   
-    debounce_frames = 2 
-    debounce_timer = 0
-    prev_gray = None
-
-    with mp_hands.Hands(max_num_hands=2, model_complexity=0, min_detection_confidence=0.3, min_tracking_confidence=0.3) as hands:
+    # 旋转写入预分配缓冲区，灰度图整帧只转一次，运动检测和光流跟踪共用
+    preprocessor = FramePreprocessor(ROTATE_TYPE)
+    # 打开摄像头 和 加载 + 预热模型 并行 (两边都要等驱动 / 初始化，几乎不占 CPU)
+    loaded = run_parallel(timeline, camera=open_capture, model=lambda: load_air_detector(preprocessor))
+    cap = loaded['camera']
+    detector, steady_ms = loaded['model']
+    # 稳态之前不输出 Air：刚打开的摄像头前几帧又慢又旧
+    arm_gate = ArmGate(steady_ms) if steady_ms else None
+    armed = arm_gate is None
+    if armed: report_ready()
+    recorder = FrameRecorder(RECORD_PATH) if RECORD_PATH else None
+    if HEADLESS and PREVIEW_FPS > 0:
+        preview_streamer = PreviewStreamer(render_preview, max_fps=PREVIEW_FPS)
+
+    ir_output = IrKeyOutput(DEBOUNCE_FRAMES)
+
+    timer = stage_timer
+
+    with detector:
+        detector.timer = timer
+        governor = None
+        if QUALITY_TARGET_MS:
+            governor = QualityGovernor(detector.set_quality, QUALITY_TARGET_MS, default_levels(INFER_SCALE, 2))
         while cap.isOpened():
+            timer.start_frame()
             success, image = cap.read()
             if not success: 
                 time.sleep(0.01)
                 continue
+            timer.lap('read')
+            work_start = time.perf_counter()
+
+            if recorder is not None:
+                recorder.write(image, getattr(cap, 'timestamp', None))
+
+            image = preprocessor.process(image)
+            timer.lap('rotate')
+
+            # 1. 动态检测 (重心 Y) + 2. AI 检测 (手腕 Y) + 3. 融合判定
+            result = detector.process(image, getattr(cap, 'timestamp', None), preprocessor.gray())
+            detect_seconds = time.perf_counter() - work_start
+
+            # 绘制 UI 网格 (从中间画到底部)；无头模式交给预览线程在拷贝上画
+            if not HEADLESS:
+                render_preview(image, result)
+            elif preview_streamer is not None:
+                preview_streamer.submit(image, result)
+            timer.lap('draw')
 
-            if ROTATE_TYPE is not None: image = cv2.rotate(image, ROTATE_TYPE)
-            
-            h, w, c = image.shape
-            
-            # 这里的 air_y_threshold 设为中间线 (0.5)，用于动态检测范围
-            mid_y = int(h * AIR_TOP_LIMIT)
-
-            current_frame_level = 0 
-
-            # ==========================================
-            # 1. 动态检测 (计算重心 Y)
-            # ==========================================
-            # 只检测下半屏 (mid_y 到 h)
-            roi_frame = image[mid_y:h, 0:w]
-            gray = cv2.cvtColor(roi_frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
-            
-            motion_y = -1 
-            
-            if prev_gray is not None:
-                frame_delta = cv2.absdiff(prev_gray, gray)
-                thresh = cv2.threshold(frame_delta, MOTION_SENSITIVITY, 255, cv2.THRESH_BINARY)[1]
-                
-                M = cv2.moments(thresh)
-                if M["m00"] > MOTION_AREA_MIN: 
-                    # 计算相对于 roi 的 cy
-                    cy_roi = int(M["m01"] / M["m00"])
-                    # 转换回全图坐标 (加上 mid_y 偏移)
-                    cy_global = cy_roi + mid_y
-                    
-                    motion_y = cy_global / h 
-                    
-                    cx_roi = int(M["m10"] / M["m00"])
-                    cv2.circle(image, (cx_roi, cy_global), 20, (255, 0, 0), 2)
-            
-            prev_gray = gray
-
-            # ==========================================
-            # 2. AI 检测 (手腕 Y)
-            # ==========================================
-            hand_y = -1
-            image.flags.writeable = False
-            results = hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            image.flags.writeable = True
-
-            if results.multi_hand_landmarks:
-                min_y = 1.0 # 找最高的手 (Y值最小)
-                found = False
-                for hl in results.multi_hand_landmarks:
-                    wrist = hl.landmark[0]
-                    # 必须在 X 范围内，且在下半屏 (y > 0.5)
-                    if ROI_X_MIN < wrist.x < ROI_X_MAX and wrist.y > AIR_TOP_LIMIT:
-                        if wrist.y < min_y:
-                            min_y = wrist.y
-                            found = True
-                        cv2.circle(image, (int(wrist.x*w), int(wrist.y*h)), 15, (0, 255, 0), -1)
-                if found: hand_y = min_y
-
-            # ==========================================
-            # 3. 融合判定
-            # ==========================================
-            final_y = -1
-            if hand_y != -1: final_y = hand_y
-            elif motion_y != -1: final_y = motion_y
-            
-            if final_y != -1:
-                current_frame_level = get_ir_level(final_y)
-            else:
-                current_frame_level = 0
-
-            # ==========================================
-            # 绘制 UI 网格 (从中间画到底部)
-            # ==========================================
-            # 计算每层的高度 (像素)
-            segment_px = (h - mid_y) / 6
-            
-            # 画顶部分界线 (蓝线)
-            cv2.line(image, (0, mid_y), (w, mid_y), (255, 0, 0), 2)
-            cv2.putText(image, "AIR LIMIT (50%)", (10, mid_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
-
-            for i in range(1, 7):
-                # IR1 在最底下，IR6 在最上面(mid_y附近)
-                # 计算每层线的 Y 坐标
-                # IR6 的顶线是 mid_y
-                # IR1 的顶线是 h - seg
-                # 当前层的顶线:
-                level_top_y = int(h - (i * segment_px))
-                
-                color = (0, 255, 255) if i == current_frame_level else (50, 50, 50)
-                thickness = 2 if i == current_frame_level else 1
-                
-                cv2.line(image, (0, level_top_y), (w, level_top_y), color, thickness)
-                # 文字画在线上方
-                cv2.putText(image, f"IR{i}", (10, level_top_y + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-
-            # ==========================================
             # 4. 输入执行
-            # ==========================================
-            if current_frame_level > 0:
-                active_ir_level = current_frame_level
-                debounce_timer = debounce_frames
-            elif debounce_timer > 0:
-                debounce_timer -= 1
-            else:
-                active_ir_level = 0
-
-            if active_ir_level != last_ir_level:
-                if last_ir_level > 0:
-                    pydirectinput.keyUp(IR_KEY_MAP[last_ir_level])
-                if active_ir_level > 0:
-                    new_key = IR_KEY_MAP[active_ir_level]
-                    pydirectinput.keyDown(new_key)
-                    print(f"IR{active_ir_level} ({new_key})")
-            
-            last_ir_level = active_ir_level
-
-            cv2.imshow('Chuni Half-IR', image)
-            if cv2.waitKey(1) & 0xFF == 27: break
+            if not armed:
+                armed = arm_gate.update(detect_seconds)
+                if armed: report_ready(f"after {arm_gate.seen} frames")
+            active_ir_level = ir_output.update(result.level if armed else 0, getattr(cap, 'frame_id', 0),
+                                               getattr(cap, 'timestamp', None))
+            timer.lap('input')
+            if governor is not None:
+                governor.update(time.perf_counter() - work_start)
+
+            if not HEADLESS:
+                cv2.imshow('Chuni Half-IR', image)
+                if cv2.waitKey(1) & 0xFF == 27: break
+                timer.lap('gui')
+            timer.end_frame()
+
+            timer.counters['ir_level'] = active_ir_level
+            timer.counters.update(detector.stats)
+            if governor is not None: timer.counters.update(governor.stats)
+            update_input_counters(timer.counters)
+            if detector.predictor is not None:
+                timer.counters['predict_horizon_ms'] = detector.predictor.current_horizon() * 1000
+            if USE_CAPTURE_THREAD:
+                timer.counters['frames_captured'] = cap.frames_captured
+                timer.counters['frames_dropped'] = cap.frames_dropped
     
+    if recorder is not None:
+        recorder.close()
+        print(f"🔴 {recorder.frames_written} frames recorded to {RECORD_PATH}")
+    if USE_CAPTURE_THREAD:
+        print(f"📷 captured {cap.frames_captured} frames, dropped {cap.frames_dropped}")
+    if MOTION_GATE or TRACK_INTERVAL:
+        print(f"🚦 hands.process ran {detector.stats['hands_runs']}x, tracked {detector.stats['hands_tracked']}x, "
+              f"gated {detector.stats['hands_gated']}x, saved ~{detector.stats['hands_saved_ms'] / 1000:.1f}s CPU")
+    if governor is not None:
+        print(f"🎚 quality level {governor.level}, {len(governor.transitions)} transitions")
+    if preview_streamer is not None:
+        preview_streamer.stop()
+    input_dispatcher.close()
+    if journal is not None: journal.close()
     cap.release()
-    cv2.destroyAllWindows()
+    if not HEADLESS: cv2.destroyAllWindows()
+    os._exit(0)
+
+def camera_process_params(spec):
+    kind = spec.get('kind', 'air')
+    capture = dict(camera_index=spec.get('camera_index', CAMERA_INDEX), width=spec.get('width', CAM_W),
+                   height=spec.get('height', CAM_H), replay_path=spec.get('replay_path'), synthetic=spec.get('synthetic'),
+                   use_thread=USE_CAPTURE_THREAD, ring_size=CAPTURE_RING_SIZE, use_cache=USE_CAMERA_CACHE)
+    if kind == 'air':
+        detector = air_detector_params()
+    else:
+        detector = dict(slider_keys=len(SLIDER_KEYS), max_num_hands=2, model_complexity=0,
+                        min_detection_confidence=0.7, min_tracking_confidence=0.8,
+                        track_interval=TRACK_INTERVAL, track_min_confidence=TRACK_MIN_CONFIDENCE)
+    detector.update(spec.get('detector', {}))
+    return dict(kind=kind, capture=capture, detector=detector,
+                rotate=spec.get('rotate', ROTATE_TYPE if kind == 'air' else None), mirror=spec.get('mirror', False),
+                show_window=not HEADLESS)
+
+def run_multi_camera_loop():
+    # 多摄像头模式：每个摄像头一个视觉进程，本进程只合并结果并输出按键
+    print(f"📷 Starting {len(CAMERAS)} camera processes...")
+    ir_output = IrKeyOutput(0)   # 防抖已经在 CameraFusion 里按各摄像头的帧数做过
+    timer = stage_timer
+    pressed = set()              # 地面摄像头当前按着的键名
+
+    with CameraFusion([camera_process_params(spec) for spec in CAMERAS],
+                      stale_after=CAMERA_STALE_AFTER, debounce_frames=DEBOUNCE_FRAMES) as fusion:
+        fusion.start()
+        ready = False
+        while fusion.is_alive():
+            state = fusion.wait(timeout=0.1)
+            # 每个视觉进程都在预热 + ArmGate 之后才发布结果，全部到齐即就绪
+            if not ready and all(s is not None for s in fusion.latest):
+                ready = True
+                report_ready()
+            timer.start_frame()
+            active_ir_level = ir_output.update(state.level, timestamp=state.timestamp)
+            keys = {SLIDER_KEYS[i] for i in state.keys if i < len(SLIDER_KEYS)}
+            if state.air: keys.add(GROUND_AIR_KEY)
+            changes = [(k, False) for k in pressed - keys] + [(k, True) for k in keys - pressed]
+            key_state.apply('camera', changes)
+            journal_changes('ground', 'camera', changes,
+                            latency=time.perf_counter() - state.timestamp if state.timestamp else None)
+            pressed = keys
+            timer.lap('input')
+            timer.end_frame()
+
+            if state.timestamp:
+                timer.record('capture_to_input', max(0.0, time.perf_counter() - state.timestamp))
+                timer.record('camera_skew', state.skew)
+            for i, snapshot in enumerate(fusion.latest):
+                if snapshot is None: continue
+                timer.counters[f'camera{i}_frame_ms'] = float(snapshot['frame_ms'])
+                timer.counters[f'camera{i}_frames_dropped'] = int(snapshot['frames_dropped'])
+            timer.counters['ir_level'] = active_ir_level
+            timer.counters['cameras_stale'] = len(state.stale)
+            timer.counters.update(fusion.stats)
+            update_input_counters(timer.counters)
+
+    journal_changes('ground', 'camera', [(k, False) for k in key_state.drop('camera')])
+    input_dispatcher.close()
+    if journal is not None: journal.close()
+    os._exit(0)
+
+def run_vision_process_loop():
+    # 视觉进程模式：本进程只做 防抖 + 按键输出，采集 / 推理 / 预览窗口都在 VisionProcess 里
+    print("📷 Camera starting in vision process (Bottom-Half IR Mode)...")
+    capture = dict(camera_index=CAMERA_INDEX, width=CAM_W, height=CAM_H, replay_path=REPLAY_PATH, synthetic=SYNTHETIC,
+                   use_thread=USE_CAPTURE_THREAD, ring_size=CAPTURE_RING_SIZE, use_cache=USE_CAMERA_CACHE)
+    ir_output = IrKeyOutput(DEBOUNCE_FRAMES)
+    timer = stage_timer
+
+    with VisionProcess('air', capture=capture, detector=air_detector_params(), quality_target_ms=QUALITY_TARGET_MS,
+                       rotate=ROTATE_TYPE, record_path=RECORD_PATH, show_window=not HEADLESS,
+                       window_name='Chuni Half-IR') as vision:
+        vision.start()
+        snapshot = None
+        while vision.is_alive():
+            latest = vision.wait(timeout=0.1)
+            if latest is None: continue
+            # 视觉进程预热完、处理耗时稳定之后才开始发布结果
+            if snapshot is None: report_ready()
+            snapshot = latest
+            timer.start_frame()
+            active_ir_level = ir_output.update(int(snapshot['level']), int(snapshot['frame_id']),
+                                               float(snapshot['timestamp']))
+            timer.lap('input')
+            timer.end_frame()
+
+            # 采集 -> 本进程拿到结果 (包含视觉进程的处理耗时和跨进程唤醒延迟)
+            timer.record('vision', float(snapshot['frame_ms']) / 1000)
+            timer.record('handoff', max(0.0, time.perf_counter() - float(snapshot['published'])))
+            timer.record('capture_to_input', max(0.0, time.perf_counter() - float(snapshot['timestamp'])))
+            timer.counters['ir_level'] = active_ir_level
+            timer.counters['hands_runs'] = int(snapshot['hands_runs'])
+            timer.counters['quality_level'] = int(snapshot['quality_level'])
+            update_input_counters(timer.counters)
+            if USE_CAPTURE_THREAD:
+                timer.counters['frames_captured'] = int(snapshot['frames_captured'])
+                timer.counters['frames_dropped'] = int(snapshot['frames_dropped'])
+
+    if snapshot is not None and USE_CAPTURE_THREAD:
+        print(f"📷 captured {snapshot['frames_captured']} frames, dropped {snapshot['frames_dropped']}")
+    input_dispatcher.close()
+    if journal is not None: journal.close()
     os._exit(0)
 
 if __name__ == '__main__':
@@ -336,15 +612,35 @@ if __name__ == '__main__':
     print('='*60)
     for ip in ips:
         print(f' 👉 http://{ip}:{PORT}')
+    if HEADLESS and PREVIEW_FPS > 0:
+        print(f' 🖥  预览: http://<ip>:{PORT}/preview')
+    if UDP_PORT:
+        print(f' 📡 UDP 触摸: <ip>:{UDP_PORT}')
+    if JOURNAL_PATH:
+        print(f' 📝 事件日志: {JOURNAL_PATH} (python journal.py {JOURNAL_PATH} --follow 实时查看)')
     print('='*60 + '\n')
 
-    t = threading.Thread(target=lambda: socketio.run(app, host=HOST_IP, port=PORT, debug=False))
-    t.daemon = True
-    t.start()
+    input_dispatcher = InputDispatcher(make_backend(INPUT_BACKEND, **INPUT_PARAMS))
+    key_state = KeyOwnership(input_dispatcher)
+    if JOURNAL_PATH:
+        journal = EventJournal(JOURNAL_PATH, JOURNAL_CAPACITY)
+    if UDP_PORT:
+        udp_server = UdpTouchServer(SLIDER_KEYS, handle_udp_touch, HOST_IP, UDP_PORT, UDP_RELEASE_TIMEOUT).start()
+
+    # 触摸先可用：网页服务起来之后再去打开摄像头 / 加载模型
+    with timeline.stage('web'):
+        create_app()
+        t = threading.Thread(target=lambda: socketio.run(app, host=HOST_IP, port=PORT, debug=False))
+        t.daemon = True
+        t.start()
+        wait_listening(PORT, '127.0.0.1' if HOST_IP == '0.0.0.0' else HOST_IP)
     
     try:
-        run_camera_loop()
+        if CAMERAS: run_multi_camera_loop()
+        elif VISION_PROCESS: run_vision_process_loop()
+        else: run_camera_loop()
     except KeyboardInterrupt: pass
     except Exception as e: print(f"Error: {e}")
     finally:
+        if journal is not None: journal.close()
         os._exit(0)
\ No newline at end of file
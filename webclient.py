@@ -0,0 +1,55 @@
+import hashlib
+import json
+import mimetypes
+import os
+
+import jinja2
+from flask import Response
+
+CLIENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'client')
+
+# 按配置渲染的文件，其余文件原样提供
+TEMPLATES = ('index.html', 'sw.js')
+
+
+def _digest(data):
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+class ClientAssets:
+    """平板网页客户端：启动时把 client/ 下的文件一次性读进内存并渲染，请求时直接返回字节
+
+    /client/ 下的静态资源 URL 带内容哈希 (?v=)，可以长期缓存；首页和 Service Worker
+    每次用 ETag 协商 (未变化时返回 304)，重连 / 刷新不用重新下载任何东西。
+    """
+
+    def __init__(self, config, directory=CLIENT_DIR):
+        files = {}
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name), 'rb') as f:
+                files[name] = f.read()
+
+        self.versions = {name: _digest(data) for name, data in files.items() if name not in TEMPLATES}
+        self.build = _digest(json.dumps([self.versions, config], sort_keys=True).encode())
+
+        env = jinja2.Environment()
+        self.assets = {}   # name -> (bytes, mimetype, etag)
+        for name, data in files.items():
+            if name in TEMPLATES:
+                text = env.from_string(data.decode('utf-8')).render(
+                    config=config, versions=self.versions, build=self.build)
+                data = text.encode('utf-8')
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            self.assets[name] = (data, mimetype, _digest(data))
+
+    def response(self, name, request, immutable=False):
+        if name not in self.assets:
+            return Response("Not Found", status=404)
+        data, mimetype, etag = self.assets[name]
+        resp = Response(data, mimetype=mimetype)
+        resp.set_etag(etag)
+        if immutable and request.args.get('v') == self.versions.get(name):
+            resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            resp.headers['Cache-Control'] = 'no-cache'
+        return resp.make_conditional(request)